@@ -9,6 +9,7 @@ from bqskit.ir.gates import ZGate
 from bqskit.passes import *
 from resize import ResizingGateDependencyPredicate
 from resize import ResizingQFactorPredicate
+from resize import ResizingQFactorCheckPass
 from resize import GateDependencyResize
 from resize import BlockLayerGenerator
 from pathlib import Path
@@ -22,13 +23,16 @@ qc2 = Circuit.from_file(f'{dir}/qasms/exp2.qasm')
 initial_coupling = [(0, 1), (1, 2), (2, 3)]
 model = MachineModel(qc1.num_qudits, coupling_graph=initial_coupling)
 
+# The check pass runs the qfactor instantiations on the compiler workers, and the predicate reuses its result.
+qfactor_predicate = ResizingQFactorPredicate()
 workflow = [
     SetModelPass(model),
     IfThenElsePass(
         ResizingGateDependencyPredicate(),
         GateDependencyResize(),
+        [ResizingQFactorCheckPass(qfactor_predicate),
         IfThenElsePass(
-            ResizingQFactorPredicate(),
+            qfactor_predicate,
             [LEAPSynthesisPass(
                 layer_generator=BlockLayerGenerator(),
             ),
@@ -44,7 +48,7 @@ workflow = [
                 'Unable to resize the circuit;',
                 logging.WARNING,
             ),
-        )
+        )]
     )
 ]
 
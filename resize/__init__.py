@@ -1,5 +1,9 @@
 from .gatedeppredicate import ResizingGateDependencyPredicate
 from .qfactorpredicate import ResizingQFactorPredicate
+from .qfactorpredicate import ResizingQFactorCheckPass
 from .gatedependencyresize import GateDependencyResize
 from .blocklayer import BlockLayerGenerator
-__all__ = ["ResizingGateDependencyPredicate", "ResizingQFactorPredicate", "GateDependencyResize", "BlockLayerGenerator"]
+from .cache import ResultCache
+from .profiling import ResizeProfile
+__all__ = ["ResizingGateDependencyPredicate", "ResizingQFactorPredicate", "ResizingQFactorCheckPass",
+           "GateDependencyResize", "BlockLayerGenerator", "ResultCache", "ResizeProfile"]
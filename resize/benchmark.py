@@ -0,0 +1,381 @@
+"""
+This module implements the benchmark suite of the resizing passes over the bundled `qasms/` circuits.
+
+Each circuit is resized by the gate dependency path ('greedy' and 'bfs') and by the QFactor path ('qfactor') of
+`examples/circuit_resizing.py`. Every stage runs in its own process, so that its peak memory is measured alone
+and a stage that exceeds the timeout can be stopped. The results are written to a JSON file, which can be
+compared against the results of a previous run with `--baseline` to flag the regressions:
+
+    python -m resize.benchmark --output results.json
+    python -m resize.benchmark --output new.json --baseline results.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import signal
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from bqskit.compiler import MachineModel
+from bqskit.compiler.compiler import Compiler
+from bqskit.ir.circuit import Circuit
+from bqskit.passes import ForEachBlockPass
+from bqskit.passes import IfThenElsePass
+from bqskit.passes import LEAPSynthesisPass
+from bqskit.passes import QuickPartitioner
+from bqskit.passes import ScanningGateRemovalPass
+from bqskit.passes import SetModelPass
+from bqskit.passes import UnfoldPass
+from .blocklayer import BlockLayerGenerator
+from .gatedependencyresize import GateDependencyResize
+from .gatedeppredicate import ResizingGateDependencyPredicate
+from .profiling import ResizeProfile
+from .qfactor_resizable_checking import shutdown_executor
+from .qfactorpredicate import ResizingQFactorCheckPass
+from .qfactorpredicate import ResizingQFactorPredicate
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_logger = logging.getLogger(__name__)
+
+STAGES = ('greedy', 'bfs', 'qfactor')
+"""The resizing stages run on every circuit."""
+
+DEFAULT_QASM_DIR = Path(__file__).parent.parent / 'qasms'
+
+# The metrics that are worse when they grow, with the tolerance argument of `compare_results` they use. The
+# metrics without tolerance are regressions as soon as they grow.
+_COMPARED_METRICS = {
+    'wall_time': 'time_tolerance',
+    'peak_rss_mb': 'memory_tolerance',
+    'num_instantiations': 'count_tolerance',
+    'num_successors': 'count_tolerance',
+    'num_qudits': None,
+    'multi_qudit_depth': None,
+}
+
+
+def get_peak_rss_mb() -> float | None:
+    """The peak resident memory in MiB of this process and of its terminated children, or None if unknown."""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def run_stage(path: str, stage: str, num_workers: int = -1, seed: int | None = None) -> dict:
+    """
+    Resize a circuit with one stage and measure it.
+
+    The passes are profiled, see `profile_pass`. The 'qfactor' stage runs the QFactor workflow of
+    `examples/circuit_resizing.py` on the compiler: `ResizingQFactorCheckPass` checks the circuit on the workers,
+    then the blocks of the picked pair are synthesized and the result is resized by gate dependency. Its
+    instantiations are the ones of the check, and its successors the ones generated by `BlockLayerGenerator`,
+    which `LEAPSynthesisPass` then instantiates.
+
+    Args:
+        path (str): the QASM file of the circuit.
+        stage (str): the stage to run, see `STAGES`.
+        num_workers (int): the number of workers of the compiler, -1 for all the CPUs. (Default: -1)
+        seed (int | None): the seed of the random choices of the stage. (Default: None)
+
+    Returns:
+        (dict): the wall time, the peak memory, the number of qubits and multi-qudit depth before and after
+            resizing, the number of instantiations and of synthesis successors and the profile of the passes.
+    """
+    if stage not in STAGES:
+        raise ValueError(f'Invalid stage {stage}. Should choose between {", ".join(STAGES)}.')
+    if seed is not None:
+        np.random.seed(seed)
+    circuit = Circuit.from_file(path)
+    with Compiler(num_workers=num_workers) as compiler:
+        start = time.perf_counter()
+        if stage == 'qfactor':
+            qfactor_predicate = ResizingQFactorPredicate(profile=True)
+            workflow = [
+                SetModelPass(MachineModel(
+                    circuit.num_qudits,
+                    coupling_graph=[(q, q + 1) for q in range(circuit.num_qudits - 1)],
+                )),
+                ResizingQFactorCheckPass(qfactor_predicate),
+                IfThenElsePass(
+                    qfactor_predicate,
+                    [
+                        LEAPSynthesisPass(layer_generator=BlockLayerGenerator(profile=True)),
+                        UnfoldPass(),
+                        QuickPartitioner(block_size=3),
+                        ForEachBlockPass(ScanningGateRemovalPass()),
+                        UnfoldPass(),
+                        GateDependencyResize(seed=seed, profile=True),
+                    ],
+                ),
+            ]
+            resized, data = compiler.compile(circuit, workflow, request_data=True, data={'seed': seed})
+        else:
+            workflow = IfThenElsePass(
+                ResizingGateDependencyPredicate(profile=True),
+                GateDependencyResize(resizing_method=stage, seed=seed, profile=True),
+            )
+            resized, data = compiler.compile(circuit, workflow, request_data=True)
+        wall_time = time.perf_counter() - start
+    shutdown_executor()
+    profile = data.get(ResizeProfile.pass_data_key, {})
+    counters = profile.get('counters', {})
+    return {
+        'wall_time': wall_time,
+        'peak_rss_mb': get_peak_rss_mb(),
+        'num_qudits_in': circuit.num_qudits,
+        'num_qudits': resized.num_qudits,
+        'multi_qudit_depth_in': circuit.multi_qudit_depth,
+        'multi_qudit_depth': resized.multi_qudit_depth,
+        'num_instantiations': counters.get('instantiations', 0),
+        'num_successors': counters.get('successors_generated', 0),
+        'profile': profile,
+    }
+
+
+def _run_stage_process(connection, path: str, stage: str, num_workers: int, seed: int | None) -> None:
+    """The entry point of the process of `run_isolated_stage`."""
+    # Lead a new process group, so that the processes started by the stage can be stopped with it.
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    # Stop on terminate through the exceptions, so that the compiler and the pools are shut down.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    try:
+        connection.send(('ok', run_stage(path, stage, num_workers, seed)))
+    except Exception as e:
+        connection.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        connection.close()
+
+
+def _signal_stage(process: multiprocessing.Process, signum: int) -> None:
+    """Send `signum` to the process of a stage and to the processes it started, see `_run_stage_process`."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signum)
+        else:
+            os.kill(process.pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_isolated_stage(
+        path: str,
+        stage: str,
+        num_workers: int = -1,
+        seed: int | None = None,
+        timeout: float | None = None,
+) -> dict:
+    """
+    Run `run_stage` in a new process, so that the peak memory only accounts for this stage.
+
+    Args:
+        path (str): the QASM file of the circuit.
+        stage (str): the stage to run, see `STAGES`.
+        num_workers (int): the number of workers of the compiler, -1 for all the CPUs. (Default: -1)
+        seed (int | None): the seed of the random choices of the stage. (Default: None)
+        timeout (float | None): stop the stage after this number of seconds. If left as None, the stage is
+            never stopped. (Default: None)
+
+    Returns:
+        (dict): the results of `run_stage` with a 'status' of 'ok', or an 'error' or 'timeout' status.
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_stage_process, args=(sender, path, stage, num_workers, seed))
+    process.start()
+    sender.close()
+    try:
+        if receiver.poll(timeout):
+            status, result = receiver.recv()
+        else:
+            status, result = 'timeout', f'Stopped after {timeout} seconds.'
+    except EOFError:
+        status, result = 'error', f'The stage process exited with code {process.exitcode}.'
+    if status != 'ok':
+        _signal_stage(process, signal.SIGTERM)
+    process.join(30)
+    if status != 'ok' or process.is_alive():
+        # the pool workers still running an instantiation do not stop on terminate
+        _signal_stage(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        process.join()
+    if status != 'ok':
+        _logger.warning(f'Stage {stage} of {Path(path).name}: {result}')
+        return {'status': status, 'message': result}
+    return {'status': status, **result}
+
+
+def run_benchmarks(
+        paths: list,
+        stages: tuple = STAGES,
+        num_workers: int = -1,
+        seed: int | None = None,
+        timeout: float | None = None,
+) -> dict:
+    """
+    Run every stage on every circuit, see `run_isolated_stage`.
+
+    Args:
+        paths (list): the QASM files of the circuits.
+        stages (tuple): the stages to run, see `STAGES`. (Default: STAGES)
+        num_workers (int): the number of workers of the compiler, -1 for all the CPUs. (Default: -1)
+        seed (int | None): the seed of the random choices of the stages. (Default: None)
+        timeout (float | None): stop each stage after this number of seconds. (Default: None)
+
+    Returns:
+        (dict): the environment of the run and the results of each circuit and stage.
+    """
+    results = []
+    for path in paths:
+        for stage in stages:
+            _logger.info(f'Run stage {stage} on {Path(path).name}.')
+            result = run_isolated_stage(str(path), stage, num_workers, seed, timeout)
+            results.append({'circuit': Path(path).stem, 'stage': stage, **result})
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'num_cpus': multiprocessing.cpu_count(),
+            'num_workers': num_workers,
+            'seed': seed,
+            'timeout': timeout,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare_results(
+        results: dict,
+        baseline: dict,
+        time_tolerance: float = 0.2,
+        memory_tolerance: float = 0.2,
+        count_tolerance: float = 0.1,
+        min_time: float = 0.5,
+) -> list[str]:
+    """
+    Find the regressions of a benchmark run compared to a baseline run, see `run_benchmarks`.
+
+    A stage regresses when it does not finish anymore, when it resizes to more qubits or a larger multi-qudit
+    depth, or when its wall time, peak memory, number of instantiations or number of synthesis successors grow
+    by more than their tolerance.
+    The wall times that stay below `min_time` are not compared, since they are mostly noise.
+
+    Args:
+        results (dict): the new run.
+        baseline (dict): the run to compare against.
+        time_tolerance (float): the relative growth of the wall time that is tolerated. (Default: 0.2)
+        memory_tolerance (float): the relative growth of the peak memory that is tolerated. (Default: 0.2)
+        count_tolerance (float): the relative growth of the numbers of instantiations and of successors that is
+            tolerated.
+            (Default: 0.1)
+        min_time (float): the wall time in seconds below which the times are not compared. (Default: 0.5)
+
+    Returns:
+        (list[str]): a description of every regression.
+    """
+    tolerances = {
+        'time_tolerance': time_tolerance,
+        'memory_tolerance': memory_tolerance,
+        'count_tolerance': count_tolerance,
+    }
+    baseline_results = {(result['circuit'], result['stage']): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        name = f'{result["circuit"]} ({result["stage"]})'
+        old = baseline_results.get((result['circuit'], result['stage']))
+        if old is None or old['status'] != 'ok':
+            continue
+        if result['status'] != 'ok':
+            regressions.append(f'{name}: {result["status"]}, {result["message"]}')
+            continue
+        for metric, tolerance in _COMPARED_METRICS.items():
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if metric == 'wall_time' and max(new_value, old_value) < min_time:
+                continue
+            limit = old_value if tolerance is None else old_value * (1 + tolerances[tolerance])
+            if new_value > limit:
+                regressions.append(f'{name}: {metric} went from {old_value:.6g} to {new_value:.6g}')
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    """Format the results of `run_benchmarks` as a table."""
+    lines = [
+        f'{"circuit":<14}{"stage":<9}{"status":<9}{"time (s)":>10}{"rss (MiB)":>11}'
+        f'{"qubits":>9}{"depth":>11}{"inst.":>8}{"succ.":>8}',
+    ]
+    for result in results['results']:
+        line = f'{result["circuit"]:<14}{result["stage"]:<9}{result["status"]:<9}'
+        if result['status'] == 'ok':
+            rss = '-' if result['peak_rss_mb'] is None else f'{result["peak_rss_mb"]:.0f}'
+            qubits = f'{result["num_qudits_in"]}->{result["num_qudits"]}'
+            depth = f'{result["multi_qudit_depth_in"]}->{result["multi_qudit_depth"]}'
+            line += (
+                f'{result["wall_time"]:>10.2f}{rss:>11}{qubits:>9}{depth:>11}'
+                f'{result["num_instantiations"]:>8}{result.get("num_successors", 0):>8}'
+            )
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv: list | None = None) -> int:
+    """Run the benchmark suite from the command line, and return 1 if a regression is found."""
+    parser = argparse.ArgumentParser(description='Benchmark the resizing passes over a directory of QASM files.')
+    parser.add_argument('--qasm-dir', type=Path, default=DEFAULT_QASM_DIR, help='the directory of the circuits')
+    parser.add_argument('--circuits', nargs='+', help='the names of the circuits to run, all of them by default')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help='the stages to run')
+    parser.add_argument('--output', type=Path, help='the JSON file to write the results to')
+    parser.add_argument('--baseline', type=Path, help='the JSON results of a previous run to compare against')
+    parser.add_argument('--num-workers', type=int, default=-1, help='the workers of the compiler, all by default')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random choices (default: 0)')
+    parser.add_argument('--timeout', type=float, default=600, help='the limit of each stage in seconds')
+    parser.add_argument('--time-tolerance', type=float, default=0.2)
+    parser.add_argument('--memory-tolerance', type=float, default=0.2)
+    parser.add_argument('--count-tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    paths = sorted(args.qasm_dir.glob('*.qasm'))
+    if args.circuits is not None:
+        paths = [path for path in paths if path.stem in args.circuits]
+    if not paths:
+        parser.error(f'No circuit to run in {args.qasm_dir}.')
+    results = run_benchmarks(paths, tuple(args.stages), args.num_workers, args.seed, args.timeout)
+    print(format_results(results))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.baseline is None:
+        return 0
+    regressions = compare_results(
+        results,
+        json.loads(args.baseline.read_text()),
+        args.time_tolerance,
+        args.memory_tolerance,
+        args.count_tolerance,
+    )
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print(f'No regression compared to {args.baseline}.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,24 @@
 """This module implements the BlockLayerGenerator class."""
 from __future__ import annotations
 
+import logging
+from bisect import bisect_right
+from typing import Iterator
+
 from bqskit.compiler.passdata import PassData
 from bqskit.ir.circuit import Circuit
 from bqskit.ir.gate import Gate
+from bqskit.ir.location import CircuitLocation
 from bqskit.ir.gates import CNOTGate
 from bqskit.ir.gates import U3Gate
 from bqskit.passes.search.generator import LayerGenerator
 from bqskit.qis.state.state import StateVector
 from bqskit.qis.state.system import StateSystem
 from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from .profiling import count
+from .profiling import profile_pass
+
+_logger = logging.getLogger(__name__)
 
 
 class BlockLayerGenerator(LayerGenerator):
@@ -19,15 +28,27 @@ class BlockLayerGenerator(LayerGenerator):
     Starts a circuit by placing a single-qudit gate on each qudit. Expands a
     circuit by placing a two-qudit building block on all valid links. Each
     building block is composed of a two-qudit gate followed by two single-qudit
-    gates.
+    gates. The successors that are structurally identical to one already
+    generated since the search frontier last could have been cleared are
+    skipped, see `iter_successors`.
     """
 
+    edges_key = 'block_layer_edges'
+    """The key of the edge index of the current blocks in the PassData."""
+
+    visited_key = 'block_layer_visited'
+    """The key of the structures of the generated successors in the PassData."""
+
+    last_successors_key = 'block_layer_last_successors'
+    """The key of the structures of the successors of the last expanded node in the PassData."""
+
     def __init__(
         self,
         two_qudit_gate: Gate = CNOTGate(),
         single_qudit_gate_1: Gate = U3Gate(),
         single_qudit_gate_2: Gate | None = None,
         initial_layer_gate: Gate | None = None,
+        profile: bool = False,
     ) -> None:
         """
         Construct a BlockLayerGenerator.
@@ -48,6 +69,12 @@ class BlockLayerGenerator(LayerGenerator):
                 gate that creates the initial layer. If left as None,
                 defaults to `single_qudit_gate_1`. (Default: None)
 
+            profile (bool): Record the time spent generating the successors
+                and the number of generated and skipped successors in the
+                PassData, see `profile_pass`. The profile is not logged, since
+                the successors are generated once per synthesis step.
+                (Default: False)
+
         Raises:
             ValueError: If `two_qudit_gate`'s size is not 2, or if any
                 of the single-qudit gates' size is not 1.
@@ -137,6 +164,7 @@ class BlockLayerGenerator(LayerGenerator):
         self.single_qudit_gate_1 = single_qudit_gate_1
         self.single_qudit_gate_2 = single_qudit_gate_2
         self.initial_layer_gate = initial_layer_gate
+        self.profile = profile
 
     def gen_initial_layer(
         self,
@@ -165,13 +193,56 @@ class BlockLayerGenerator(LayerGenerator):
         init_circuit = Circuit(target.num_qudits, target.radixes)
         for i in range(init_circuit.num_qudits):
             init_circuit.append_gate(self.initial_layer_gate, [i])
+
+        # a new synthesis run starts from here
+        data[self.visited_key] = set()
+        data[self.last_successors_key] = set()
         return init_circuit
 
-    def gen_successors(self,
-                       circuit: Circuit,
-                       data: PassData) -> (list[Circuit], list[Circuit]):
+    def get_block_edges(self, data: PassData) -> tuple[list, list]:
         """
-        Generate the successors of a circuit node.
+        Get the edges of the coupling graph that fall inside the first and
+        the second block. The index is built once and kept in the PassData
+        until the blocks or the coupling graph change.
+
+        Args:
+            data (PassData): the data holding the coupling graph and the
+                qudits of the two blocks.
+        """
+        q_block1 = data['block1']
+        q_block2 = data['block2']
+        edges = tuple(tuple(edge) for edge in data.connectivity)
+        fingerprint = (tuple(q_block1), tuple(q_block2), edges)
+        if self.edges_key in data:
+            stored_fingerprint, block_edges = data[self.edges_key]
+            if stored_fingerprint == fingerprint:
+                return block_edges
+        set_block1 = set(q_block1)
+        set_block2 = set(q_block2)
+        block_edges = (
+            [edge for edge in edges if set_block1.issuperset(edge)],
+            [edge for edge in edges if set_block2.issuperset(edge)],
+        )
+        data[self.edges_key] = (fingerprint, block_edges)
+        return block_edges
+
+    def iter_successors(
+        self,
+        circuit: Circuit,
+        data: PassData,
+    ) -> Iterator[Circuit]:
+        """
+        Generate the successors of a circuit node one at a time, see
+        `gen_successors`. The successors that `check_stop` rejects, and the
+        ones with the same structure (see `get_structure`) as a successor
+        already generated since the last time the frontier could have been
+        cleared, are never built.
+
+        LEAP clears its frontier when it forms a prefix, and only keeps the
+        successors of the last expanded node. The successors generated before
+        may then be gone, so they are forgotten whenever a successor of the
+        last expanded node is expanded, which is the only node LEAP can
+        expand after clearing its frontier.
 
         Raises:
             ValueError: If circuit is a single-qudit circuit.
@@ -183,39 +254,129 @@ class BlockLayerGenerator(LayerGenerator):
         if circuit.num_qudits < 2:
             raise ValueError('Cannot expand a single-qudit circuit.')
 
-        # Get the coupling graph
-        coupling_graph = data.connectivity
+        edges1, edges2 = self.get_block_edges(data)
+        if len(edges1) == 0:
+            return
+
+        # The block on edge1 is prepended before every two-qudit gate, so
+        # whether a successor stops only depends on edge2 and on the
+        # two-qudit gates of circuit, which are recorded once per node.
+        keys, locations, last_cycles = self.get_two_qudit_record(circuit)
+        kept_edges2 = []
+        for edge2 in edges2:
+            # append_gate places the gate right after the last gate on edge2
+            key = (max(last_cycles[q] for q in edge2) + 1, edge2[0])
+            index = bisect_right(keys, key)
+            sequence = locations[:index] + [edge2] + locations[index:]
+            if not self.is_repeated_tail(sequence):
+                kept_edges2.append(edge2)
+
+        structure = self.get_structure(circuit)
+        if self.visited_key not in data or tuple(structure) in data.get(self.last_successors_key, ()):
+            data[self.visited_key] = set()
+        visited = data[self.visited_key]
+        last_successors = set()
+        data[self.last_successors_key] = last_successors
+        skipped = 0
+
+        for edge1 in edges1:
+            for edge2 in kept_edges2:
+                key = self.get_successor_structure(structure, edge1, edge2)
+                if key in visited:
+                    skipped += 1
+                    continue
+                visited.add(key)
+                last_successors.add(key)
+                successor = circuit.copy()
+                successor.insert_gate(0, CNOTGate(), [edge1[0], edge1[1]])
+                successor.insert_gate(0, U3Gate(), edge1[0])
+                successor.insert_gate(0, U3Gate(), edge1[1])
+                successor.append_gate(CNOTGate(), [edge2[0], edge2[1]])
+                successor.append_gate(U3Gate(), edge2[0])
+                successor.append_gate(U3Gate(), edge2[1])
+                yield successor
+
+        if skipped > 0:
+            _logger.debug(f'Skip {skipped} structurally duplicated successors.')
+            count('duplicate_successors', skipped)
 
-        # # Get the two blocks
-        q_block1 = data['block1']
-        q_block2 = data['block2']
+    def gen_successors(self,
+                       circuit: Circuit,
+                       data: PassData) -> list[Circuit]:
+        """
+        Generate the successors of a circuit node.
 
-        successors = []
-        for edge1 in coupling_graph:
-            if all(q in q_block1 for q in edge1):
-                for edge2 in coupling_graph:
-                    if all(q in q_block2 for q in edge2):
-                        successor = circuit.copy()
-                        successor.insert_gate(0, CNOTGate(), [edge1[0], edge1[1]])
-                        successor.insert_gate(0, U3Gate(), edge1[0])
-                        successor.insert_gate(0, U3Gate(), edge1[1])
-                        successor.append_gate(CNOTGate(), [edge2[0], edge2[1]])
-                        successor.append_gate(U3Gate(), edge2[0])
-                        successor.append_gate(U3Gate(), edge2[1])
-
-                        if self.check_stop(successor) is False:
-                            successors.append(successor)
+        Raises:
+            ValueError: If circuit is a single-qudit circuit.
+        """
+        with profile_pass('block_layer_successors', data, self.profile, log=False):
+            successors = list(self.iter_successors(circuit, data))
+            count('successors_generated', len(successors))
         return successors
 
-    def check_stop(self, circuit: Circuit, CNOT_num: int = 3):
-        CNOTs = []
-        for op in circuit:
+    @staticmethod
+    def get_two_qudit_record(circuit: Circuit) -> tuple[list, list, list]:
+        """
+        Record the two-qudit gates of a circuit in a single scan.
+
+        Returns:
+            (tuple[list, list, list]): the (cycle, first qudit) point and the
+                location of every two-qudit gate, in circuit order, and the
+                last cycle that each qudit is active in.
+        """
+        keys, locations = [], []
+        last_cycles = [-1] * circuit.num_qudits
+        for cycle, op in circuit.operations_with_cycles():
             if op.gate.num_qudits == 2:
-                CNOTs.append(op)
-        if len(CNOTs) <= CNOT_num:
+                keys.append((cycle, op.location[0]))
+                locations.append(op.location)
+            for q in op.location:
+                last_cycles[q] = cycle
+        return keys, locations, last_cycles
+
+    @staticmethod
+    def get_structure(circuit: Circuit) -> list[tuple]:
+        """
+        Get the (gate, location) sequence of the operations on every qudit.
+        Two circuits have the same sequences exactly when they only differ
+        in the order of operations on disjoint qudits and in parameters,
+        so the sequences identify the circuits that instantiate the same way.
+        """
+        structure = [[] for _ in range(circuit.num_qudits)]
+        for op in circuit:
+            for q in op.location:
+                structure[q].append((op.gate, op.location))
+        return [tuple(sequence) for sequence in structure]
+
+    @staticmethod
+    def get_successor_structure(structure: list[tuple], edge1: tuple, edge2: tuple) -> tuple:
+        """
+        Get the structure of the successor built on `edge1` and `edge2` from
+        the structure of its parent, see `get_structure`, without building the
+        successor. The structure is kept whole rather than hashed, so that two
+        different successors are never mistaken for one another.
+        """
+        sequences = list(structure)
+        location1 = CircuitLocation(edge1)
+        location2 = CircuitLocation(edge2)
+        for q in edge1:
+            sequences[q] = ((U3Gate(), CircuitLocation([q])), (CNOTGate(), location1)) + sequences[q]
+        for q in edge2:
+            sequences[q] = sequences[q] + ((CNOTGate(), location2), (U3Gate(), CircuitLocation([q])))
+        return tuple(sequences)
+
+    @staticmethod
+    def is_repeated_tail(tail: list, CNOT_num: int = 3) -> bool:
+        """Check if the last `CNOT_num` two-qudit gate locations share the same two qudits."""
+        if len(tail) < CNOT_num:
             return False
         CNOT_locations = set()
-        for cx in CNOTs[-CNOT_num:]:
-            CNOT_locations.update(q for q in cx.location)
-        # Check if the last few CNOTs add on the same location
+        for location in tail[-CNOT_num:]:
+            CNOT_locations.update(location)
         return len(CNOT_locations) == 2
+
+    def check_stop(self, circuit: Circuit, CNOT_num: int = 3):
+        _, locations, _ = self.get_two_qudit_record(circuit)
+        if len(locations) <= CNOT_num:
+            return False
+        return self.is_repeated_tail(locations, CNOT_num)
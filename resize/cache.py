@@ -0,0 +1,134 @@
+"""This module implements the ResultCache class."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from bqskit.ir.circuit import Circuit
+from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from .profiling import count
+
+_logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    A persistent on-disk cache of the qfactor resizing results.
+
+    Each entry is a pickle file named after a fingerprint of the target unitary (or circuit) and of the settings
+    that produced it, see `ResultCache.make_key`. Reading an entry marks it as recently used, and the least recently used
+    entries are evicted once the cache grows larger than `max_size` bytes.
+    """
+
+    format_version = 1
+    """The version of the entry format, part of every key so that a new version never reads the older entries."""
+
+    def __init__(self, directory: str | Path | None = None, max_size: int = 256 * 2 ** 20) -> None:
+        """
+        Create a result cache.
+
+        Args:
+            directory (str | Path | None): The directory holding the cache entries, created if needed.
+                If left as None, defaults to `~/.cache/bqskit-resize`. (Default: None)
+
+            max_size (int): The maximum total size in bytes of the cache entries. (Default: 256 MiB)
+        """
+        if not isinstance(max_size, int) or max_size < 0:
+            raise ValueError('Invalid cache size. Should be a non-negative integer.')
+        if directory is None:
+            directory = Path.home() / '.cache' / 'bqskit-resize'
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    @staticmethod
+    def make_key(target: UnitaryMatrix | Circuit, *settings: Any) -> str:
+        """
+        The fingerprint of the resizing results of a target unitary, or of a circuit when its unitary is too
+        large to build. A circuit is fingerprinted by the location and the unitary of each of its gates. The
+        key also covers `ResultCache.format_version`, which must be increased whenever the stored results change.
+
+        Args:
+            target (UnitaryMatrix | Circuit): the unitary of the circuit to resize, or the circuit itself.
+            settings (Any): everything else the results depend on, such as the threshold and the
+                instantiation profiles, which must have a deterministic `repr`.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((ResultCache.format_version, type(target).__name__, target.radixes, settings)).encode())
+        if isinstance(target, Circuit):
+            for op in target:
+                digest.update(repr(tuple(op.location)).encode())
+                digest.update(op.get_unitary().numpy.tobytes())
+        else:
+            digest.update(target.numpy.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}.pkl'
+
+    def get(self, key: str) -> Any | None:
+        """Get the entry stored under `key`, or None if there is no such entry or if it cannot be read."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            count('cache_misses')
+            return None
+        except Exception as e:
+            # A truncated or foreign entry can raise almost anything while unpickling, it is dropped as a miss
+            _logger.warning(f'Drop the unreadable cache entry {path.name}: {e!r}.')
+            count('cache_misses')
+            path.unlink(missing_ok=True)
+            return None
+        count('cache_hits')
+        # Mark the entry as recently used for the eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        _logger.debug(f'Cache hit for {key}.')
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key` and evict the least recently used entries if the cache is too large."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f)
+            # Readers never see a partially written entry
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in `max_size` bytes."""
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total_size -= size
+            _logger.debug(f'Evicted {path.name} from the cache.')
+
+    def clear(self) -> None:
+        """Remove all the cache entries."""
+        for path in self.directory.glob('*.pkl'):
+            path.unlink(missing_ok=True)
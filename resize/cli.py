@@ -0,0 +1,466 @@
+"""
+This module implements the `bqskit-resize` command, which resizes batches of QASM files.
+
+All the files are resized concurrently by one shared `Compiler`, and each resized circuit is written as soon as
+it is done. Every finished file is appended to a JSON Lines manifest with its qubit counts and its timing, so
+that an interrupted batch can be run again and only resizes the files that are not completed yet:
+
+    bqskit-resize qasms/ --output-dir resized/ --workflow qfactor --num-workers 8
+    bqskit-resize 'circuits/**/*.qasm' --output-dir resized/
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from bqskit.compiler import MachineModel
+from bqskit.compiler.compiler import Compiler
+from bqskit.compiler.compiler import RuntimeMessage
+from bqskit.compiler.status import CompilationStatus
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import MeasurementPlaceholder
+from bqskit.ir.gates import Reset
+from bqskit.ir.lang.qasm2 import OPENQASM2Language
+from bqskit.passes import ForEachBlockPass
+from bqskit.passes import IfThenElsePass
+from bqskit.passes import LEAPSynthesisPass
+from bqskit.passes import LogPass
+from bqskit.passes import QuickPartitioner
+from bqskit.passes import ScanningGateRemovalPass
+from bqskit.passes import SetModelPass
+from bqskit.passes import UnfoldPass
+from bqskit.passes import WidthPredicate
+from .blocklayer import BlockLayerGenerator
+from .gatedependencyresize import GateDependencyResize
+from .gatedeppredicate import ResizingGateDependencyPredicate
+from .qfactorpredicate import ResizingQFactorCheckPass
+from .qfactorpredicate import ResizingQFactorPredicate
+
+_logger = logging.getLogger(__name__)
+
+WORKFLOWS = ('gate-dependency', 'qfactor')
+"""The resizing workflows, by gate dependency only or with the QFactor fallback."""
+
+RESIZING_METHODS = ('greedy', 'bfs', 'best_first', 'beam', 'bounded_exact')
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+DEFAULT_MAX_QFACTOR_QUDITS = 10
+"""The widest circuit resized by the QFactor fallback, whose check builds the unitary of the whole circuit."""
+
+# The tasks only send their warnings and errors, such as the `LogPass` of the circuits that cannot be resized.
+_TASK_LOGGING_LEVEL = logging.WARNING
+
+
+class _PollingCompiler(Compiler):
+    """
+    A `Compiler` whose tasks can log while they are polled.
+
+    The compiler of BQSKit 1.2 reads the log records that arrive between two requests as `LogRecord` objects,
+    while the workers send them pickled, so the first task that logs while the others are polled stops the
+    compiler. The records are read here the same way as the ones that arrive with a response.
+    """
+
+    def _recv_log_error_until_empty(self) -> None:
+        if self.conn is None:
+            raise RuntimeError('Connection unexpectedly none.')
+        while self.conn.poll():
+            msg, payload = self.conn.recv()
+            if msg == RuntimeMessage.LOG:
+                record = pickle.loads(payload) if isinstance(payload, bytes) else payload
+                if isinstance(record, logging.LogRecord):
+                    logger = logging.getLogger(record.name)
+                    if logger.isEnabledFor(record.levelno):
+                        logger.handle(record)
+                else:
+                    name, levelno, message = record
+                    logging.getLogger(name).log(levelno, message)
+            elif msg == RuntimeMessage.ERROR:
+                raise RuntimeError(payload)
+            else:
+                raise RuntimeError(f'Unexpected message type: {msg}.')
+
+
+def find_qasm_files(inputs: list) -> list[Path]:
+    """
+    The QASM files to resize, sorted and without duplicates.
+
+    Args:
+        inputs (list): QASM files, directories whose `*.qasm` files are resized, or glob patterns, where `**`
+            matches any number of directories.
+
+    Raises:
+        ValueError: If an input matches no file, so that a batch never loses a file silently.
+    """
+    paths = set()
+    unmatched = []
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = list(path.glob('*.qasm'))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = [Path(match) for match in glob.glob(pattern, recursive=True) if Path(match).is_file()]
+        if not matches:
+            unmatched.append(pattern)
+        paths.update(matches)
+    if unmatched:
+        raise ValueError(f'No QASM file matches {", ".join(unmatched)}.')
+    return sorted(path.resolve() for path in paths)
+
+
+def build_workflow(
+        num_qudits: int,
+        workflow: str = 'gate-dependency',
+        resizing_method: str = 'greedy',
+        coupling: str = 'linear',
+        max_qfactor_qudits: int = DEFAULT_MAX_QFACTOR_QUDITS,
+) -> list:
+    """
+    The resizing workflow of a circuit, see `examples/circuit_resizing.py`.
+
+    Args:
+        num_qudits (int): the number of qudits of the circuit.
+        workflow (str): 'gate-dependency' only resizes the circuits by gate dependency, and 'qfactor' falls back
+            to the QFactor resizing and the synthesis of its blocks. (Default: 'gate-dependency')
+        resizing_method (str): the resizing method of `GateDependencyResize`. (Default: 'greedy')
+        coupling (str): the coupling graph of the machine, 'linear' or 'all' to all. (Default: 'linear')
+        max_qfactor_qudits (int): the widest circuit resized by the QFactor fallback, whose check builds the
+            unitary of the whole circuit. The wider ones are not resizable. (Default: DEFAULT_MAX_QFACTOR_QUDITS)
+    """
+    if workflow not in WORKFLOWS:
+        raise ValueError(f'Invalid workflow. Should choose between {" and ".join(WORKFLOWS)}.')
+    if coupling == 'linear':
+        model = MachineModel(num_qudits, coupling_graph=[(q, q + 1) for q in range(num_qudits - 1)])
+    elif coupling == 'all':
+        model = MachineModel(num_qudits)
+    else:
+        raise ValueError('Invalid coupling graph. Should choose between "linear" and "all".')
+    unable = LogPass('Unable to resize the circuit;', logging.WARNING)
+    if workflow == 'gate-dependency':
+        fallback = unable
+    else:
+        qfactor_predicate = ResizingQFactorPredicate()
+        fallback = IfThenElsePass(
+            WidthPredicate(max_qfactor_qudits + 1),
+            [
+                ResizingQFactorCheckPass(qfactor_predicate),
+                IfThenElsePass(
+                    qfactor_predicate,
+                    [
+                        LEAPSynthesisPass(layer_generator=BlockLayerGenerator()),
+                        UnfoldPass(),
+                        QuickPartitioner(block_size=3),
+                        ForEachBlockPass(ScanningGateRemovalPass()),
+                        UnfoldPass(),
+                        GateDependencyResize(resizing_method=resizing_method),
+                    ],
+                    unable,
+                ),
+            ],
+            unable,
+        )
+    return [
+        SetModelPass(model),
+        IfThenElsePass(
+            ResizingGateDependencyPredicate(),
+            GateDependencyResize(resizing_method=resizing_method),
+            fallback,
+        ),
+    ]
+
+
+def to_qasm(circuit: Circuit) -> str:
+    """
+    Write a resized circuit in OpenQASM 2.0.
+
+    Every measurement of the resized circuit declares the same classical register, so only the first
+    declaration is kept.
+    """
+    lines = []
+    declared = set()
+    for line in circuit.to('qasm').splitlines():
+        if line.startswith('creg '):
+            if line in declared:
+                continue
+            declared.add(line)
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def check_qasm(text: str, circuit: Circuit) -> None:
+    """
+    Check that `text`, the QASM of `circuit`, can be read back into the same circuit.
+
+    Raises:
+        ValueError: if the QASM reads back with other qubits or operations, or if a measurement is not on the
+            qubit it measures or is not followed by the reset of this qubit.
+    """
+    decoded = OPENQASM2Language().decode(text)
+    if decoded.num_qudits != circuit.num_qudits or decoded.num_operations != circuit.num_operations:
+        raise ValueError(
+            f'The QASM reads back as {decoded.num_operations} operations on {decoded.num_qudits} qubits '
+            f'instead of {circuit.num_operations} on {circuit.num_qudits}.',
+        )
+    ops = list(decoded)
+    for index, op in enumerate(ops):
+        if not isinstance(op.gate, MeasurementPlaceholder) or len(op.location) != 1:
+            continue
+        qubit = op.location[0]
+        if list(op.gate.measurements) != [qubit]:
+            raise ValueError(f'A measurement on qubit {qubit} measures {list(op.gate.measurements)}.')
+        following = next((later for later in ops[index + 1:] if qubit in later.location), None)
+        if following is not None and not isinstance(following.gate, Reset):
+            raise ValueError(f'The measurement of qubit {qubit} is not followed by its reset.')
+
+
+def write_atomically(path: Path, text: str) -> None:
+    """Write `text` to `path` through a temporary file, so that an interrupted write leaves no partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_manifest(path: Path) -> dict[str, dict]:
+    """
+    The last manifest entry of every input file, see `resize_files`. The truncated line of an interrupted
+    write is ignored.
+    """
+    entries = {}
+    if not path.exists():
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[entry['input']] = entry
+    return entries
+
+
+def get_output_path(path: Path, root: Path, output_dir: Path) -> Path:
+    """The resized file of `path`, which keeps its path relative to `root` in `output_dir`."""
+    return output_dir / path.relative_to(root)
+
+
+def resize_files(
+        paths: list,
+        output_dir: Path,
+        manifest_path: Path | None = None,
+        workflow: str = 'gate-dependency',
+        resizing_method: str = 'greedy',
+        coupling: str = 'linear',
+        max_qfactor_qudits: int = DEFAULT_MAX_QFACTOR_QUDITS,
+        num_workers: int = -1,
+        resume: bool = True,
+        poll_interval: float = 0.1,
+) -> tuple[int, int, int, int]:
+    """
+    Resize QASM files concurrently on one shared compiler, see `build_workflow`.
+
+    At most twice as many files as workers are submitted at once. Each resized circuit is written to
+    `output_dir` as soon as it is done, and its entry is appended to the manifest: the status, whether the
+    circuit lost qubits, the numbers of qubits and multi-qudit depths before and after resizing, and the time
+    from the submission to the result. The paths of the manifest are absolute, so that a run can be resumed
+    from any directory. The files whose manifest entry is completed and whose output exists are skipped if
+    `resume`. A resized circuit whose QASM cannot be read back, see `check_qasm`, is recorded as an error and
+    not written.
+
+    An error in a task stops the whole compiler. A new compiler is then started, and the files that were
+    running are submitted one at a time, so that the file that stops the compiler on its own is recorded as
+    an error and the other ones are resized. If a compiler stops while no file is running, e.g. because it
+    cannot start, all the files left are recorded as errors and the batch stops.
+
+    Args:
+        paths (list): the QASM files to resize, see `find_qasm_files`.
+        output_dir (Path): the directory of the resized files, which keep their path relative to the common
+            directory of `paths`.
+        manifest_path (Path | None): the manifest file. If left as None, it is `manifest.jsonl` in
+            `output_dir`. (Default: None)
+        workflow (str): the resizing workflow, see `build_workflow`. (Default: 'gate-dependency')
+        resizing_method (str): the resizing method of `GateDependencyResize`. (Default: 'greedy')
+        coupling (str): the coupling graph of the machine, see `build_workflow`. (Default: 'linear')
+        max_qfactor_qudits (int): the widest circuit resized by the QFactor fallback, see `build_workflow`.
+            (Default: DEFAULT_MAX_QFACTOR_QUDITS)
+        num_workers (int): the number of workers of the compiler, -1 for all the CPUs. (Default: -1)
+        resume (bool): skip the files completed by a previous run. (Default: True)
+        poll_interval (float): the time in seconds between two checks of the running files. (Default: 0.1)
+
+    Returns:
+        (tuple[int, int, int, int]): the number of resized, not resizable, failed and skipped files.
+    """
+    output_dir = Path(output_dir).resolve()
+    manifest_path = output_dir / MANIFEST_NAME if manifest_path is None else Path(manifest_path).resolve()
+    paths = [Path(path).resolve() for path in paths]
+    if not paths:
+        return 0, 0, 0, 0
+    root = Path(os.path.commonpath([path.parent for path in paths]))
+    completed = read_manifest(manifest_path) if resume else {}
+    queue = deque()
+    num_skipped = 0
+    for path in paths:
+        entry = completed.get(str(path))
+        if entry is not None and entry['status'] == 'ok' and Path(entry['output']).exists():
+            num_skipped += 1
+        else:
+            queue.append(path)
+    if num_skipped > 0:
+        _logger.info(f'Skip {num_skipped} files completed by a previous run.')
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest = open(manifest_path, 'a' if resume else 'w')
+    counts = {'resized': 0, 'unresized': 0, 'error': 0}
+
+    def record(entry: dict) -> None:
+        manifest.write(json.dumps(entry) + '\n')
+        manifest.flush()
+        if entry['status'] == 'ok':
+            counts['resized' if entry['resized'] else 'unresized'] += 1
+            print(
+                f'{entry["input"]}: {entry["num_qudits_in"]} -> {entry["num_qudits"]} qubits '
+                f'in {entry["wall_time"]:.2f}s{"" if entry["resized"] else ", not resizable"}',
+                flush=True,
+            )
+        else:
+            counts['error'] += 1
+            print(f'{entry["input"]}: {entry["message"]}', flush=True)
+
+    max_running = 2 * (num_workers if num_workers > 0 else multiprocessing.cpu_count())
+    # the files that were running when a compiler stopped, which are then submitted one at a time
+    suspects = deque()
+    try:
+        while queue or suspects:
+            running = {}
+            try:
+                with _PollingCompiler(num_workers=num_workers) as compiler:
+                    while queue or suspects or running:
+                        while (suspects or queue) and len(running) < (1 if suspects else max_running):
+                            source = suspects if suspects else queue
+                            path = source.popleft()
+                            try:
+                                circuit = Circuit.from_file(str(path))
+                            except Exception as e:
+                                record({'input': str(path), 'status': 'error', 'message': f'{type(e).__name__}: {e}'})
+                                continue
+                            workflow_passes = build_workflow(
+                                circuit.num_qudits, workflow, resizing_method, coupling, max_qfactor_qudits,
+                            )
+                            try:
+                                task = compiler.submit(circuit, workflow_passes, logging_level=_TASK_LOGGING_LEVEL)
+                            except RuntimeError:
+                                source.appendleft(path)
+                                raise
+                            running[task] = (path, circuit, time.perf_counter())
+                        done = [task for task in running if compiler.status(task) == CompilationStatus.DONE]
+                        if not done:
+                            time.sleep(poll_interval)
+                        for task in done:
+                            resized = compiler.result(task)
+                            path, circuit, start = running.pop(task)
+                            entry = {
+                                'input': str(path),
+                                'output': str(get_output_path(path, root, output_dir)),
+                                'status': 'ok',
+                                'resized': resized.num_qudits < circuit.num_qudits,
+                                'num_qudits_in': circuit.num_qudits,
+                                'num_qudits': resized.num_qudits,
+                                'multi_qudit_depth_in': circuit.multi_qudit_depth,
+                                'multi_qudit_depth': resized.multi_qudit_depth,
+                                'wall_time': time.perf_counter() - start,
+                            }
+                            try:
+                                text = to_qasm(resized)
+                                check_qasm(text, resized)
+                                write_atomically(Path(entry['output']), text)
+                            except Exception as e:
+                                entry = {'input': str(path), 'status': 'error', 'message': f'{type(e).__name__}: {e}'}
+                            record(entry)
+            except RuntimeError as e:
+                message = str(e.__cause__ or e).strip().splitlines()[-1]
+                if not running:
+                    # no file can be blamed, so starting new compilers would fail the same way forever
+                    _logger.error(f'The compiler stopped with no running file: {message}')
+                    while suspects or queue:
+                        path = suspects.popleft() if suspects else queue.popleft()
+                        record({'input': str(path), 'status': 'error', 'message': f'The compiler stopped: {message}'})
+                elif len(running) == 1:
+                    path, _, _ = running.popitem()[1]
+                    record({'input': str(path), 'status': 'error', 'message': f'The resizing failed: {message}'})
+                else:
+                    _logger.warning(f'The compiler stopped with {len(running)} running files, submit them one at a time.')
+                    suspects.extend(path for path, _, _ in running.values())
+    finally:
+        manifest.close()
+    return counts['resized'], counts['unresized'], counts['error'], num_skipped
+
+
+def main(argv: list | None = None) -> int:
+    """The `bqskit-resize` command, which returns 1 if a file could not be resized."""
+    parser = argparse.ArgumentParser(
+        prog='bqskit-resize',
+        description='Resize QASM files with mid-circuit measurements and resets.',
+    )
+    parser.add_argument('inputs', nargs='+', help='QASM files, directories or glob patterns to resize')
+    parser.add_argument('-o', '--output-dir', type=Path, required=True, help='the directory of the resized files')
+    parser.add_argument(
+        '--workflow', choices=WORKFLOWS, default='gate-dependency',
+        help='resize by gate dependency only, or with the QFactor fallback (default: gate-dependency)',
+    )
+    parser.add_argument(
+        '--resizing-method', choices=RESIZING_METHODS, default='greedy',
+        help='the resizing method of the gate dependency resizing (default: greedy)',
+    )
+    parser.add_argument(
+        '--coupling', choices=('linear', 'all'), default='linear',
+        help='the coupling graph of the machine (default: linear)',
+    )
+    parser.add_argument(
+        '--max-qfactor-qudits', type=int, default=DEFAULT_MAX_QFACTOR_QUDITS,
+        help=f'the widest circuit resized by the QFactor fallback (default: {DEFAULT_MAX_QFACTOR_QUDITS})',
+    )
+    parser.add_argument('-j', '--num-workers', type=int, default=-1, help='the workers of the compiler, all CPUs by default')
+    parser.add_argument('--manifest', type=Path, help=f'the manifest file, {MANIFEST_NAME} in the output directory by default')
+    parser.add_argument('--no-resume', action='store_true', help='resize all the files and start a new manifest')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log the progress of the batch')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        paths = find_qasm_files(args.inputs)
+    except ValueError as e:
+        parser.error(str(e))
+    num_resized, num_unresized, num_errors, num_skipped = resize_files(
+        paths,
+        args.output_dir,
+        args.manifest,
+        args.workflow,
+        args.resizing_method,
+        args.coupling,
+        args.max_qfactor_qudits,
+        args.num_workers,
+        resume=not args.no_resume,
+    )
+    print(f'{num_resized} resized, {num_unresized} not resizable, {num_errors} failed, {num_skipped} skipped.')
+    return 1 if num_errors > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""This module implements the CompactCircuit class."""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import MeasurementPlaceholder
+from bqskit.ir.gates import Reset
+from .profiling import timed
+from .utils import relocate_measurement
+
+_logger = logging.getLogger(__name__)
+
+
+class CompactCircuit:
+    """
+    A lightweight array-backed circuit used to search for resized circuits.
+
+    Every operation is a row of three NumPy arrays: its cycle, its qubits (padded with -1) and its index in a
+    table of (gate, params) that is shared with the circuit it comes from. Cycles always follow the
+    as-soon-as-possible layering that `Circuit.append_gate` produces, so a candidate can be resized, analyzed
+    and costed on the arrays and only the winner needs to be converted back with `to_circuit`.
+    """
+
+    def __init__(
+            self,
+            num_qudits: int,
+            cycles: np.ndarray,
+            locations: np.ndarray,
+            indices: np.ndarray,
+            operations: tuple,
+            mmrs: tuple = (),
+            num_clbits: int | None = None,
+            num_resets: int = 0,
+    ) -> None:
+        """
+        Create a compact circuit, see `CompactCircuit.from_circuit` to convert a `Circuit`.
+
+        Args:
+            num_qudits (int): the number of qudits of the circuit.
+            cycles (np.ndarray): the cycle of every operation, sorted in ascending order.
+            locations (np.ndarray): the qubits of every operation, padded with -1.
+            indices (np.ndarray): the index of every operation in `operations` followed by `mmrs`.
+            operations (tuple): the (gate, params) of the operations of the original circuit.
+            mmrs (tuple): the (gate, params) of the inserted mid-circuit measurements and resets.
+            num_clbits (int | None): the size of the classical register holding the measurements.
+                If left as None, defaults to `num_qudits`. (Default: None)
+            num_resets (int): the number of resets in the circuit, which indexes the next measurement.
+        """
+        self.num_qudits = num_qudits
+        self.cycles = cycles
+        self.locations = locations
+        self.indices = indices
+        self.operations = operations
+        self.mmrs = mmrs
+        self.num_clbits = num_qudits if num_clbits is None else num_clbits
+        self.num_resets = num_resets
+
+    @staticmethod
+    def from_circuit(circuit: Circuit) -> CompactCircuit:
+        """Convert the input circuit in a single pass over its operations."""
+        front = [-1] * circuit.num_qudits
+        operations = []
+        location_list = []
+        cycle_list = []
+        num_resets = 0
+        for op in circuit:
+            cycle = max(front[q] for q in op.location) + 1
+            for q in op.location:
+                front[q] = cycle
+            cycle_list.append(cycle)
+            location_list.append(op.location)
+            operations.append((op.gate, op.params))
+            if isinstance(op.gate, Reset):
+                num_resets += 1
+        width = max((len(location) for location in location_list), default=1)
+        locations = np.array(
+            [list(location) + [-1] * (width - len(location)) for location in location_list],
+            dtype=np.int64,
+        ).reshape(-1, width)
+        cycles = np.array(cycle_list, dtype=np.int64)
+        order = np.argsort(cycles, kind='stable')
+        return CompactCircuit(
+            circuit.num_qudits,
+            cycles[order],
+            locations[order],
+            order,
+            tuple(operations),
+            num_resets=num_resets,
+        )
+
+    def to_circuit(self) -> Circuit:
+        """Build the `Circuit` represented by this compact circuit."""
+        with timed('update_circuit'):
+            circuit = Circuit(self.num_qudits)
+            table = self.operations + self.mmrs
+            for index, location in zip(self.indices.tolist(), self.locations.tolist()):
+                gate, params = table[index]
+                location = [q for q in location if q >= 0]
+                circuit.append_gate(relocate_measurement(gate, location), location, params)
+        return circuit
+
+    @property
+    def num_operations(self) -> int:
+        """The number of operations in the circuit."""
+        return len(self.cycles)
+
+    def location_list(self) -> list[tuple[int, ...]]:
+        """The qubits of every operation in cycle order."""
+        return [tuple(q for q in location if q >= 0) for location in self.locations.tolist()]
+
+    @property
+    def multi_qudit_depth(self) -> int:
+        """The length of the critical path excluding single-qudit gates, see `Circuit.multi_qudit_depth`."""
+        if self.locations.shape[1] < 2:
+            return 0
+        qudit_depths = [0] * self.num_qudits
+        for location in self.locations[self.locations[:, 1] >= 0].tolist():
+            location = [q for q in location if q >= 0]
+            depth = max(qudit_depths[q] for q in location) + 1
+            for q in location:
+                qudit_depths[q] = depth
+        return max(qudit_depths, default=0)
+
+    def get_depth_profile(self) -> tuple[list[int], list[int]]:
+        """
+        The length of the longest path of multi-qudit gates that ends with the last gate of each qubit, and of
+        the one that starts with the first gate of each qubit, see `multi_qudit_depth`.
+        """
+        ends = [0] * self.num_qudits
+        starts = [0] * self.num_qudits
+        if self.locations.shape[1] < 2:
+            return ends, starts
+        multi_qudit_locations = [
+            [q for q in location if q >= 0] for location in self.locations[self.locations[:, 1] >= 0].tolist()
+        ]
+        for qudit_depths, locations in ((ends, multi_qudit_locations), (starts, reversed(multi_qudit_locations))):
+            for location in locations:
+                depth = max(qudit_depths[q] for q in location) + 1
+                for q in location:
+                    qudit_depths[q] = depth
+        return ends, starts
+
+    def merge(self, q_reuse: int, q_to_use: int) -> CompactCircuit:
+        """
+        Resize the circuit and insert mid-circuit measurement and reset to reuse 'q_reuse' for 'q_to_use',
+        see `GateDependencyResize.update_circuit`.
+
+        The measurement and reset follow the last gate of `q_reuse`, and only the gates that depend on the
+        first gate of `q_to_use` may be pushed to later cycles.
+
+        Args:
+            q_reuse (int): the qubit that we reuse.
+            q_to_use (int): the qubit that is reused for.
+        """
+        locations = self.locations
+        cycles = self.cycles.copy()
+        on_reuse = np.flatnonzero((locations == q_reuse).any(axis=1))
+        measure_cycle = int(cycles[on_reuse[-1]]) + 1 if len(on_reuse) > 0 else 0
+        on_to_use = np.flatnonzero((locations == q_to_use).any(axis=1))
+        if len(on_to_use) > 0:
+            first_row = int(np.searchsorted(cycles, cycles[on_to_use[0]]))
+            self._relayer(cycles, first_row, q_to_use, measure_cycle + 1)
+
+        # Append the measurement and reset, then restore the cycle order.
+        new_index = len(self.operations) + len(self.mmrs)
+        mmr_locations = np.full((2, locations.shape[1]), -1, dtype=np.int64)
+        mmr_locations[:, 0] = q_reuse
+        cycles = np.concatenate([cycles, [measure_cycle, measure_cycle + 1]])
+        locations = np.concatenate([locations, mmr_locations])
+        indices = np.concatenate([self.indices, [new_index, new_index + 1]])
+        order = np.argsort(cycles, kind='stable')
+        cycles, locations, indices = cycles[order], locations[order], indices[order]
+
+        # Relabel the qubits the same way as `update_mapping_list`. The measurements are only built on their
+        # final qubits by `to_circuit`, since the later merges relabel the qubits again.
+        locations[locations == q_to_use] = q_reuse
+        locations -= locations > q_to_use
+        cregs = [('resize', self.num_clbits)]
+        mph = MeasurementPlaceholder(cregs, {q_reuse: ('resize', self.num_resets)})
+        return CompactCircuit(
+            self.num_qudits - 1,
+            cycles,
+            locations,
+            indices,
+            self.operations,
+            self.mmrs + ((mph, []), (Reset(), [])),
+            self.num_clbits,
+            self.num_resets + 1,
+        )
+
+    def _relayer(self, cycles: np.ndarray, first_row: int, q_to_use: int, reset_cycle: int) -> None:
+        """
+        Recompute in place the cycles from `first_row` on once `q_to_use` cannot start before `reset_cycle`.
+
+        The cycles are updated one layer at a time and the update stops as soon as no qubit is delayed anymore.
+        """
+        locations = self.locations
+        # The last column of the fronts absorbs the -1 padding of the locations.
+        front = np.full(self.num_qudits + 1, -1, dtype=np.int64)
+        np.maximum.at(front, locations[:first_row].ravel(), np.repeat(cycles[:first_row], locations.shape[1]))
+        front[-1] = -1
+        old_front = front.copy()
+        front[q_to_use] = reset_cycle
+        bounds = np.flatnonzero(np.diff(cycles[first_row:])) + first_row + 1
+        bounds = [first_row] + bounds.tolist() + [len(cycles)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            layer = locations[start:end]
+            new_cycles = front[layer].max(axis=1) + 1
+            front[layer] = new_cycles[:, None]
+            old_front[layer] = cycles[start:end, None]
+            front[-1] = old_front[-1] = -1
+            cycles[start:end] = new_cycles
+            if np.array_equal(front, old_front):
+                break
@@ -0,0 +1,149 @@
+"""This module implements the DependencyState class."""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from bqskit.ir.circuit import Circuit
+from .compactcircuit import CompactCircuit
+from .profiling import count
+from .profiling import timed
+from .utils import get_dependency_cones
+from .utils import get_location_cones
+from .utils import get_max_reuse_matching
+
+if TYPE_CHECKING:
+    from bqskit.compiler.passdata import PassData
+
+_logger = logging.getLogger(__name__)
+
+
+def _merge_bits(mask: int, q_reuse: int, q_to_use: int) -> int:
+    """Relabel the qubits of a bitmask after merging `q_to_use` into `q_reuse`, see `update_mapping_list`."""
+    if mask >> q_to_use & 1:
+        mask |= 1 << q_reuse
+    low_bits = mask & ((1 << q_to_use) - 1)
+    return low_bits | (mask >> (q_to_use + 1) << q_to_use)
+
+
+class DependencyState:
+    """
+    The gate dependency relation of a circuit during resizing.
+
+    The backward causal cone of every qubit is kept as an integer bitmask (see `get_dependency_cones`).
+    Reusing `q_reuse` for `q_to_use` only chains the last gate of `q_reuse` to the first gate of `q_to_use`
+    through a mid-circuit measurement and reset, so the cones of the resized circuit can be derived from the
+    current ones instead of re-analyzing the resized circuit.
+    """
+
+    pass_data_key = 'resize_dependency_state'
+    """The `PassData` key of the analysis shared between the resizing predicates and passes."""
+
+    def __init__(self, cones: list[int]) -> None:
+        """
+        Create a dependency state.
+
+        Args:
+            cones (list[int]): the causal cone bitmask of every qubit.
+        """
+        self.cones = cones
+
+    @staticmethod
+    def from_circuit(circuit: Circuit | CompactCircuit) -> DependencyState:
+        """Analyze the gate dependencies of the input circuit."""
+        with timed('dependency_analysis'):
+            if isinstance(circuit, CompactCircuit):
+                return DependencyState(get_location_cones(circuit.location_list(), circuit.num_qudits))
+            return DependencyState(get_dependency_cones(circuit))
+
+    @staticmethod
+    def from_pass_data(circuit: Circuit, data: PassData) -> DependencyState:
+        """
+        Analyze the gate dependencies of the input circuit, or reuse the analysis stored in `data`.
+
+        The analysis is stored in `data` with the gate locations of the circuit, which are all the dependencies
+        depend on, so that a later pass on the same circuit skips the analysis.
+        """
+        locations = [op.location for op in circuit]
+        fingerprint = (circuit.num_qudits, tuple(locations))
+        stored = data.get(DependencyState.pass_data_key)
+        if stored is not None and stored[0] == fingerprint:
+            _logger.debug('Reuse the stored gate dependency analysis.')
+            count('dependency_analysis_reuses')
+            return stored[1]
+        with timed('dependency_analysis'):
+            state = DependencyState(get_location_cones(locations, circuit.num_qudits))
+        data[DependencyState.pass_data_key] = (fingerprint, state)
+        return state
+
+    @property
+    def num_qudits(self) -> int:
+        """The number of qudits of the analyzed circuit."""
+        return len(self.cones)
+
+    @property
+    def num_resizable_pairs(self) -> int:
+        """The number of resizable qubit pairs, without listing them."""
+        return sum(self.num_qudits - bin(cone).count('1') for cone in self.cones)
+
+    def get_resizable_qubit_pairs(self) -> dict[int, list]:
+        """Get all the possible resizable qubit pairs, see `get_resizable_qubit_pairs`."""
+        return {
+            qubit: [q for q in range(self.num_qudits) if not cone >> q & 1]
+            for qubit, cone in enumerate(self.cones)
+        }
+
+    def get_min_qubit_bound(self, resizable_qubit_pairs: dict[int, list] | None = None) -> int:
+        """
+        A lower bound on the number of qubits of any circuit resized from this one.
+
+        Resizing only adds gate dependencies, so the bound is the largest of the qubits left over by a
+        maximum matching of the resizable pairs (see `get_max_reuse_matching`) and of a set of qubits that
+        depend on each other pairwise, which must all keep their own wire.
+
+        Args:
+            resizable_qubit_pairs (dict | None): the resizable pairs of this state, if already computed.
+        """
+        if resizable_qubit_pairs is None:
+            resizable_qubit_pairs = self.get_resizable_qubit_pairs()
+        matching_bound = self.num_qudits - len(get_max_reuse_matching(resizable_qubit_pairs))
+        # conflicts[q] holds the qubits that can neither reuse q nor be reused by q
+        conflicts = []
+        for q, cone in enumerate(self.cones):
+            mask = 0
+            for p in range(self.num_qudits):
+                if p != q and cone >> p & 1 and self.cones[p] >> q & 1:
+                    mask |= 1 << p
+            conflicts.append(mask)
+        # greedily grow a clique of conflicting qubits from every qubit
+        clique_bound = min(self.num_qudits, 1)
+        for q in range(self.num_qudits):
+            size = 1
+            candidates = conflicts[q]
+            while candidates:
+                best = max(
+                    (p for p in range(self.num_qudits) if candidates >> p & 1),
+                    key=lambda p: bin(conflicts[p] & candidates).count('1'),
+                )
+                candidates &= conflicts[best]
+                size += 1
+            clique_bound = max(clique_bound, size)
+        return max(matching_bound, clique_bound)
+
+    def merge(self, q_reuse: int, q_to_use: int) -> DependencyState:
+        """
+        The dependency state of the circuit after reusing `q_reuse` for `q_to_use`.
+
+        Every qubit whose cone contains `q_to_use` now also depends on everything `q_reuse` depends on.
+        The qubits are then relabeled the same way as `update_mapping_list`.
+
+        Args:
+            q_reuse (int): the qubit that we reuse.
+            q_to_use (int): the qubit that is reused for.
+        """
+        reuse_cone = self.cones[q_reuse]
+        cones = [cone | reuse_cone if cone >> q_to_use & 1 else cone for cone in self.cones]
+        # the merged qubit finishes with the gates of `q_to_use` and takes the place of `q_reuse`
+        cones[q_reuse] = cones[q_to_use]
+        del cones[q_to_use]
+        return DependencyState([_merge_bits(cone, q_reuse, q_to_use) for cone in cones])
@@ -1,19 +1,90 @@
 from __future__ import annotations
 
+import heapq
 import numpy as np
+from typing import Any
+from typing import Callable
+from typing import Generator
 from bqskit.compiler.basepass import BasePass
 from bqskit.compiler.passdata import PassData
 from bqskit.ir.circuit import Circuit
 from bqskit.ir.gates import MeasurementPlaceholder
 from bqskit.ir.gates import Reset
-from .utils import ending_point
-from .utils import starting_point
+from bqskit.runtime import get_runtime
+from .utils import find_reuse_cycle
+from .utils import get_max_reuse_matching
+from .utils import get_reuse_chains
+from .utils import relocate_measurement
 from .utils import update_mapping_list
-from .utils import get_resizable_qubit_pairs
+from .utils import update_chains
+from .dependencystate import DependencyState
+from .compactcircuit import CompactCircuit
+from .profiling import await_profiled
+from .profiling import count
+from .profiling import merge_summary
+from .profiling import profile_pass
+from .profiling import task_profile
+from .profiling import timed
 import logging
 
 _logger = logging.getLogger(__name__)
 
+
+def _score_resized_circuits(resize_pass: GateDependencyResize, circuits: list, candidates: list) -> list:
+    """
+    Evaluate the cost of every resizing candidate (index, q_reuse, q_to_use) of `candidates`, which reuses
+    `q_reuse` for `q_to_use` in `circuits[index]`.
+    """
+    return [
+        resize_pass.cost_function(circuits[index].merge(q_reuse, q_to_use))
+        for index, q_reuse, q_to_use in candidates
+    ]
+
+
+def _score_circuits(resize_pass: GateDependencyResize, circuits: list) -> list:
+    """Evaluate the cost of every circuit of `circuits`."""
+    return [resize_pass.cost_function(circuit) for circuit in circuits]
+
+
+def _score_incrementally(resize_pass: GateDependencyResize, circuits: list, states: list, candidates: list) -> list:
+    """
+    Evaluate the cost of every resizing candidate (index, q_reuse, q_to_use) of `candidates` from an analysis
+    of `circuits[index]`, whose dependency state is `states[index]`, see `get_resized_cost`.
+    """
+    contexts = {}
+    costs = []
+    for index, q_reuse, q_to_use in candidates:
+        if index not in contexts:
+            contexts[index] = resize_pass.get_cost_context(circuits[index], states[index])
+        costs.append(resize_pass.get_resized_cost(contexts[index], q_reuse, q_to_use))
+    return costs
+
+
+def _score_batch(score: Callable, resize_pass: GateDependencyResize, *args: Any) -> tuple[list, dict | None]:
+    """
+    Evaluate a batch of `score_in_batches` as a task of the runtime, and return the costs with the profile
+    summary of the task if the pass is profiled, see `task_profile`.
+    """
+    with task_profile(resize_pass.profile) as profile:
+        costs = score(resize_pass, *args)
+    return costs, profile.summary() if profile is not None else None
+
+
+async def _greedy_trajectory(
+        resize_pass: GateDependencyResize,
+        resizable_qubit_pairs: dict[int, list],
+        target: Circuit,
+        state: DependencyState,
+        seed: np.random.SeedSequence,
+) -> tuple[Circuit, dict | None]:
+    """
+    Run one greedy trajectory breaking the ties with a generator seeded by `seed`, and return the resized
+    circuit with the profile summary of the trajectory if the pass is profiled, see `task_profile`.
+    """
+    with task_profile(resize_pass.profile) as profile:
+        circuit = await resize_pass.greedy_async(resizable_qubit_pairs, target, state, np.random.default_rng(seed))
+    return circuit, profile.summary() if profile is not None else None
+
 class GateDependencyResize(BasePass):
     """
     A quantum circuit resizing algorithm based on gate dependencies.
@@ -23,10 +94,20 @@ class GateDependencyResize(BasePass):
         arXiv preprint arXiv:2311.13107 (2023).
     """
 
+    minimal_key = 'resize_minimal'
+    """The key of whether the 'bounded_exact' resizing method proved its number of qubits minimal in the PassData."""
+
     def __init__(
             self,
             cost_func: str ='max_reuse',
             resizing_method: str = 'greedy',
+            beam_width: int = 4,
+            batch_size: int | None = 64,
+            num_restarts: int = 1,
+            seed: int | None = None,
+            incremental_cost: bool = True,
+            max_expansions: int | None = 10000,
+            profile: bool = False,
             ) -> None:
         """
         Create a gate dependency resize object.
@@ -41,31 +122,87 @@ class GateDependencyResize(BasePass):
                 (Default: 'max_reuse')
 
             resizing_method: The resizing method to resize the circuit based on gate dependencies, which
-                can be chosen between 'greedy' or 'bfs'.
+                can be chosen between 'greedy', 'bfs', 'best_first', 'beam' or 'bounded_exact'.
                 'greedy' picks the local optimal resized circuit.
                 'bfs' stands for bread first search and picks the global optimal resized circuit but is
                 computational expensive.
+                'best_first' finds the resized circuit with the fewest qubits with a memoized best-first
+                search, which never expands the branches that cannot beat the best resized circuit in reach.
+                'beam' keeps the `beam_width` best resized circuits of each round, which trades compile time
+                between 'greedy' and 'bfs'.
+                'bounded_exact' resizes the circuit from a minimum path cover of the resizable pairs, and inserts
+                all the measurements and resets at once. It returns the fewest qubits when its search finishes
+                within `max_expansions`, and records in the PassData whether it did, see `bounded_exact`.
                 (Default: 'greedy')
+
+            beam_width (int): The number of resized circuits kept after each round by the 'beam' resizing
+                method. (Default: 4)
+
+            batch_size (int | None): The number of resizing candidates evaluated by each task when the leaves
+                of a 'bfs' level, or the candidates of a round with `incremental_cost=False`, are built and
+                scored in parallel on the BQSKit runtime, see `score_in_batches`. It does not apply to the
+                candidates scored incrementally. Rounds with no more candidates than one batch, passes run
+                outside of a runtime, and the synchronous `greedy`, `bfs` and `beam` methods are scored
+                serially. If left as None, the candidates are always scored serially. (Default: 64)
+
+            num_restarts (int): The number of independently seeded trajectories run concurrently by the
+                'greedy' resizing method, which returns the resized circuit with the fewest qubits and then
+                the lowest depth. (Default: 1)
+
+            seed (int | None): The seed of the random generator breaking the ties of the 'greedy' resizing
+                method. If left as None, the results are not reproducible. (Default: None)
+
+            incremental_cost (bool): Derive the cost of each resizing candidate from an analysis of the
+                circuit it resizes instead of building and evaluating it, see `get_candidate_scoring`. Set it to
+                False to score the candidates with a `cost_function` overridden in a subclass. (Default: True)
+
+            max_expansions (int | None): The number of sets of allocated qubits that the 'bounded_exact' resizing
+                method may expand when it searches for fewer qubits than its best candidate. If left as None,
+                the search is not limited and may take exponential time. (Default: 10000)
+
+            profile (bool): Record the time of the dependency analysis and of the resized circuit updates, and
+                the number of evaluated candidates and of expanded allocations, and write them to the PassData
+                and the log, see `profile_pass`. The greedy trajectories and the candidate batches run by other
+                tasks of the runtime are included, with their times summed over the tasks, except for the
+                trajectories cancelled by `restart_greedy`. (Default: False)
         """
         # self.circuit = circ
         self.cost_func = cost_func
-        if resizing_method in ['greedy', 'bfs']:
+        if resizing_method in ['greedy', 'bfs', 'best_first', 'beam', 'bounded_exact']:
             self.resizing_method = resizing_method
         else:
-            raise ValueError('Invalid resizing method. Should choose between "greedy" and "bfs".')
+            raise ValueError(
+                'Invalid resizing method. Should choose between "greedy", "bfs", "best_first", "beam" and '
+                '"bounded_exact".',
+            )
+        if not isinstance(beam_width, int) or beam_width < 1:
+            raise ValueError('Invalid beam width. Should be a positive integer.')
+        self.beam_width = beam_width
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+            raise ValueError('Invalid batch size. Should be a positive integer or None.')
+        self.batch_size = batch_size
+        if not isinstance(num_restarts, int) or num_restarts < 1:
+            raise ValueError('Invalid number of restarts. Should be a positive integer.')
+        self.num_restarts = num_restarts
+        self.seed = seed
+        self.incremental_cost = incremental_cost
+        if max_expansions is not None and (not isinstance(max_expansions, int) or max_expansions < 1):
+            raise ValueError('Invalid maximum number of expansions. Should be a positive integer or None.')
+        self.max_expansions = max_expansions
+        self.profile = profile
 
-    def cost_function(self, circuit: Circuit) -> int:
+    def cost_function(self, circuit: Circuit | CompactCircuit) -> int:
         """
         The cost of the resized circuit candidate. The lower is the better.
 
         Args:
-            circuit (circuit): The resized circuit candidate to evaluate.
+            circuit (Circuit | CompactCircuit): The resized circuit candidate to evaluate.
         """
         if self.cost_func == 'max_reuse':
             # indicates how many resizable pair can this resized circuit further have.
-            resizale_pairs = get_resizable_qubit_pairs(circuit)
+            resizale_pairs = DependencyState.from_circuit(circuit).get_resizable_qubit_pairs()
             num_resizale_pairs = len([item for sublist in resizale_pairs.values() for item in sublist])
-            if self.resizing_method == 'greedy':
+            if self.resizing_method in ['greedy', 'beam']:
                 return -num_resizale_pairs
             else:
                 return circuit.num_qudits
@@ -76,127 +213,843 @@ class GateDependencyResize(BasePass):
         else:
             raise ValueError('Invalid cost function type. Should choose between "max_reuse" and "min_depth".')
 
+    def get_cost_context(self, circuit: CompactCircuit, state: DependencyState | None = None) -> Any:
+        """
+        The analysis of a circuit that the cost of every resizing candidate of the circuit is derived from,
+        see `get_resized_cost`.
+
+        Args:
+            circuit (CompactCircuit): the circuit to resize.
+            state (DependencyState | None): the dependency state of `circuit`. If left as None, it is computed
+                when needed. (Default: None)
+        """
+        if self.cost_func == 'max_reuse':
+            return state if state is not None else DependencyState.from_circuit(circuit)
+        elif self.cost_func == 'min_depth':
+            ends, starts = circuit.get_depth_profile()
+            return max(ends, default=0), ends, starts
+        else:
+            raise ValueError('Invalid cost function type. Should choose between "max_reuse" and "min_depth".')
+
+    def get_resized_cost(self, context: Any, q_reuse: int, q_to_use: int) -> int:
+        """
+        The cost of the circuit resized by reusing `q_reuse` for `q_to_use`, which is the value of
+        `cost_function` on the resized circuit without building it.
+
+        Resizing only chains the last gate of `q_reuse` to the first gate of `q_to_use`. The resizable pairs
+        are counted on the merged dependency state, and the only new paths of multi-qudit gates go through
+        the new chain, so the depth is the longest of the current depth and of the longest path ending with
+        `q_reuse` followed by the longest path starting with `q_to_use`.
+
+        Args:
+            context (Any): the analysis of the circuit to resize, see `get_cost_context`.
+            q_reuse (int): the qubit that we reuse.
+            q_to_use (int): the qubit that is reused for.
+        """
+        if self.cost_func == 'max_reuse':
+            if self.resizing_method in ['greedy', 'beam']:
+                return -context.merge(q_reuse, q_to_use).num_resizable_pairs
+            return context.num_qudits - 1
+        depth, ends, starts = context
+        return max(depth, ends[q_reuse] + starts[q_to_use])
+
+    def get_candidate_scoring(self, circuits: list, states: list, candidates: list) -> tuple:
+        """
+        The scoring of every resizing candidate (index, q_reuse, q_to_use) of `candidates`, which reuses
+        `q_reuse` for `q_to_use` in `circuits[index]`, whose dependency state is `states[index]`, as the
+        arguments of `score_serially` and `score_in_batches`.
+
+        With `incremental_cost`, each circuit is analyzed once and the cost of each candidate only takes a few
+        operations per qubit, see `get_resized_cost`. Otherwise every candidate is built and evaluated by
+        `cost_function`.
+
+        Args:
+            circuits (list): the CompactCircuit to resize.
+            states (list): the dependency state of every circuit.
+            candidates (list): the resizing candidates to evaluate.
+        """
+        if self.incremental_cost:
+            return _score_incrementally, candidates, circuits, states
+        return _score_resized_circuits, candidates, circuits
+
+    def score_serially(self, score: Callable, items: list, *args: Any) -> list:
+        """
+        Evaluate `score(self, *args, items)` in the calling thread and return the costs in the order of `items`.
+
+        Args:
+            score (Callable): `_score_incrementally`, `_score_resized_circuits` or `_score_circuits`.
+            items (list): the resizing candidates to evaluate.
+            args (Any): the arguments passed to `score` before `items`.
+        """
+        count('candidates_evaluated', len(items))
+        return score(self, *args, items)
+
+    async def score_in_batches(self, score: Callable, items: list, *args: Any) -> list:
+        """
+        Evaluate `score(self, *args, batch)` on `items`, split in batches of `batch_size` that are mapped on
+        the BQSKit runtime, and return the costs in the order of `items`. The candidates scored incrementally
+        only take a few operations each, so they are always scored serially, see `score_serially`.
+
+        Args:
+            score (Callable): `_score_incrementally`, `_score_resized_circuits` or `_score_circuits`.
+            items (list): the resizing candidates to evaluate.
+            args (Any): the arguments passed to `score` before each batch.
+        """
+        if score is _score_incrementally or self.batch_size is None or len(items) <= self.batch_size:
+            return self.score_serially(score, items, *args)
+        try:
+            runtime = get_runtime()
+        except RuntimeError:
+            # Not running on a BQSKit runtime worker
+            return self.score_serially(score, items, *args)
+        count('candidates_evaluated', len(items))
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        args_per_batch = [[arg] * len(batches) for arg in args]
+        results = await await_profiled(
+            runtime.map(_score_batch, [score] * len(batches), [self] * len(batches), *args_per_batch, batches),
+        )
+        for _, summary in results:
+            merge_summary(summary)
+        return [cost for costs, _ in results for cost in costs]
+
     def update_circuit(self, circuit: Circuit, q_reuse: int, q_to_use: int, target: Circuit) -> Circuit:
         """
         Resize the circuit and insert mid-circuit measurement and reset to reuse 'q_reuse' for 'q_to_use'.
+        The operations are partitioned in a single pass: the ones that depend on the first gate of 'q_to_use'
+        follow the measurement and reset, and all the others precede it.
 
         Args:
             circuit (circuit): the circuit to update.
             q_reuse (int): the qubit that we reuse.
             q_to_use (int): the qubit that is reused for.
         """
-        new_circuit = Circuit(circuit.num_qudits - 1)
-        partial_circuit = circuit.copy()
         mapping = {i: i for i in range(circuit.num_qudits)}
         mapping = update_mapping_list(mapping, q_reuse, q_to_use)
-        resize_point = ending_point(partial_circuit)[q_reuse]
-        starting_points = starting_point(partial_circuit)
-        q_to_use_starting_point = starting_points[q_to_use]
-        qubits_between = {q_to_use: [q_to_use_starting_point]}
-        for cycle, op in partial_circuit.operations_with_cycles():
-            if q_to_use_starting_point <= cycle < resize_point:
-                if any(l in qubits_between for l in op.location):
-                    for l in op.location:
-                        if l in qubits_between.keys():
-                            qubits_between[l].append(cycle)
-                        else:
-                            qubits_between[l] = [cycle]
-        qubits_between = {key: value[0] for key, value in qubits_between.items()}
-        partial_circuit_copy = partial_circuit.copy()
-        for cycle, op in partial_circuit_copy.operations_with_cycles():
-            if cycle <= resize_point and not any(q == q_to_use for q in op.location):
-                q_between = [l for l in op.location if l in qubits_between.keys()]
-                flag = False
-                for q in q_between:
-                    if cycle > qubits_between[q]:
-                        flag = True
-                if flag is True:
-                    continue
-                new_circuit.append_gate(op.gate, location=[mapping[i] for i in op.location], params=op.params)
-                partial_circuit.remove(op)
-        mph_idx = len([op for op in circuit if isinstance(op.gate, Reset)])
+        before_mmr = []
+        after_mmr = []
+        # the qubits that already depend on the first gate of 'q_to_use'
+        delayed_qubits = {q_to_use}
+        mph_idx = 0
+        for op in circuit:
+            if isinstance(op.gate, Reset):
+                mph_idx += 1
+            if any(q in delayed_qubits for q in op.location):
+                delayed_qubits.update(op.location)
+                after_mmr.append(op)
+            else:
+                before_mmr.append(op)
+        new_circuit = Circuit(circuit.num_qudits - 1)
+        for op in before_mmr:
+            location = [mapping[i] for i in op.location]
+            new_circuit.append_gate(relocate_measurement(op.gate, location), location=location, params=op.params)
         cregs = [('resize', target.num_qudits)]
         mph = MeasurementPlaceholder(cregs, {mapping[q_reuse]: ('resize', mph_idx)})
         new_circuit.append_gate(mph, location=[mapping[q_reuse]])
         new_circuit.append_gate(Reset(), location=[mapping[q_reuse]])
-        for op in partial_circuit:
-            new_circuit.append_gate(op.gate, location=[mapping[i] for i in op.location], params=op.params)
+        for op in after_mmr:
+            location = [mapping[i] for i in op.location]
+            new_circuit.append_gate(relocate_measurement(op.gate, location), location=location, params=op.params)
         return new_circuit
 
-    def greedy(self, resizable_qubit_pairs: dict[int, list], target: Circuit) -> Circuit:
+    def update_circuit_with_chains(self, circuit: Circuit, chains: list[list[int]]) -> Circuit:
+        """
+        Resize the circuit so that each chain of qubits shares one wire, with a mid-circuit measurement and
+        reset between consecutive qubits of a chain, see `get_reuse_chains`. All the measurements and resets
+        are inserted in a single pass, instead of one `update_circuit` call per reused qubit.
+
+        The operations keep their order, except that the first operation of a reused qubit waits for the
+        measurement and reset, which directly follow the last operation of the previous qubit of the chain.
+
+        Args:
+            circuit (Circuit): the circuit to resize.
+            chains (list[list[int]]): the qubits sharing each wire, in the order they use it.
+
+        Raises:
+            ValueError: If the chains create a cyclic gate dependency, see `find_reuse_cycle`.
+        """
+        ops = list(circuit)
+        # the chains keep the label of their first qubit, see `update_mapping_list`
+        mapping = {q: wire for wire, chain in enumerate(sorted(chains)) for q in chain}
+
+        # the nodes are the operations followed by the measurement and reset of every reused qubit
+        successors = [[] for _ in ops]
+        num_predecessors = [0] * len(ops)
+        first_op = {}
+        last_op = {}
+        for index, op in enumerate(ops):
+            for q in op.location:
+                if q in last_op:
+                    successors[last_op[q]].append(index)
+                    num_predecessors[index] += 1
+                first_op.setdefault(q, index)
+                last_op[q] = index
+        positions = list(range(len(ops)))
+        reused_qubits = []
+        for chain in chains:
+            # the last node on the wire of the chain, which the next node on the wire waits for
+            previous = None
+            for i, q in enumerate(chain):
+                if i > 0:
+                    node = len(successors)
+                    successors.append([])
+                    num_predecessors.append(0)
+                    reused_qubits.append(chain[i - 1])
+                    positions.append(-0.5 if previous is None else positions[previous] + 0.5)
+                    if previous is not None:
+                        successors[previous].append(node)
+                        num_predecessors[node] += 1
+                    previous = node
+                if q in first_op:
+                    if previous is not None:
+                        successors[previous].append(first_op[q])
+                        num_predecessors[first_op[q]] += 1
+                    previous = last_op[q]
+
+        new_circuit = Circuit(len(chains))
+        cregs = [('resize', circuit.num_qudits)]
+        mph_idx = sum(isinstance(op.gate, Reset) for op in ops)
+        num_emitted = 0
+        # emit the nodes in topological order, following the positions of the operations in the circuit
+        heap = [(positions[node], node) for node in range(len(successors)) if num_predecessors[node] == 0]
+        heapq.heapify(heap)
+        while heap:
+            _, node = heapq.heappop(heap)
+            num_emitted += 1
+            if node < len(ops):
+                op = ops[node]
+                location = [mapping[q] for q in op.location]
+                new_circuit.append_gate(relocate_measurement(op.gate, location), location=location, params=op.params)
+            else:
+                wire = mapping[reused_qubits[node - len(ops)]]
+                mph = MeasurementPlaceholder(cregs, {wire: ('resize', mph_idx)})
+                new_circuit.append_gate(mph, location=[wire])
+                new_circuit.append_gate(Reset(), location=[wire])
+                mph_idx += 1
+            for successor in successors[node]:
+                num_predecessors[successor] -= 1
+                if num_predecessors[successor] == 0:
+                    heapq.heappush(heap, (positions[successor], successor))
+        if num_emitted < len(successors):
+            raise ValueError('The chains of qubits create a cyclic gate dependency.')
+        return new_circuit
+
+    def run_search(self, search: Generator) -> Circuit:
+        """
+        Run a resizing search in the calling thread, with its candidates scored serially, see `score_serially`.
+
+        A search, such as `greedy_search`, is a generator that yields the arguments of `score_serially` for each
+        group of candidates to score, is sent back their costs, and returns the resized circuit.
+        """
+        try:
+            scoring = next(search)
+            while True:
+                scoring = search.send(self.score_serially(*scoring))
+        except StopIteration as stop:
+            return stop.value
+
+    async def run_search_async(self, search: Generator) -> Circuit:
+        """
+        Run a resizing search, see `run_search`, with its candidates scored in batches on the BQSKit runtime,
+        see `score_in_batches`.
+        """
+        try:
+            scoring = next(search)
+            while True:
+                scoring = search.send(await self.score_in_batches(*scoring))
+        except StopIteration as stop:
+            return stop.value
+
+    def greedy(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+            rng: np.random.Generator | None = None,
+    ) -> Circuit:
+        """Run `greedy_search` with the candidates scored serially, for the callers outside of the BQSKit runtime."""
+        return self.run_search(self.greedy_search(resizable_qubit_pairs, target, state, rng))
+
+    async def greedy_async(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+            rng: np.random.Generator | None = None,
+    ) -> Circuit:
+        """Run `greedy_search` with the candidates scored in batches on the BQSKit runtime."""
+        return await self.run_search_async(self.greedy_search(resizable_qubit_pairs, target, state, rng))
+
+    def greedy_search(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+            rng: np.random.Generator | None = None,
+    ) -> Generator[tuple, list, Circuit]:
         """
         A greedy algorithm to find the best resized circuit.
         For the input circuit, during each iteration, we only reuse one qubit (i.e., insert one MMR). The greedy algorithm
         picks the locally best resized circuit for the next round of resizing. The process is repeated until we cannot
         find other resizing possibilities.
 
+        The candidates are scored without building them, see `get_candidate_scoring`. Only the winner of each round
+        is built as a `CompactCircuit`, and only the final circuit is converted back. The search yields the scoring
+        of the candidates of each round, see `run_search`.
+
         Args:
                 resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                state (DependencyState | None): the dependency state of the input circuit, which is updated
+                    incrementally after each round instead of re-analyzing the resized circuit. If left as None,
+                    it is computed from `target`. (Default: None)
+                rng (np.random.Generator | None): the random generator breaking the ties between the best
+                    candidates. If left as None, it is seeded with `seed`. (Default: None)
         """
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        if rng is None:
+            rng = np.random.default_rng(self.seed)
         # The circuit with the smallest cost is preferable. So we start the initial cost to the infinitive.
-        best_cost = np.Inf
+        best_cost = np.inf
         # Some circuits might have the same cost values. We store them in a list and randomly pick one for the next round.
         best_circuits = []
-        circuit = target.copy()
-        best_circ = target.copy()
+        circuit = CompactCircuit.from_circuit(target)
+        best_circ = circuit
         while any(value for value in resizable_qubit_pairs.values()):
-            for q_reuse, qs_to_use in resizable_qubit_pairs.items():
-                for q_to_use in qs_to_use:
-                    # For each resizable pair, we update the circuit by reusing qubit and inserting one MMR
-                    update_cir = self.update_circuit(circuit, q_reuse, q_to_use, target)
-                    cost = self.cost_function(update_cir)
-                    if cost < best_cost:
-                        best_cost = cost
-                        best_circuits = [update_cir]
-                    elif cost == best_cost:
-                        best_circuits.append(update_cir)
+            # For each resizable pair, we update the circuit by reusing qubit and inserting one MMR
+            candidates = [
+                (0, q_reuse, q_to_use)
+                for q_reuse, qs_to_use in resizable_qubit_pairs.items() for q_to_use in qs_to_use
+            ]
+            costs = yield self.get_candidate_scoring([circuit], [state], candidates)
+            for (_, q_reuse, q_to_use), cost in zip(candidates, costs):
+                if cost < best_cost:
+                    best_cost = cost
+                    best_circuits = [(q_reuse, q_to_use)]
+                elif cost == best_cost:
+                    best_circuits.append((q_reuse, q_to_use))
             # Randomly pick up a circuit from the list of best circuits with the same cost
-            best_circ = best_circuits[np.random.randint(len(best_circuits))]
-            resizable_qubit_pairs = get_resizable_qubit_pairs(best_circ)
+            q_reuse, q_to_use = best_circuits[rng.integers(len(best_circuits))]
+            best_circ = circuit.merge(q_reuse, q_to_use)
+            state = state.merge(q_reuse, q_to_use)
+            resizable_qubit_pairs = state.get_resizable_qubit_pairs()
             circuit = best_circ
             # If the best circuit is still resizable, we start a new round of resizing.
             if any(value for value in resizable_qubit_pairs.values()):
-                best_cost = np.Inf
+                best_cost = np.inf
                 best_circuits = []
+        return best_circ.to_circuit()
+
+    async def restart_greedy(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """
+        Run `num_restarts` greedy trajectories and return the resized circuit with the fewest qubits, then
+        the lowest multi-qudit depth.
+
+        Each trajectory breaks its ties with its own generator spawned from `seed`, so the results are
+        reproducible and the first trajectory is the one of a single greedy run. The trajectories run
+        concurrently on the BQSKit runtime, and the remaining ones are cancelled as soon as one of them
+        reaches the lower bound of `DependencyState.get_min_qubit_bound`. The number of qubits is then
+        optimal, but the depth only accounts for the trajectories finished before the cancellation.
+
+        Args:
+                resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                state (DependencyState | None): the dependency state of the input circuit. If left as None,
+                    it is computed from `target`. (Default: None)
+        """
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        seeds = np.random.SeedSequence(self.seed).spawn(self.num_restarts)
+        if self.num_restarts == 1:
+            circuit, summary = await _greedy_trajectory(self, resizable_qubit_pairs, target, state, seeds[0])
+            merge_summary(summary)
+            return circuit
+        bound = state.get_min_qubit_bound(resizable_qubit_pairs)
+        best_circ = None
+        best_key = (np.inf, np.inf)
+        try:
+            runtime = get_runtime()
+        except RuntimeError:
+            # Not running on a BQSKit runtime worker, the trajectories are run one after the other.
+            runtime = None
+        if runtime is None:
+            for seed in seeds:
+                circuit, summary = await _greedy_trajectory(self, resizable_qubit_pairs, target, state, seed)
+                merge_summary(summary)
+                if (circuit.num_qudits, circuit.multi_qudit_depth) < best_key:
+                    best_key = (circuit.num_qudits, circuit.multi_qudit_depth)
+                    best_circ = circuit
+                if best_circ.num_qudits <= bound:
+                    break
+            return best_circ
+        n = self.num_restarts
+        future = runtime.map(_greedy_trajectory, [self] * n, [resizable_qubit_pairs] * n, [target] * n,
+                             [state] * n, seeds)
+        num_done = 0
+        while num_done < n:
+            for _, (circuit, summary) in await await_profiled(runtime.next(future)):
+                merge_summary(summary)
+                num_done += 1
+                if (circuit.num_qudits, circuit.multi_qudit_depth) < best_key:
+                    best_key = (circuit.num_qudits, circuit.multi_qudit_depth)
+                    best_circ = circuit
+            if best_circ.num_qudits <= bound and num_done < n:
+                _logger.debug(f'Greedy trajectory reached the lower bound of {bound} qubits, cancel the others.')
+                runtime.cancel(future)
+                break
         return best_circ
 
-    def bfs(self, resizable_qubit_pairs: dict[int, list], target: Circuit) -> Circuit:
+    def bfs(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """Run `bfs_search` with the leaves scored serially, for the callers outside of the BQSKit runtime."""
+        return self.run_search(self.bfs_search(resizable_qubit_pairs, target, state))
+
+    async def bfs_async(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """Run `bfs_search` with the leaves scored in batches on the BQSKit runtime."""
+        return await self.run_search_async(self.bfs_search(resizable_qubit_pairs, target, state))
+
+    def bfs_search(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Generator[tuple, list, Circuit]:
         """
              A breath first search algorithm to find the best resized circuit.
              For the input circuit, we explore all the possible resizing candidates and pick the best circuit.
 
              Args:
                      resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                     state (DependencyState | None): the dependency state of the input circuit. If left as None,
+                         it is computed from `target`. (Default: None)
         """
-        # Queue of nodes to visit, each node is a tuple (circuit, reused_qubits, q_reuse, q_to_use)
-        queue = [(target, resizable_qubit_pairs, None, None)]
-        best_cir = target.copy()
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        # Queue of nodes to visit, each node is a tuple (circuit, dependency state, reused_qubits, q_reuse, q_to_use)
+        initial = CompactCircuit.from_circuit(target)
+        queue = [(initial, state, resizable_qubit_pairs, None, None)]
+        best_cir = initial
         best_cost = np.inf
-        current_cost = np.Inf
         while queue:
-            current_cir, current_reused_qubits, current_q_reuse, current_q_to_use = queue.pop(0)  # Dequeue a node
-            if not any(value for value in current_reused_qubits.values()):
-                if current_q_reuse is not None:
-                    current_cost = self.cost_function(current_cir)
-                if current_cost < best_cost:
-                    best_cost = current_cost
-                    best_cir = current_cir
-            else:
+            # Every node of the queue reuses the same number of qubits, so the queue is visited one level at a
+            # time and the leaves of a level are scored together, see `run_search`.
+            next_queue = []
+            leaves = []
+            for current_cir, current_state, current_reused_qubits, current_q_reuse, current_q_to_use in queue:
+                if not any(value for value in current_reused_qubits.values()):
+                    if current_q_reuse is not None:
+                        leaves.append(current_cir)
+                    continue
                 # If the circuit is already resizable, we add all the possible resizable candidates to the queue
                 for q_reuse, qs_to_use in current_reused_qubits.items():
                     for q_to_use in qs_to_use:
                         # add mid-circuit measurement and reset
-                        new_cir = self.update_circuit(current_cir, q_reuse, q_to_use, target)
-                        # get the new resetable qubit from the updated circuit
-                        new_reused_qubits = get_resizable_qubit_pairs(new_cir)
-                        queue.append((new_cir, new_reused_qubits, q_reuse, q_to_use))  # Enqueue the new node
-        return best_cir
+                        new_cir = current_cir.merge(q_reuse, q_to_use)
+                        # get the new resetable qubit from the updated dependency state
+                        new_state = current_state.merge(q_reuse, q_to_use)
+                        new_reused_qubits = new_state.get_resizable_qubit_pairs()
+                        # Enqueue the new node
+                        next_queue.append((new_cir, new_state, new_reused_qubits, q_reuse, q_to_use))
+            costs = yield _score_circuits, leaves
+            for leaf, cost in zip(leaves, costs):
+                if cost < best_cost:
+                    best_cost = cost
+                    best_cir = leaf
+            queue = next_queue
+        return best_cir.to_circuit()
+
+    def get_allocation_order(
+            self,
+            state: DependencyState,
+            bound: int,
+            max_wires: int | None = None,
+            max_expansions: int | None = None,
+    ) -> tuple[list | None, bool]:
+        """
+        Search the order to allocate the qubits of the input circuit to wires that needs the fewest wires,
+        see `best_first`.
+
+        Args:
+            state (DependencyState): the dependency state of the input circuit.
+            bound (int): a lower bound on the number of wires, see `DependencyState.get_min_qubit_bound`.
+            max_wires (int | None): only search the orders that need at most this number of wires.
+                If left as None, the search is not limited. (Default: None)
+            max_expansions (int | None): the maximum number of sets of allocated qubits to expand.
+                If left as None, the search is not limited. (Default: None)
+
+        Returns:
+            (tuple[list | None, bool]): the allocation order, or None if there is none within the limits, and
+                whether the search was completed, so that a missing order proves that none needs at most
+                `max_wires` wires.
+        """
+        cones = state.cones
+        num_qudits = state.num_qudits
+        all_qubits = (1 << num_qudits) - 1
+
+        def get_freed(allocated: int) -> int:
+            return sum(1 << q for q, cone in enumerate(cones) if cone & ~allocated == 0)
+
+        # the number of wires needed so far for each visited set of allocated qubits and how it was reached
+        num_wires = {0: bound}
+        parents = {0: None}
+        # Each node is a tuple (wires needed, wires in use, -number of allocated qubits, allocated qubits).
+        heap = [(bound, 0, 0, 0)]
+        num_expansions = 0
+        while heap:
+            cost, in_use, neg_num_allocated, allocated = heapq.heappop(heap)
+            if cost > num_wires[allocated]:
+                continue
+            if allocated == all_qubits:
+                break
+            if max_expansions is not None and num_expansions >= max_expansions:
+                return None, False
+            num_expansions += 1
+            count('allocation_expansions')
+            candidates = [q for q in range(num_qudits) if not allocated >> q & 1]
+            if in_use + 1 <= cost:
+                # A qubit that frees its wire right away can be allocated first without any loss.
+                free_moves = [q for q in candidates if cones[q] & ~(allocated | 1 << q) == 0]
+                if free_moves:
+                    candidates = free_moves[:1]
+            for q in candidates:
+                new_allocated = allocated | 1 << q
+                new_cost = max(cost, in_use + 1)
+                if max_wires is not None and new_cost > max_wires:
+                    continue
+                if new_cost < num_wires.get(new_allocated, np.inf):
+                    num_wires[new_allocated] = new_cost
+                    parents[new_allocated] = (allocated, q)
+                    new_in_use = bin(new_allocated).count('1') - bin(get_freed(new_allocated)).count('1')
+                    heapq.heappush(heap, (new_cost, new_in_use, neg_num_allocated - 1, new_allocated))
+        if all_qubits not in parents:
+            return None, True
+
+        order = []
+        allocated = all_qubits
+        while parents[allocated] is not None:
+            allocated, q = parents[allocated]
+            order.append(q)
+        order.reverse()
+        return order, True
+
+    def best_first(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """
+        A best-first search to find the resized circuit with the fewest qubits.
+        Resizing is seen as allocating the qubits of the input circuit one at a time to wires. A qubit frees its
+        wire for reuse as soon as every qubit of its causal cone is allocated, so the wires in use only depend on
+        the set of allocated qubits. The search visits each set once (keyed on the set, whatever order led to
+        it), explores them with a priority queue ordered by the number of wires needed so far, and starts from
+        the lower bound of `DependencyState.get_min_qubit_bound`, so the sets that cannot lead to fewer qubits
+        than a solution in reach are never expanded.
+
+        Once the allocation order is found, each qubit reuses one of the freed wires. With the 'min_depth' cost
+        function, the freed wire is picked by the cost of the resized circuit.
+
+        Args:
+                resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                state (DependencyState | None): the dependency state of the input circuit. If left as None,
+                    it is computed from `target`. (Default: None)
+        """
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        cones = state.cones
+        num_qudits = state.num_qudits
+
+        def get_freed(allocated: int) -> int:
+            return sum(1 << q for q, cone in enumerate(cones) if cone & ~allocated == 0)
+
+        bound = state.get_min_qubit_bound(resizable_qubit_pairs)
+        order, _ = self.get_allocation_order(state, bound)
+
+        # Replay the allocation order and reuse a freed wire for each qubit whenever possible.
+        circuit = CompactCircuit.from_circuit(target)
+        chains = tuple((q,) for q in range(num_qudits))
+        allocated = 0
+        freed = 0
+        free_tails = []
+        for q_to_use in order:
+            if free_tails:
+                label_to_use = next(i for i, chain in enumerate(chains) if chain[0] == q_to_use)
+                candidates = []
+                for tail in free_tails:
+                    label_reuse = next(i for i, chain in enumerate(chains) if chain[-1] == tail)
+                    candidates.append((label_reuse, tail))
+                if self.cost_func == 'min_depth' and self.incremental_cost:
+                    context = self.get_cost_context(circuit)
+                    label_reuse, tail = min(
+                        candidates,
+                        key=lambda c: self.get_resized_cost(context, c[0], label_to_use),
+                    )
+                elif self.cost_func == 'min_depth':
+                    label_reuse, tail = min(
+                        candidates,
+                        key=lambda c: self.cost_function(circuit.merge(c[0], label_to_use)),
+                    )
+                else:
+                    label_reuse, tail = candidates[0]
+                free_tails.remove(tail)
+                circuit = circuit.merge(label_reuse, label_to_use)
+                chains = update_chains(chains, label_reuse, label_to_use)
+            allocated |= 1 << q_to_use
+            newly_freed = get_freed(allocated) & ~freed
+            freed |= newly_freed
+            free_tails.extend(q for q in range(num_qudits) if newly_freed >> q & 1)
+        return circuit.to_circuit()
+
+    def bounded_exact(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> tuple[Circuit, bool]:
+        """
+        Find the resized circuit with the fewest qubits from a minimum path cover of the resizable pairs.
+
+        Each qubit reuses at most one qubit and is reused by at most one, so a maximum matching of the
+        resizable pairs (see `get_max_reuse_matching`) reuses as many qubits as possible, and its chains
+        (see `get_reuse_chains`) are the wires of the resized circuit. The pairs are only resizable one at a
+        time, though: reusing all of them may create a cyclic gate dependency (see `find_reuse_cycle`), in
+        which case a pair of the cycle is excluded and the matching is extended again, up to `num_qudits`
+        times before the pairs on cycles are only dropped. The chains of a greedy
+        allocation of the qubits to wires (see `best_first`) are a second candidate.
+
+        The best candidate is minimal as soon as it reaches the lower bound of
+        `DependencyState.get_min_qubit_bound`. Otherwise, the allocation of `best_first` is searched for
+        fewer wires than the candidate, for at most `max_expansions` sets of allocated qubits. Minimizing the
+        number of qubits is hard in general, so the search is exponential, and once it is cut short the
+        candidate is returned with a warning and is not proven minimal. The resized circuit is built in a
+        single pass by `update_circuit_with_chains`. The number of qubits is the only cost.
+
+        Args:
+                resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                state (DependencyState | None): the dependency state of the input circuit. If left as None,
+                    it is computed from `target`. (Default: None)
+
+        Returns:
+            (tuple[Circuit, bool]): the resized circuit, and whether its number of qubits is proven minimal,
+                which is False only if the search was cut short by `max_expansions`.
+        """
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        num_qudits = state.num_qudits
+        candidates = [get_reuse_chains({}, num_qudits), self.get_greedy_allocation_chains(state)]
+
+        matching = get_max_reuse_matching(resizable_qubit_pairs)
+        pairs = {q_reuse: list(qs_to_use) for q_reuse, qs_to_use in resizable_qubit_pairs.items()}
+        num_repairs = 0
+        cycle = find_reuse_cycle(state.cones, matching)
+        while cycle is not None:
+            q_reuse, q_to_use = cycle[0]
+            pairs[q_reuse].remove(q_to_use)
+            del matching[q_to_use]
+            # extend the matching again for the first repairs, then only drop the pairs on cycles
+            if num_repairs < num_qudits:
+                matching = get_max_reuse_matching(pairs, matching)
+            num_repairs += 1
+            cycle = find_reuse_cycle(state.cones, matching)
+        candidates.append(get_reuse_chains(matching, num_qudits))
+        chains = min(candidates, key=len)
+
+        bound = state.get_min_qubit_bound(resizable_qubit_pairs)
+        minimal = True
+        if len(chains) > bound:
+            order, minimal = self.get_allocation_order(state, bound, len(chains) - 1, self.max_expansions)
+            if order is not None:
+                chains = self.get_allocation_chains(state, order)
+            elif not minimal:
+                _logger.warning(
+                    f'Stop the search for fewer than {len(chains)} qubits after {self.max_expansions} expansions,'
+                    f' the resized circuit may not be minimal.',
+                )
+        with timed('update_circuit'):
+            return self.update_circuit_with_chains(target, chains), minimal
+
+    def get_allocation_chains(self, state: DependencyState, order: list) -> list[list[int]]:
+        """
+        The chains of qubits sharing each wire when the qubits are allocated in `order` and each one reuses
+        the wire freed first, see `best_first`.
+
+        Args:
+            state (DependencyState): the dependency state of the input circuit.
+            order (list): the allocation order of the qubits.
+        """
+        cones = state.cones
+        chains = []
+        chain_of = {}
+        allocated = 0
+        freed = 0
+        free_tails = []
+        for q in order:
+            if free_tails:
+                chain = chain_of[free_tails.pop(0)]
+                chain.append(q)
+            else:
+                chain = [q]
+                chains.append(chain)
+            chain_of[q] = chain
+            allocated |= 1 << q
+            newly_freed = [p for p, cone in enumerate(cones) if not freed >> p & 1 and cone & ~allocated == 0]
+            for p in newly_freed:
+                freed |= 1 << p
+            free_tails.extend(newly_freed)
+        return chains
+
+    def get_greedy_allocation_chains(self, state: DependencyState) -> list[list[int]]:
+        """
+        The chains of a greedy allocation of the qubits to wires, see `get_allocation_chains`, which always
+        allocates the qubit that frees the most wires. The ties are broken by two rules, and the chains with
+        the fewest wires are returned: the qubit closest to freeing its own wire, and then the one that most
+        wires wait for, or the qubit that most wires wait for compared to how far it is from freeing its own.
+
+        Args:
+            state (DependencyState): the dependency state of the input circuit.
+        """
+        cones = state.cones
+        num_qudits = state.num_qudits
+        best_chains = None
+        for rule in range(2):
+            allocated = 0
+            order = []
+            for _ in range(num_qudits):
+                # the wires that only wait for one more qubit, and the wires that wait for each qubit
+                num_freed = [0] * num_qudits
+                num_waiting = [0] * num_qudits
+                for cone in cones:
+                    missing = cone & ~allocated
+                    if missing and missing & (missing - 1) == 0:
+                        num_freed[missing.bit_length() - 1] += 1
+                    while missing:
+                        lowest = missing & -missing
+                        num_waiting[lowest.bit_length() - 1] += 1
+                        missing ^= lowest
+                num_missing = [bin(cone & ~allocated).count('1') for cone in cones]
+                if rule == 0:
+                    key = lambda q: (-num_freed[q], num_missing[q], -num_waiting[q], q)
+                else:
+                    key = lambda q: (-num_freed[q] + (num_missing[q] != 1), num_missing[q] - num_waiting[q], q)
+                q = min((q for q in range(num_qudits) if not allocated >> q & 1), key=key)
+                allocated |= 1 << q
+                order.append(q)
+            chains = self.get_allocation_chains(state, order)
+            if best_chains is None or len(chains) < len(best_chains):
+                best_chains = chains
+        return best_chains
+
+    def beam(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """Run `beam_search` with the candidates scored serially, for the callers outside of the BQSKit runtime."""
+        return self.run_search(self.beam_search(resizable_qubit_pairs, target, state))
+
+    async def beam_async(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Circuit:
+        """Run `beam_search` with the candidates scored in batches on the BQSKit runtime."""
+        return await self.run_search_async(self.beam_search(resizable_qubit_pairs, target, state))
+
+    def beam_search(
+            self,
+            resizable_qubit_pairs: dict[int, list],
+            target: Circuit,
+            state: DependencyState | None = None,
+    ) -> Generator[tuple, list, Circuit]:
+        """
+        A beam search to find the best resized circuit.
+        Like the greedy algorithm, each round reuses one more qubit, but the `beam_width` best candidates of the
+        round are all resized further in the next round. Candidates that reuse the same qubits in the same
+        chains are the same circuit, so they are only kept once. The final circuit with the fewest qubits, and
+        then the lowest cost, is returned. The candidates of a round are scored together, see `run_search`.
+
+        Args:
+                resizable_qubit_pairs (dict): the possible resizable pairs for the input circuit to resize.
+                state (DependencyState | None): the dependency state of the input circuit. If left as None,
+                    it is computed from `target`. (Default: None)
+        """
+        if state is None:
+            state = DependencyState.from_circuit(target)
+        initial = CompactCircuit.from_circuit(target)
+        chains = tuple((q,) for q in range(target.num_qudits))
+        # Each node of the beam is a tuple (circuit, dependency state, resizable pairs, chains)
+        beam = [(initial, state, resizable_qubit_pairs, chains)]
+        best_cir = initial
+        best_cost = (np.inf, np.inf)
+        while beam:
+            candidates = []
+            candidate_chains = []
+            visited = set()
+            for index, (circuit, state, pairs, chains) in enumerate(beam):
+                if not any(value for value in pairs.values()):
+                    cost = (circuit.num_qudits, self.cost_function(circuit))
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_cir = circuit
+                    continue
+                for q_reuse, qs_to_use in pairs.items():
+                    for q_to_use in qs_to_use:
+                        new_chains = update_chains(chains, q_reuse, q_to_use)
+                        if new_chains in visited:
+                            continue
+                        visited.add(new_chains)
+                        candidates.append((index, q_reuse, q_to_use))
+                        candidate_chains.append(new_chains)
+            circuits = [circuit for circuit, _, _, _ in beam]
+            states = [state for _, state, _, _ in beam]
+            costs = yield self.get_candidate_scoring(circuits, states, candidates)
+            ranking = sorted(range(len(candidates)), key=lambda i: costs[i])
+            new_beam = []
+            for i in ranking[:self.beam_width]:
+                index, q_reuse, q_to_use = candidates[i]
+                circuit, state, _, _ = beam[index]
+                new_state = state.merge(q_reuse, q_to_use)
+                new_beam.append((
+                    circuit.merge(q_reuse, q_to_use),
+                    new_state,
+                    new_state.get_resizable_qubit_pairs(),
+                    candidate_chains[i],
+                ))
+            beam = new_beam
+        return best_cir.to_circuit()
 
     async def run(self, circuit: Circuit, data: PassData) -> None:
+        with profile_pass('GateDependencyResize', data, self.profile):
+            await self.resize(circuit, data)
+
+    async def resize(self, circuit: Circuit, data: PassData) -> None:
+        """Resize the circuit in place with the chosen resizing method, see `run`."""
         input_circuit = circuit.copy()
-        resizable_qubit_pairs = get_resizable_qubit_pairs(input_circuit)
+        state = DependencyState.from_pass_data(input_circuit, data)
+        resizable_qubit_pairs = state.get_resizable_qubit_pairs()
         if self.resizing_method == 'greedy':
-            resized_circuit = self.greedy(resizable_qubit_pairs, input_circuit)
+            resized_circuit = await self.restart_greedy(resizable_qubit_pairs, input_circuit, state)
+        elif self.resizing_method == 'best_first':
+            resized_circuit = self.best_first(resizable_qubit_pairs, input_circuit, state)
+        elif self.resizing_method == 'beam':
+            resized_circuit = await self.beam_async(resizable_qubit_pairs, input_circuit, state)
+        elif self.resizing_method == 'bounded_exact':
+            resized_circuit, data[self.minimal_key] = self.bounded_exact(resizable_qubit_pairs, input_circuit, state)
         else:
-            resized_circuit = self.bfs(resizable_qubit_pairs, input_circuit)
+            resized_circuit = await self.bfs_async(resizable_qubit_pairs, input_circuit, state)
         circuit.become(resized_circuit)
\ No newline at end of file
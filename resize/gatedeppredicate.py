@@ -5,7 +5,8 @@ import logging
 from typing import TYPE_CHECKING
 
 from bqskit.passes.control.predicate import PassPredicate
-from .utils import get_resizable_qubit_pairs
+from .dependencystate import DependencyState
+from .profiling import profile_pass
 
 if TYPE_CHECKING:
     from bqskit.compiler.passdata import PassData
@@ -16,9 +17,20 @@ _logger = logging.getLogger(__name__)
 
 class ResizingGateDependencyPredicate(PassPredicate):
     """Check if the circuit is resizable based on gate dependency."""
+    def __init__(self, profile: bool = False) -> None:
+        """
+        Create a gate dependency resizing predicate.
+
+        Args:
+            profile (bool): Record the time of the dependency analysis in the PassData and the log, see
+                `profile_pass`. (Default: False)
+        """
+        self.profile = profile
+
     def get_truth_value(self, circuit: Circuit, data: PassData) -> bool:
         """Call this predicate, see :class:`PassPredicate` for more info."""
-        resizable_qubit_pairs = get_resizable_qubit_pairs(circuit)
+        with profile_pass('ResizingGateDependencyPredicate', data, self.profile):
+            resizable_qubit_pairs = DependencyState.from_pass_data(circuit, data).get_resizable_qubit_pairs()
         num_resizable_pairs = len([item for sublist in resizable_qubit_pairs.values() for item in sublist])
         if num_resizable_pairs == 0:
             return False
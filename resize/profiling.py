@@ -0,0 +1,185 @@
+"""
+This module implements the profiling counters and timers of the resizing passes.
+
+A pass created with `profile=True` activates a `ResizeProfile` while it runs, see `profile_pass`. The phases and
+the events of the `resize` package are recorded with `timed` and `count` into the active profile, and are
+skipped right away when there is none, so profiling costs a single check per call site when it is disabled.
+The profile is merged into the `PassData` of the pass under `ResizeProfile.pass_data_key` and logged when the
+pass finishes.
+
+A BQSKit worker interleaves its tasks at each await on the runtime, so the active profile only belongs to the
+running task: a profiled task clears it while it awaits, see `await_profiled`. The tasks that a profiled pass
+sends to the runtime record into their own profile with `task_profile` and return its summary, which the pass
+adds to its profile with `merge_summary`.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any
+from typing import Awaitable
+from typing import Iterator
+from typing import MutableMapping
+
+_logger = logging.getLogger(__name__)
+
+
+class ResizeProfile:
+    """The time spent in each phase of the resizing and the number of each event."""
+
+    pass_data_key = 'resize_profile'
+    """The `PassData` key of the profile summary of the passes, see `ResizeProfile.summary`."""
+
+    def __init__(self) -> None:
+        """Create an empty profile."""
+        self.timers: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Add `seconds` to the time spent in `phase`."""
+        self.timers[phase] = self.timers.get(phase, 0.0) + seconds
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Add `value` to `counter`."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def merge(self, summary: dict) -> None:
+        """Add the timers and counters of another profile summary to this profile."""
+        for phase, seconds in summary.get('timers', {}).items():
+            self.add_time(phase, seconds)
+        for counter, value in summary.get('counters', {}).items():
+            self.count(counter, value)
+
+    def summary(self) -> dict[str, dict]:
+        """The timers in seconds and the counters, sorted by name."""
+        return {'timers': dict(sorted(self.timers.items())), 'counters': dict(sorted(self.counters.items()))}
+
+    def __str__(self) -> str:
+        timers = ', '.join(f'{phase} {seconds:.3f}s' for phase, seconds in sorted(self.timers.items()))
+        counters = ', '.join(f'{counter} {value}' for counter, value in sorted(self.counters.items()))
+        return f'timers: {timers or "none"}; counters: {counters or "none"}'
+
+
+# The profile of the running pass of this process, see `profile_pass`.
+_active_profile: ResizeProfile | None = None
+
+
+def get_active_profile() -> ResizeProfile | None:
+    """The profile of the running pass, or None if it is not profiled."""
+    return _active_profile
+
+
+def set_active_profile(profile: ResizeProfile | None) -> None:
+    """Record the following phases and events into `profile`, or stop recording them if None."""
+    global _active_profile
+    _active_profile = profile
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the context to `phase` of the active profile."""
+    profile = _active_profile
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_time(phase, time.perf_counter() - start)
+
+
+def count(counter: str, value: int = 1) -> None:
+    """Add `value` to `counter` of the active profile."""
+    if _active_profile is not None:
+        _active_profile.count(counter, value)
+
+
+def merge_summary(summary: dict | None) -> None:
+    """Add the profile summary returned by a task of `task_profile` to the active profile."""
+    if _active_profile is not None and summary is not None:
+        _active_profile.merge(summary)
+
+
+async def await_profiled(awaitable: Awaitable) -> Any:
+    """
+    Await on the BQSKit runtime without the active profile, and restore it afterwards, since the worker runs
+    the other tasks meanwhile, see `profile_pass`.
+    """
+    profile = _active_profile
+    set_active_profile(None)
+    try:
+        return await awaitable
+    finally:
+        set_active_profile(profile)
+
+
+@contextmanager
+def task_profile(enabled: bool) -> Iterator[ResizeProfile | None]:
+    """
+    Profile a function that a profiled pass runs as a task of the runtime, if `enabled`, and do nothing
+    otherwise.
+
+    The function returns the summary of the yielded profile with its result, so that the pass merges it with
+    `merge_summary`. The active profile of the caller is restored when the context exits, so the function
+    can also be called directly by the pass.
+
+    Args:
+        enabled (bool): whether the pass is profiled.
+    """
+    if not enabled:
+        yield None
+        return
+    previous = _active_profile
+    profile = ResizeProfile()
+    set_active_profile(profile)
+    try:
+        yield profile
+    finally:
+        set_active_profile(previous)
+
+
+@contextmanager
+def profile_pass(
+        name: str,
+        data: MutableMapping[str, Any],
+        enabled: bool,
+        log: bool = True,
+) -> Iterator[ResizeProfile | None]:
+    """
+    Profile a pass, predicate or layer generator call if `enabled`, and do nothing otherwise.
+
+    The total time of the call is recorded under `name`. When the context exits, the profile is merged into
+    the summary stored in `data`, so that the summary accumulates the profiles of all the passes of a
+    workflow, and logged if `log`. The active profile of the caller, such as a profiled pass that calls a
+    profiled predicate, is restored when the context exits.
+
+    A BQSKit worker runs the other tasks while a task awaits on the runtime, so the asynchronous passes must
+    await on the runtime with `await_profiled`, and the functions they map on the runtime must record their
+    own profile with `task_profile`.
+
+    Args:
+        name (str): the name of the profiled pass.
+        data (MutableMapping[str, Any]): the `PassData` of the pass.
+        enabled (bool): whether to profile the pass.
+        log (bool): whether to log the profile of the call, at the INFO level. (Default: True)
+    """
+    if not enabled:
+        yield None
+        return
+    previous = _active_profile
+    profile = ResizeProfile()
+    set_active_profile(profile)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        set_active_profile(previous)
+        profile.add_time(name, time.perf_counter() - start)
+        total = ResizeProfile()
+        total.merge(data.get(ResizeProfile.pass_data_key, {}))
+        total.merge(profile.summary())
+        data[ResizeProfile.pass_data_key] = total.summary()
+        if log:
+            _logger.info(f'{name} profile: {profile}')
@@ -2,13 +2,378 @@ from __future__ import annotations
 
 from bqskit.ir import Circuit
 from bqskit.ir.gates import VariableUnitaryGate
+from bqskit.ir.opt.instantiaters.qfactor import QFactor
+from bqskit.qis.state.state import StateVector
+from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from bqskit.runtime import RuntimeHandle
+from bqskit.runtime import get_runtime
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
 from itertools import combinations
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Iterator
+import atexit
 import logging
 import multiprocessing
 import numpy as np
+from .profiling import await_profiled
+from .profiling import count
+from .profiling import get_active_profile
+from .profiling import merge_summary
+from .profiling import task_profile
+from .profiling import timed
+from .twoblockqfactor import fit_two_blocks
+from .utils import get_resizable_qubit_pairs
 
 _logger = logging.getLogger(__name__)
 
+# The qfactor settings of a coarse instantiation, which stops after a small number of iterations.
+COARSE_PROFILE = {
+    'diff_tol_a': 1e-8,  # Stopping criteria for distance change
+    'diff_tol_r': 1e-4,  # Relative criteria for distance change
+    'dist_tol': 1e-12,  # Stopping criteria for distance
+    'max_iters': 1000,  # Maximum number of iterations
+    'min_iters': 50,  # Minimum number of iterations
+    'slowdown_factor': 0,  # Larger numbers slowdown optimization to avoid local minima
+}
+# The qfactor settings of a full precision instantiation.
+FULL_PROFILE = {
+    'diff_tol_a': 1e-12,  # Stopping criteria for distance change
+    'diff_tol_r': 1e-6,  # Relative criteria for distance change
+    'dist_tol': 1e-12,  # Stopping criteria for distance
+    'max_iters': 100000,  # Maximum number of iterations
+    'min_iters': 1000,  # Minimum number of iterations
+    'slowdown_factor': 0,  # Larger numbers slowdown optimization to avoid local minima
+}
+# The stages of the instantiation of a candidate, see `instantiate_blocks`. Each stage is a pair of qfactor
+# settings and of the distance above which the candidate is rejected without running the next stages. By default,
+# a candidate is instantiated once at full precision, so that the accepted candidates are the same as with a
+# single QFactor instantiation.
+DEFAULT_PROFILES = ((FULL_PROFILE, None),)
+# A coarse stage that rejects the candidates still far from the target before the full precision stage. It saves
+# most of the iterations of the non-resizable candidates, but may reject a resizable candidate whose coarse
+# instantiation is stuck in a local minimum, so it is opt-in through the `profiles` arguments.
+TWO_STAGE_PROFILES = ((COARSE_PROFILE, 1e-2), (FULL_PROFILE, None))
+# The widest core whose unitary is built and instantiated in the reduced mode, see `iter_resizable_pairs_qfactor`.
+DEFAULT_MAX_CORE_QUDITS = 10
+
+# The process pool shared by all the resizable-checking calls, see `get_executor`.
+_executor: ProcessPoolExecutor | None = None
+_executor_processors = 0
+# Whether this worker process already warned that its checks run one after the other, see `iter_checks`.
+_warned_serial_checks = False
+# The shared target unitary attached by this worker process, see `get_shared_unitary`.
+_attached_unitary: tuple[SharedMemory, UnitaryMatrix] | None = None
+
+
+def get_num_processors(num_cpus: int = None) -> int:
+    """
+    The number of processes used to check the resizable pairs in parallel.
+
+    Args:
+        num_cpus (int): the number of cpus allocated by the user. If None, half of the available CPUs are used.
+    """
+    if num_cpus is None:
+        # Use half of the available CPUs, but at least two
+        return max(2, multiprocessing.cpu_count() // 2)
+    # Ensure the user-specified number of CPUs does not exceed the available CPUs
+    available_cpus = multiprocessing.cpu_count()
+    # At least 1 CPU, and at most the number of available CPUs
+    return min(max(1, num_cpus), available_cpus)
+
+def get_executor(num_cpus: int = None) -> ProcessPoolExecutor:
+    """
+    Get the long-lived process pool running the instantiations of the resizable checking outside of the BQSKit
+    runtime, see `iter_checks`. The pool is started on the first call and reused by the following ones, so the
+    worker processes are only spawned once. It is only restarted if a different number of processes is requested.
+
+    Args:
+        num_cpus (int): the number of cpus allocated by the user, see `get_num_processors`.
+    """
+    global _executor, _executor_processors
+    if multiprocessing.current_process().daemon:
+        raise RuntimeError('A daemonic process, such as a worker of the BQSKit runtime, cannot start a process pool.')
+    num_processors = get_num_processors(num_cpus)
+    if _executor is None or _executor_processors != num_processors:
+        shutdown_executor()
+        _executor = ProcessPoolExecutor(max_workers=num_processors)
+        _executor_processors = num_processors
+        count('pool_startups')
+    return _executor
+
+def shutdown_executor() -> None:
+    """Shut down the process pool of `get_executor`, which is started again by the next call if needed."""
+    global _executor, _executor_processors
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+        _executor_processors = 0
+
+atexit.register(shutdown_executor)
+
+def get_check_runtime() -> RuntimeHandle | None:
+    """
+    The BQSKit runtime that the instantiations are mapped on, or None if the caller does not run on a worker of
+    the runtime, see `iter_checks_async`.
+    """
+    try:
+        return get_runtime()
+    except RuntimeError:
+        # Not running on a BQSKit runtime worker
+        return None
+
+def run_profiled(function: Callable, args_batch: list, profiled: bool) -> tuple[list, dict | None]:
+    """
+    Run `function(args_batch)` as a task of the process pool or of the BQSKit runtime, and return its results
+    with the summary of its own profile if `profiled`, see `task_profile`.
+    """
+    with task_profile(profiled) as profile:
+        results = function(args_batch)
+    return results, profile.summary() if profile is not None else None
+
+def submit_task(executor: ProcessPoolExecutor, function: Callable, args_batch: list) -> Future:
+    """
+    Submit `function(args_batch)` to the process pool. When a profile is active, the worker profiles the task
+    and `get_task_result` merges it into the active profile.
+    """
+    return executor.submit(run_profiled, function, args_batch, get_active_profile() is not None)
+
+def get_task_result(future: Future) -> list:
+    """The results of a task of `submit_task`."""
+    results, summary = future.result()
+    merge_summary(summary)
+    return results
+
+def split_batches(args_list: list, num_batches: int) -> list[list]:
+    """Split `args_list` in at most `num_batches` consecutive batches of the same size, give or take one."""
+    num_batches = max(1, min(num_batches, len(args_list)))
+    size, remainder = divmod(len(args_list), num_batches)
+    bounds = [i * size + min(i, remainder) for i in range(num_batches + 1)]
+    return [args_list[bounds[i]:bounds[i + 1]] for i in range(num_batches)]
+
+def iter_checks(function: Callable, args_list: list, num_cpus: int = None) -> Iterator[tuple[int, Any]]:
+    """
+    Run the checks of `args_list` in parallel on the process pool of `get_executor`, and yield the index and
+    the result of the checks whose result is not None as they complete. Closing the generator cancels the tasks
+    that have not started yet, and the running ones finish in the background.
+
+    The checks are split in one batch per process, and each task runs `function` on a whole batch, so that the
+    two-block layouts of a batch are fitted together, see `check_layouts`. A worker of the BQSKit runtime is a
+    daemonic process that cannot start a process pool, so it runs all the checks as a single batch, unless they
+    are mapped on the runtime by `iter_checks_async`, see `ResizingQFactorCheckPass`.
+
+    Args:
+        function (Callable): the check of a batch, which returns the result of each of its checks, or None
+            when the candidate is rejected.
+        args_list (list): the arguments of every check, which share the same target and settings.
+        num_cpus (int): the number of processes of the pool, see `get_num_processors`.
+    """
+    if not args_list:
+        return
+    if multiprocessing.current_process().daemon:
+        global _warned_serial_checks
+        if not _warned_serial_checks:
+            _warned_serial_checks = True
+            _logger.warning(
+                'Run the qfactor checks one after the other, since a synchronous call on a runtime worker cannot '
+                'start a process pool. Run `ResizingQFactorCheckPass` before the predicate to use the runtime.',
+            )
+        for index, result in enumerate(function(args_list)):
+            if result is not None:
+                yield index, result
+        return
+    executor = get_executor(num_cpus)
+    batches = split_batches(args_list, get_num_processors(num_cpus))
+    starts = np.cumsum([0] + [len(batch) for batch in batches])
+    futures = {submit_task(executor, function, batch): int(start) for batch, start in zip(batches, starts)}
+    try:
+        for future in as_completed(futures):
+            for offset, result in enumerate(get_task_result(future)):
+                if result is not None:
+                    yield futures[future] + offset, result
+    finally:
+        for future in futures:
+            future.cancel()
+
+async def iter_checks_async(
+        function: Callable,
+        args_list: list,
+        num_cpus: int = None,
+) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Run the checks of `args_list` in parallel, see `iter_checks`. When awaited by a task of the BQSKit runtime,
+    the batches are mapped on the runtime with one batch per CPU, and otherwise they run on the process pool of
+    `iter_checks`.
+    """
+    runtime = get_check_runtime()
+    if runtime is None:
+        stream = iter_checks(function, args_list, num_cpus)
+        try:
+            for item in stream:
+                yield item
+        finally:
+            stream.close()
+        return
+    if not args_list:
+        return
+    batches = split_batches(args_list, multiprocessing.cpu_count())
+    starts = np.cumsum([0] + [len(batch) for batch in batches])
+    n = len(batches)
+    future = runtime.map(run_profiled, [function] * n, batches, [get_active_profile() is not None] * n)
+    num_done = 0
+    try:
+        while num_done < n:
+            for batch_index, (results, summary) in await await_profiled(runtime.next(future)):
+                merge_summary(summary)
+                num_done += 1
+                for offset, result in enumerate(results):
+                    if result is not None:
+                        yield int(starts[batch_index]) + offset, result
+    finally:
+        if num_done < n:
+            runtime.cancel(future)
+
+@contextmanager
+def share_unitary(unitary: UnitaryMatrix | None, on_runtime: bool = False) -> Iterator[tuple | UnitaryMatrix | None]:
+    """
+    Publish the unitary of the circuit to resize in shared memory for the worker processes.
+
+    Yields a small handle (name, shape, dtype, radixes) to pass to `get_shared_unitary` instead of the circuit.
+    The shared memory is released when the context exits. When the tasks do not run on the process pool (see
+    `iter_checks`), the unitary itself is yielded, since the workers of the runtime may run on other machines,
+    and it is sent once with each batch of tasks.
+
+    Args:
+        unitary (UnitaryMatrix | None): the unitary of the circuit to resize. If None, None is yielded.
+        on_runtime (bool): whether the tasks are mapped on the BQSKit runtime, see `iter_checks_async`.
+            (Default: False)
+    """
+    if unitary is None or on_runtime or multiprocessing.current_process().daemon:
+        yield unitary
+        return
+    utry = unitary.numpy
+    shm = SharedMemory(create=True, size=utry.nbytes)
+    try:
+        np.ndarray(utry.shape, dtype=utry.dtype, buffer=shm.buf)[:] = utry
+        yield shm.name, utry.shape, utry.dtype.str, unitary.radixes
+    finally:
+        shm.close()
+        shm.unlink()
+
+def get_shared_unitary(handle: tuple | UnitaryMatrix) -> UnitaryMatrix:
+    """
+    Get the target unitary published by `share_unitary`. Each worker process attaches the shared memory once
+    and reuses it for all the tasks of the same call.
+
+    Args:
+        handle (tuple | UnitaryMatrix): the handle or the unitary yielded by `share_unitary`.
+    """
+    global _attached_unitary
+    if isinstance(handle, UnitaryMatrix):
+        return handle
+    name, shape, dtype, radixes = handle
+    if _attached_unitary is None or _attached_unitary[0].name != name:
+        if _attached_unitary is not None:
+            _attached_unitary[0].close()
+            _attached_unitary = None
+        shm = SharedMemory(name=name)
+        utry = UnitaryMatrix(np.ndarray(shape, dtype=dtype, buffer=shm.buf), radixes, check_arguments=False)
+        _attached_unitary = shm, utry
+    return _attached_unitary[1]
+
+
+def check_two_block_layouts(target: UnitaryMatrix, layouts: list, threshold: float, profiles: tuple = None) -> list:
+    """
+    Check several two-block layouts of a qubit circuit at once with the specialized engine `fit_two_blocks`.
+
+    The stages of `profiles` are run as in `instantiate_blocks`, each stage only fitting the layouts that are
+    still undecided, starting from the blocks of the previous stage.
+
+    Args:
+        target (UnitaryMatrix): the unitary of the circuit to resize.
+        layouts (list): the (first block, second block) qubits of every candidate.
+        threshold (float): the Hilbert-Schmidt distance below which a candidate is accepted.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`.
+
+    Returns:
+        (list): whether each layout can implement the target unitary.
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    accepted = [False] * len(layouts)
+    undecided = list(range(len(layouts)))
+    starts = None
+    for options, reject_distance in profiles:
+        # the slowdown of the generic QFactor does not apply to the two-block engine
+        options = {key: value for key, value in options.items() if key != 'slowdown_factor'}
+        distances, blocks = fit_two_blocks(target, [layouts[i] for i in undecided], starts=starts, **options)
+        count('instantiations', len(undecided))
+        still_undecided = []
+        for i, dist, fitted in zip(undecided, distances, blocks):
+            if dist < threshold:
+                accepted[i] = True
+            elif reject_distance is None or dist <= reject_distance:
+                still_undecided.append((i, fitted))
+        undecided = [i for i, _ in still_undecided]
+        starts = [fitted for _, fitted in still_undecided]
+        if not undecided:
+            break
+    return accepted
+
+def instantiate_blocks(target: UnitaryMatrix, blocks: list, threshold: float, profiles: tuple = None) -> bool:
+    """
+    Check if a circuit made of one variable unitary per block can implement the target unitary.
+
+    The circuit is instantiated with each stage of `profiles` in turn, each stage starting from the parameters of
+    the previous one. It is accepted as soon as the Hilbert-Schmidt distance is below `threshold`, and rejected
+    as soon as the distance is above the rejection distance of a stage, so that the candidates that are clearly
+    not resizable never reach the expensive full precision stage. The two-block circuits of qubits are fitted by
+    the specialized engine of `check_two_block_layouts`, and the others by the generic `Circuit.instantiate`.
+
+    Args:
+        target (UnitaryMatrix): the unitary of the circuit to resize.
+        blocks (list): the qubits of each variable unitary.
+        threshold (float): the Hilbert-Schmidt distance below which the candidate is accepted.
+        profiles (tuple): the (qfactor settings, rejection distance) of each stage, where the rejection distance
+        of the last stage is ignored. If None, `DEFAULT_PROFILES` is used.
+    """
+    if profiles is None:
+        profiles = DEFAULT_PROFILES
+    if len(blocks) == 2 and all(radix == 2 for radix in target.radixes):
+        return check_two_block_layouts(target, [blocks], threshold, profiles)[0]
+    new_circuit = Circuit(target.num_qudits, target.radixes)
+    for block in blocks:
+        new_circuit.append_gate(VariableUnitaryGate(len(block)), block)
+    for stage, (options, reject_distance) in enumerate(profiles):
+        if stage == 0:
+            new_circuit.instantiate(target, method='qfactor', **options)
+        else:
+            new_circuit.set_params(QFactor(**options).instantiate(new_circuit, target, new_circuit.params))
+        count('instantiations')
+        dist = new_circuit.get_unitary().get_distance_from(target, 1)
+        if dist < threshold:
+            return True
+        if reject_distance is not None and dist > reject_distance:
+            return False
+    return False
+
+def check_layouts(target: UnitaryMatrix, layouts: list, threshold: float, profiles: tuple = None) -> list:
+    """
+    Check several (first block, second block) layouts of the same target unitary, see `instantiate_blocks`.
+    The layouts of a qubit circuit are fitted together by one `check_two_block_layouts` call, and the others
+    are instantiated one after the other.
+
+    Returns:
+        (list): whether each layout can implement the target unitary.
+    """
+    if all(radix == 2 for radix in target.radixes):
+        return check_two_block_layouts(target, layouts, threshold, profiles)
+    return [instantiate_blocks(target, list(layout), threshold, profiles) for layout in layouts]
 
 def resizable_pair_checking(args) -> tuple[int, int] | None:
     """
@@ -17,68 +382,412 @@ def resizable_pair_checking(args) -> tuple[int, int] | None:
     Args:
         q_reuse (int): the qubit to reuse.
         q_to_use (int): the qubit that is reused for.
-        qc (Circuit): the circuit to resize.
+        target_handle (tuple): the handle of the unitary of the circuit to resize, see `share_unitary`.
         threshold (float): if the circuit is resizable by this qubit pair, the Hilbert-Schmidt distance between the
         instantiated circuit and the input circuit should be below the threshold.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`.
     """
-    q_reuse, q_to_use, qc, threshold = args
-    new_circuit = Circuit(qc.num_qudits)
-    q_no_reuse_to_use = [q for q in range(qc.num_qudits) if q != q_reuse and q != q_to_use]
-    opt1_qubits = q_no_reuse_to_use.copy()
-    opt1_qubits.append(q_reuse)
-    opt1_qubits.sort()
-    opt2_qubits = q_no_reuse_to_use.copy()
-    opt2_qubits.append(q_to_use)
-    opt2_qubits.sort()
-    new_circuit.append_gate(VariableUnitaryGate(qc.num_qudits - 1), opt1_qubits)
-    new_circuit.append_gate(VariableUnitaryGate(qc.num_qudits - 1), opt2_qubits)
-
-    new_circuit.instantiate(
-        qc.get_unitary(),
-        method='qfactor',
-        diff_tol_a=1e-12,  # Stopping criteria for distance change
-        diff_tol_r=1e-6,  # Relative criteria for distance change
-        dist_tol=1e-12,  # Stopping criteria for distance
-        max_iters=100000,  # Maximum number of iterations
-        min_iters=1000,  # Minimum number of iterations
-        slowdown_factor=0,  # Larger numbers slowdown optimization to avoid local minima
-    )
+    return check_resizable_pairs([args])[0]
+
+def check_resizable_pairs(args_batch: list) -> list:
+    """
+    Check a batch of the qubit pairs of the same circuit, see `resizable_pair_checking`. The layouts of all the
+    pairs are checked together by `check_layouts`.
+
+    Returns:
+        (list): each pair if it is resizable, and None otherwise.
+    """
+    _, _, target_handle, threshold, profiles = args_batch[0]
+    target = get_shared_unitary(target_handle)
+    layouts = [get_blocks([q_to_use], [q_reuse], target.num_qudits) for q_reuse, q_to_use, *_ in args_batch]
+    accepted = check_layouts(target, layouts, threshold, profiles)
+    return [(q_reuse, q_to_use) if ok else None for (q_reuse, q_to_use, *_), ok in zip(args_batch, accepted)]
+
+def get_pair_core(qc: Circuit, q_reuse: int, q_to_use: int) -> tuple[Circuit, int, int] | None:
+    """
+    Cut out the part of the circuit that decides if `q_reuse` can be reused for `q_to_use`.
+
+    The gates outside the forward cone of the first gate on `q_to_use` never act on `q_to_use`, so they can be
+    absorbed in the first block, and the gates outside the backward cone of the last gate on `q_reuse` never act
+    on `q_reuse`, so they can be absorbed in the second block. The core is made of the remaining gates, restricted
+    to the qubits they act on. If the core is resizable, so is the circuit.
+
+    Args:
+        qc (Circuit): the circuit to resize.
+        q_reuse (int): the qubit to reuse.
+        q_to_use (int): the qubit that is reused for.
 
-    dist = new_circuit.get_unitary().get_distance_from(qc.get_unitary(), 1)
-    if dist < threshold:
+    Returns:
+        (tuple[Circuit, int, int] | None): the core circuit and the indices of `q_reuse` and `q_to_use` in it,
+        or None if the core does not act on both qubits, in which case the pair is resizable.
+    """
+    ops = list(qc)
+    # forward cone of the first gate on q_to_use
+    forward = [False] * len(ops)
+    reached = {q_to_use}
+    for index, op in enumerate(ops):
+        if any(q in reached for q in op.location):
+            forward[index] = True
+            reached.update(op.location)
+    # backward cone of the last gate on q_reuse, restricted to the forward cone
+    core_indices = []
+    reached = {q_reuse}
+    for index in range(len(ops) - 1, -1, -1):
+        if any(q in reached for q in ops[index].location):
+            reached.update(ops[index].location)
+            if forward[index]:
+                core_indices.append(index)
+    core_qudits = sorted({q for index in core_indices for q in ops[index].location})
+    if q_reuse not in core_qudits or q_to_use not in core_qudits:
+        return None
+    mapping = {q: i for i, q in enumerate(core_qudits)}
+    core = Circuit(len(core_qudits), [qc.radixes[q] for q in core_qudits])
+    for index in reversed(core_indices):
+        op = ops[index]
+        core.append_gate(op.gate, [mapping[q] for q in op.location], op.params)
+    return core, mapping[q_reuse], mapping[q_to_use]
+
+def core_pair_checking(args) -> tuple[int, int] | None:
+    """
+    Check if the circuit can reuse `q_reuse` for `q_to_use` on the core of the pair, see `get_pair_core`.
+
+    The core is first screened with `get_signalling_qubits` and only instantiated if `q_to_use` cannot signal
+    to `q_reuse`.
+
+    Args:
+        q_reuse (int): the qubit to reuse.
+        q_to_use (int): the qubit that is reused for.
+        core (Circuit): the core circuit of the pair.
+        core_reuse (int): the index of `q_reuse` in the core.
+        core_to_use (int): the index of `q_to_use` in the core.
+        threshold (float): the Hilbert-Schmidt distance below which the pair is resizable.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`.
+    """
+    q_reuse, q_to_use, core, core_reuse, core_to_use, threshold, profiles = args
+    target = core.get_unitary()
+    if all(radix == 2 for radix in core.radixes):
+        if core_to_use in get_signalling_qubits(target.numpy, core_reuse, core.num_qudits):
+            return None
+    opt1_qubits = [q for q in range(core.num_qudits) if q != core_to_use]
+    opt2_qubits = [q for q in range(core.num_qudits) if q != core_reuse]
+    if instantiate_blocks(target, [opt1_qubits, opt2_qubits], threshold, profiles):
         return q_reuse, q_to_use
     return None
 
-def get_resizable_pairs_qfactor(qc: Circuit, threshold: float = 1e-10, num_cpus: int = None) -> list:
+def check_core_pairs(args_batch: list) -> list:
+    """Check a batch of qubit pairs on their cores, see `core_pair_checking`, which each have their own target."""
+    return [core_pair_checking(args) for args in args_batch]
+
+def get_signalling_qubits(utry: np.ndarray, q_out: int, num_qudits: int, signalling_tol: float = 1e-3) -> set:
+    """
+    Get the qubits whose input can change the output state of `q_out` through the unitary of a qubit circuit.
+
+    A qubit `q_in` cannot signal to `q_out` if, for the Pauli X and Z on `q_out`, the operator U^dagger P U acts as
+    the identity on `q_in`. The deviation from the identity is measured by the normalized Frobenius norm, and
+    only deviations above `signalling_tol` count, so that numerically synthesized circuits are not rejected.
+
+    Args:
+        utry (np.ndarray): the unitary of the circuit.
+        q_out (int): the qubit whose output is observed.
+        num_qudits (int): the number of qubits of the circuit.
+        signalling_tol (float): the smallest deviation from the identity considered as signalling.
+    """
+    dim = 2 ** num_qudits
+    paulis = [np.array([[0, 1], [1, 0]]), np.array([[1, 0], [0, -1]])]
+    signalling = set()
+    for pauli in paulis:
+        # apply the Pauli on the output of q_out, then conjugate by the unitary
+        pauli_utry = np.tensordot(pauli, utry.reshape([2] * num_qudits + [dim]), axes=(1, q_out))
+        pauli_utry = np.moveaxis(pauli_utry, 0, q_out).reshape(dim, dim)
+        heisenberg = (utry.conj().T @ pauli_utry).reshape([2] * (2 * num_qudits))
+        for q_in in range(num_qudits):
+            if q_in == q_out or q_in in signalling:
+                continue
+            blocks = np.moveaxis(heisenberg, (q_in, num_qudits + q_in), (0, 1))
+            deviation = (
+                np.linalg.norm(blocks[0, 1]) + np.linalg.norm(blocks[1, 0])
+                + np.linalg.norm(blocks[0, 0] - blocks[1, 1])
+            ) / np.sqrt(dim)
+            if deviation > signalling_tol:
+                signalling.add(q_in)
+    return signalling
+
+def get_signalled_qubits_sampled(
+        qc: Circuit,
+        q_in: int,
+        num_samples: int = 3,
+        signalling_tol: float = 1e-3,
+        seed: int = 0,
+) -> set:
+    """
+    Get the qubits whose output state the input of `q_in` can change, on sampled input states and without the
+    unitary of the circuit.
+
+    Each random product state is simulated gate by gate with and without a Pauli X, then Z, on `q_in`, and
+    `q_in` signals to the qubits whose reduced state changes by more than `signalling_tol`. A signalling found
+    this way is certain. Conversely, the reduced state of a qubit depends affinely on the Bloch vector of `q_in`,
+    so a signalling that does not show on random states would need the random states to fall on a set of measure
+    zero: up to `signalling_tol`, no signalling on the samples means that `q_in` cannot signal, and then the
+    pair is resizable, as `get_signalling_qubits` decides it on the unitary.
+
+    Args:
+        qc (Circuit): the qubit circuit.
+        q_in (int): the qubit whose input is changed.
+        num_samples (int): the number of random input states. (Default: 3)
+        signalling_tol (float): the smallest change of the reduced state considered as signalling.
+        seed (int): the seed of the random input states, fixed so that the results can be cached. (Default: 0)
+    """
+    rng = np.random.default_rng(seed)
+    paulis = [np.array([[0, 1], [1, 0]]), np.array([[1, 0], [0, -1]])]
+    signalled = set()
+
+    def get_output_states(state: np.ndarray) -> list[np.ndarray]:
+        out = qc.get_statevector(StateVector(state, qc.radixes)).numpy.reshape([2] * qc.num_qudits)
+        output_states = []
+        for q_out in range(qc.num_qudits):
+            reduced = np.moveaxis(out, q_out, 0).reshape(2, -1)
+            output_states.append(reduced @ reduced.conj().T)
+        return output_states
+
+    for _ in range(num_samples):
+        qubit_states = rng.normal(size=(qc.num_qudits, 2)) + 1j * rng.normal(size=(qc.num_qudits, 2))
+        qubit_states /= np.linalg.norm(qubit_states, axis=1, keepdims=True)
+        references = None
+        for pauli in [None] + paulis:
+            state = np.array([1], dtype=np.complex128)
+            for q, qubit_state in enumerate(qubit_states):
+                state = np.kron(state, qubit_state if q != q_in or pauli is None else pauli @ qubit_state)
+            output_states = get_output_states(state)
+            if references is None:
+                references = output_states
+                continue
+            for q_out, (output_state, reference) in enumerate(zip(output_states, references)):
+                if q_out != q_in and np.linalg.norm(output_state - reference) > signalling_tol:
+                    signalled.add(q_out)
+    return signalled
+
+def check_sampled_signalling(args_batch: list) -> list:
+    """Get the qubits signalled by each `q_in` of a batch of `(qc, q_in)`, see `get_signalled_qubits_sampled`."""
+    return [(q_in, get_signalled_qubits_sampled(qc, q_in)) for qc, q_in in args_batch]
+
+def prescreen_resizable_pairs(qc: Circuit, unitary: UnitaryMatrix | None = None) -> tuple[list, list]:
+    """
+    Classify the qubit pairs of the input circuit before any instantiation.
+
+    The pairs that are resizable by gate dependency (see `get_resizable_qubit_pairs`) are definitely resizable,
+    since the gates in the causal cone of `q_reuse` already form the first block. The pairs where `q_to_use`
+    can signal to `q_reuse` (see `get_signalling_qubits`) are definitely not resizable, since no gate of the
+    first block acts on `q_to_use` and no gate of the second block acts on `q_reuse`. The other pairs still
+    need an instantiation.
+
+    Args:
+        qc (Circuit): the input circuit to resize.
+        unitary (UnitaryMatrix | None): the unitary of the circuit, if already computed. (Default: None)
+
+    Returns:
+        (tuple[list, list]): the definitely resizable pairs and the pairs to check via instantiation.
+    """
+    dependency_pairs = get_resizable_qubit_pairs(qc)
+    resizable_pairs = []
+    pairs_to_check = []
+    is_qubit_circuit = all(radix == 2 for radix in qc.radixes)
+    if is_qubit_circuit:
+        utry = (qc.get_unitary() if unitary is None else unitary).numpy
+    for q_reuse in range(qc.num_qudits):
+        signalling = get_signalling_qubits(utry, q_reuse, qc.num_qudits) if is_qubit_circuit else set()
+        for q_to_use in range(qc.num_qudits):
+            if q_to_use == q_reuse:
+                continue
+            if q_to_use in dependency_pairs[q_reuse]:
+                resizable_pairs.append((q_reuse, q_to_use))
+            elif q_to_use not in signalling:
+                pairs_to_check.append((q_reuse, q_to_use))
+    return resizable_pairs, pairs_to_check
+
+def plan_pair_checks(
+        qc: Circuit,
+        threshold: float,
+        profiles: tuple,
+        reduced: bool,
+        unitary: UnitaryMatrix | None,
+        max_core_qudits: int,
+) -> tuple[list, list, UnitaryMatrix | None]:
+    """
+    Plan the checks of the qubit pairs of the input circuit, see `iter_resizable_pairs_qfactor`.
+
+    Returns:
+        (tuple[list, list, UnitaryMatrix | None]): the pairs that are resizable without any check, the checks
+            of the other pairs, and the unitary shared by the checks (see `share_unitary`), which is None in
+            the reduced mode. Each check is a tuple (function, get_args_list, get_pairs) of the check of a batch
+            (see `iter_checks`), of the arguments of its checks given the handle of the shared unitary, and of
+            the resizable pairs of each of its results.
+    """
+    if reduced:
+        return (*plan_core_pair_checks(qc, threshold, profiles, max_core_qudits), None)
+    if unitary is None:
+        unitary = qc.get_unitary()
+    resizable_pairs, pairs_to_check = prescreen_resizable_pairs(qc, unitary)
+    _logger.debug(
+        f'{len(resizable_pairs)} pairs are resizable by gate dependency, '
+        f'{len(pairs_to_check)} out of {qc.num_qudits * (qc.num_qudits - 1)} pairs need instantiation.',
+    )
+    checks = []
+    if pairs_to_check:
+        checks.append((
+            check_resizable_pairs,
+            lambda target_handle: [
+                (q_reuse, q_to_use, target_handle, threshold, profiles) for q_reuse, q_to_use in pairs_to_check
+            ],
+            lambda pair: [pair],
+        ))
+    return resizable_pairs, checks, unitary
+
+def plan_core_pair_checks(qc: Circuit, threshold: float, profiles: tuple, max_core_qudits: int) -> tuple[list, list]:
+    """The pairs and the checks of the reduced mode of `plan_pair_checks`."""
+    is_qubit_circuit = all(radix == 2 for radix in qc.radixes)
+    resizable_pairs = []
+    cores = []
+    wide_pairs = {}
+    num_undecided = 0
+    for q_reuse in range(qc.num_qudits):
+        for q_to_use in range(qc.num_qudits):
+            if q_reuse == q_to_use:
+                continue
+            core = get_pair_core(qc, q_reuse, q_to_use)
+            if core is None:
+                resizable_pairs.append((q_reuse, q_to_use))
+            elif core[0].num_qudits <= max_core_qudits:
+                cores.append((q_reuse, q_to_use, core))
+            elif is_qubit_circuit:
+                wide_pairs.setdefault(q_to_use, []).append(q_reuse)
+            else:
+                num_undecided += 1
+    if num_undecided > 0:
+        count('undecided_pairs', num_undecided)
+        _logger.warning(
+            f'{num_undecided} pairs have cores wider than {max_core_qudits} qudits and are left undecided, '
+            'they are not reported as resizable.',
+        )
+    checks = []
+    if wide_pairs:
+        _logger.debug(
+            f'{sum(len(qs_reuse) for qs_reuse in wide_pairs.values())} pairs have cores wider than '
+            f'{max_core_qudits} qubits and are checked on sampled input states.',
+        )
+        count('sampled_pairs', sum(len(qs_reuse) for qs_reuse in wide_pairs.values()))
+        checks.append((
+            check_sampled_signalling,
+            lambda _: [(qc, q_to_use) for q_to_use in wide_pairs],
+            lambda result: [(q_reuse, result[0]) for q_reuse in wide_pairs[result[0]] if q_reuse not in result[1]],
+        ))
+    if cores:
+        _logger.debug(
+            f'{len(cores)} pairs are checked on cores of at most '
+            f'{max(core.num_qudits for _, _, (core, _, _) in cores)} out of {qc.num_qudits} qubits.',
+        )
+        checks.append((
+            check_core_pairs,
+            lambda _: [(q_reuse, q_to_use, *core, threshold, profiles) for q_reuse, q_to_use, core in cores],
+            lambda pair: [pair],
+        ))
+    return resizable_pairs, checks
+
+def iter_resizable_pairs_qfactor(
+        qc: Circuit,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        profiles: tuple = None,
+        reduced: bool = False,
+        unitary: UnitaryMatrix | None = None,
+        max_core_qudits: int = DEFAULT_MAX_CORE_QUDITS,
+) -> Iterator[tuple]:
+    """
+    Yield the resizable pairs of the input circuit as soon as they are found, see `get_resizable_pairs_qfactor`.
+
+    The pairs that are resizable by gate dependency come first, then the instantiated pairs in the order they
+    finish. Closing the generator (e.g. breaking out of the loop) cancels the instantiations that have not
+    started yet, and the running ones finish in the background. The instantiations run on the process pool,
+    see `iter_checks`, or on the BQSKit runtime with `iter_resizable_pairs_qfactor_async`.
+
+    In the reduced mode, each pair is checked on its core (see `get_pair_core`) and the unitary of the whole
+    circuit is never built. The blocks of the core cannot use the other qubits of the circuit as workspace, so
+    a few pairs that are resizable on the whole circuit may be missed. The cores of the wide circuits are often
+    almost as wide as the circuit itself, and only the cores of at most `max_core_qudits` qubits are
+    instantiated. The pairs with wider cores are decided on sampled input states of the whole circuit instead,
+    see `get_signalled_qubits_sampled`, which is exact up to a probability-zero event. The pairs of the circuits
+    that are not made of qubits and have wider cores are left undecided and never yielded.
+
+    Args:
+        qc (Circuit): the input circuit to resize.
+        threshold (float): if the circuit is resizable by this qubit pair, the Hilbert-Schmidt distance between the
+        instantiated circuit and the input circuit should be below the threshold.
+        num_cpus (int): the number of cpus allocated by the user to process the resizable pair checking in parallel.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`. If None, `DEFAULT_PROFILES` is used.
+        reduced (bool): check the pairs on their cores instead of the whole circuit. (Default: False)
+        unitary (UnitaryMatrix | None): the unitary of the circuit, if already built. It is not used in the
+        reduced mode. (Default: None)
+        max_core_qudits (int): the widest core instantiated in the reduced mode. (Default: 10)
+    """
+    resizable_pairs, checks, unitary = plan_pair_checks(qc, threshold, profiles, reduced, unitary, max_core_qudits)
+    yield from resizable_pairs
+    with share_unitary(unitary if checks else None) as target_handle:
+        for function, get_args_list, get_pairs in checks:
+            stream = iter_checks(function, get_args_list(target_handle), num_cpus)
+            try:
+                for _, result in stream:
+                    yield from get_pairs(result)
+            finally:
+                stream.close()
+
+async def iter_resizable_pairs_qfactor_async(
+        qc: Circuit,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        profiles: tuple = None,
+        reduced: bool = False,
+        unitary: UnitaryMatrix | None = None,
+        max_core_qudits: int = DEFAULT_MAX_CORE_QUDITS,
+) -> AsyncIterator[tuple]:
+    """
+    Yield the resizable pairs of the input circuit as soon as they are found, see `iter_resizable_pairs_qfactor`.
+    The instantiations run on the BQSKit runtime when awaited by a task of the runtime, see `iter_checks_async`.
+    """
+    resizable_pairs, checks, unitary = plan_pair_checks(qc, threshold, profiles, reduced, unitary, max_core_qudits)
+    for pair in resizable_pairs:
+        yield pair
+    with share_unitary(unitary if checks else None, get_check_runtime() is not None) as target_handle:
+        for function, get_args_list, get_pairs in checks:
+            stream = iter_checks_async(function, get_args_list(target_handle), num_cpus)
+            try:
+                async for _, result in stream:
+                    for pair in get_pairs(result):
+                        yield pair
+            finally:
+                await stream.aclose()
+
+def get_resizable_pairs_qfactor(
+        qc: Circuit,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        profiles: tuple = None,
+        reduced: bool = False,
+        max_core_qudits: int = DEFAULT_MAX_CORE_QUDITS,
+) -> list:
     """
     For input n-qubit circuit, we evaluate all the qubit pairs using multiprocessing, which is n(n-1) in total,
     to check the resizability of the qubit pair via instantiation.
+    The pairs classified by `prescreen_resizable_pairs` are not instantiated.
 
     Args:
         qc (Circuit): the input circuit to resize.
         threshold (float): if the circuit is resizable by this qubit pair, the Hilbert-Schmidt distance between the
         instantiated circuit and the input circuit should be below the threshold.
         num_cpus (int): the number of cpus allocated by the user to process the resizable pair checking in parallel.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`. If None, `DEFAULT_PROFILES` is used.
+        reduced (bool): check the pairs on their cores, see `iter_resizable_pairs_qfactor`. (Default: False)
+        max_core_qudits (int): the widest core instantiated in the reduced mode. (Default: 10)
     """
-    if num_cpus is None:
-        # Use half of the available CPUs, but at least two
-        num_processors = max(2, multiprocessing.cpu_count() // 2)
-    else:
-        # Ensure the user-specified number of CPUs does not exceed the available CPUs
-        available_cpus = multiprocessing.cpu_count()
-        # At least 1 CPU, and at most the number of available CPUs
-        num_processors = min(max(1, num_cpus), available_cpus)
-    pairs_to_process = [(q_reuse, q_to_use, qc, threshold) for q_reuse in range(qc.num_qudits) for q_to_use in
-                        range(qc.num_qudits) if q_reuse != q_to_use]
-
-    # Initialize multiprocessing Pool
-    pool = multiprocessing.Pool(processes=num_processors)
-    results = pool.map(resizable_pair_checking, pairs_to_process)
-    pool.close()
-    pool.join()
-    # Filter out None results, which means the qubit pair is not resizable
-    resizable_pairs = [result for result in results if result is not None]
-    return resizable_pairs
+    return sorted(iter_resizable_pairs_qfactor(qc, threshold, num_cpus, profiles, reduced, max_core_qudits=max_core_qudits))
 
 def get_blocks(qs_to_use: list, qs_reuse: list, num_qudits: int) -> (list, list):
     """
@@ -97,86 +806,214 @@ def get_blocks(qs_to_use: list, qs_reuse: list, num_qudits: int) -> (list, list)
 def process_reduce_blocks(args) -> tuple | None:
     """
     Checking if the circuit with reduced sized of blocks can represent the target unitary.
+    The target unitary is read from the shared memory of `share_unitary`.
     """
-    q_subblock1, q_subblock2, qc, best_block_size, threshold = args
-    if len(q_subblock1) + len(q_subblock2) <= best_block_size:
-        new_circuit = Circuit(qc.num_qudits)
-        new_circuit.append_gate(VariableUnitaryGate(len(q_subblock1)), q_subblock1)
-        new_circuit.append_gate(VariableUnitaryGate(len(q_subblock2)), q_subblock2)
-
-        # Instantiate the new circuit (assuming this is a blocking, CPU-bound operation)
-        new_circuit.instantiate(
-            qc.get_unitary(),
-            method='qfactor',
-            diff_tol_a=1e-12,  # Stopping criteria for distance change
-            diff_tol_r=1e-6,  # Relative criteria for distance change
-            dist_tol=1e-12,  # Stopping criteria for distance
-            max_iters=100000,  # Maximum number of iterations
-            min_iters=1000,  # Minimum number of iterations
-            slowdown_factor=0,  # Larger numbers slowdown optimization
-        )
+    return check_reduced_blocks([args])[0]
 
-        dist = new_circuit.get_unitary().get_distance_from(qc.get_unitary(), 1)
-        if dist < threshold:
-            return len(q_subblock1) + len(q_subblock2), [q_subblock1, q_subblock2]
-    return None
+def check_reduced_blocks(args_batch: list) -> list:
+    """
+    Check a batch of the sub-blocks of the same circuit, see `process_reduce_blocks`. The sub-blocks of at most
+    the best block size are checked together by `check_layouts`.
 
-def reduce_block_size(qc: Circuit, resize_pairs: list, threshold: float = 1e-10, num_cpus: int = None) -> (tuple, list):
+    Returns:
+        (list): the total size and the sub-blocks of each candidate that can represent the target unitary, and
+        None for the others.
     """
-    Reduce the size of the blocks for the resizable-checking circuit to mitigate the overhead for block unitary
-    synthesis process.
+    _, _, target_handle, _, threshold, profiles = args_batch[0]
+    candidates = [
+        index for index, (q_subblock1, q_subblock2, _, best_block_size, _, _) in enumerate(args_batch)
+        if len(q_subblock1) + len(q_subblock2) <= best_block_size
+    ]
+    results = [None] * len(args_batch)
+    if not candidates:
+        return results
+    target = get_shared_unitary(target_handle)
+    layouts = [(list(args_batch[i][0]), list(args_batch[i][1])) for i in candidates]
+    for index, ok in zip(candidates, check_layouts(target, layouts, threshold, profiles)):
+        if ok:
+            q_subblock1, q_subblock2 = args_batch[index][:2]
+            results[index] = len(q_subblock1) + len(q_subblock2), [q_subblock1, q_subblock2]
+    return results
+
+def get_subblock_pairs(pair: tuple, size: int, num_qudits: int) -> Iterator[tuple]:
+    """
+    Enumerate the sub-blocks of the two blocks of a resizable pair (see `get_blocks`) with a total size of `size`.
+    The first sub-block keeps `q_reuse`, the second one keeps `q_to_use`, and each has at least two qubits.
+    """
+    q_block1, q_block2 = get_blocks([pair[1]], [pair[0]], num_qudits)
+    for l1 in range(2, len(q_block1) + 1):
+        l2 = size - l1
+        if l2 < 2 or l2 > len(q_block2):
+            continue
+        for b1 in combinations(q_block1, l1):
+            if pair[0] not in b1:
+                continue
+            for b2 in combinations(q_block2, l2):
+                if pair[1] in b2:
+                    yield b1, b2
+
+def get_full_blocks(qc: Circuit, resize_pairs: list) -> dict[tuple, list]:
+    """The full blocks of each resizable pair, see `get_blocks`, in the format of `get_reduced_blocks`."""
+    return {pair: [list(get_blocks([pair[1]], [pair[0]], qc.num_qudits))] for pair in resize_pairs}
+
+def get_reduced_block_checks(
+        qc: Circuit,
+        resize_pairs: list,
+        size: int,
+        target_handle: tuple | UnitaryMatrix,
+        threshold: float,
+        profiles: tuple,
+) -> tuple[list, list]:
+    """
+    The sub-blocks of a total size of `size` of the resizable pairs, see `get_subblock_pairs`, and the arguments
+    of their checks, see `check_reduced_blocks`.
+    """
+    tasks = [(pair, blocks) for pair in resize_pairs for blocks in get_subblock_pairs(pair, size, qc.num_qudits)]
+    args_list = [
+        (q_subblock1, q_subblock2, target_handle, size, threshold, profiles) for _, (q_subblock1, q_subblock2) in tasks
+    ]
+    return tasks, args_list
+
+def add_reduced_blocks(reduced_blocks: dict[tuple, list], tasks: list, results: list) -> None:
+    """Add the blocks of the successful checks (index, result) of `tasks` in the order of the tasks."""
+    # The blocks are kept in the order of the tasks, whatever order the checks finish in
+    for index, result in sorted(results, key=lambda item: item[0]):
+        reduced_blocks.setdefault(tasks[index][0], []).append(result[1])
+
+def get_reduced_blocks(
+        qc: Circuit,
+        resize_pairs: list,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        block_size_target: int = None,
+        profiles: tuple = None,
+        unitary: UnitaryMatrix | None = None,
+) -> dict[tuple, list]:
+    """
+    Find the smallest blocks of the resizable pairs, see `reduce_block_size`.
+
+    The sub-blocks of all the pairs are checked together by increasing total size, and the search stops at the
+    first size for which an instantiation succeeds, so the larger sub-blocks are never instantiated. The
+    sub-blocks of a size are split in one batch per process, whose layouts are fitted together, and run on the
+    process pool, see `iter_checks`, or on the BQSKit runtime with `get_reduced_blocks_async`.
 
     Args:
         qc (Circuit): the circuit to resize.
         resize_pairs (list): the resizable pairs that can be reused for resizing.
         threshold (float): the threshold to guarantee the Hilbert-Schmidt distance between two circuits.
+        num_cpus (int): the number of cpus allocated by the user to process the block checking in parallel.
+        block_size_target (int): if the total size of the blocks is at most this target, stop at the first
+        successful instantiation and cancel the remaining block checking of the same size instead of
+        collecting all the smallest blocks. If None, all the smallest blocks are collected.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`. If None, `DEFAULT_PROFILES` is used.
+        unitary (UnitaryMatrix | None): the unitary of the circuit, if already built. (Default: None)
+
+    Returns:
+        (dict[tuple, list]): the smallest blocks found for each resizable pair that has some.
     """
     reduced_blocks = {}
-    best_block_size = (qc.num_qudits - 1) * 2
-    for pair in resize_pairs:
-        reduced_blocks[pair] = []
-        q_block1, q_block2 = get_blocks([pair[1]], [pair[0]], qc.num_qudits)
-        q_subblock1s = []
-        q_subblock2s = []
+    if unitary is None:
+        unitary = qc.get_unitary()
+    # The target unitary is shared with the workers for all the sizes.
+    with timed('reduce_block_size'), share_unitary(unitary) as target_handle:
         # The smallest size of the block is set to two.
-        for l in range(2, len(q_block1) + 1):
-            for b1 in combinations(q_block1, l):
-                if pair[0] in b1:
-                    q_subblock1s.append(b1)
-        for l in range(2, len(q_block2) + 1):
-            for b2 in combinations(q_block2, l):
-                if pair[1] in b2:
-                    q_subblock2s.append(b2)
+        for size in range(4, (qc.num_qudits - 1) * 2 + 1):
+            tasks, args_list = get_reduced_block_checks(qc, resize_pairs, size, target_handle, threshold, profiles)
+            first_hit = block_size_target is not None and size <= block_size_target
+            results = []
+            stream = iter_checks(check_reduced_blocks, args_list, num_cpus)
+            try:
+                for index, result in stream:
+                    results.append((index, result))
+                    if first_hit:
+                        break
+            finally:
+                stream.close()
+            add_reduced_blocks(reduced_blocks, tasks, results)
+            if reduced_blocks:
+                _logger.debug(f'The smallest blocks have a total size of {size}.')
+                break
+    if not reduced_blocks:
+        # The pairs are resizable with the full blocks, see `get_resizable_pairs_qfactor`.
+        _logger.warning('Unable to reduce the size of the blocks, keep the full blocks.')
+        reduced_blocks = get_full_blocks(qc, resize_pairs)
+    return reduced_blocks
 
-        tasks = [(q_subblock1, q_subblock2, qc, best_block_size, threshold) for q_subblock1 in q_subblock1s for
-                 q_subblock2 in q_subblock2s]
+async def get_reduced_blocks_async(
+        qc: Circuit,
+        resize_pairs: list,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        block_size_target: int = None,
+        profiles: tuple = None,
+        unitary: UnitaryMatrix | None = None,
+) -> dict[tuple, list]:
+    """
+    Find the smallest blocks of the resizable pairs, see `get_reduced_blocks`. The sub-blocks run on the BQSKit
+    runtime when awaited by a task of the runtime, see `iter_checks_async`.
+    """
+    reduced_blocks = {}
+    if unitary is None:
+        unitary = qc.get_unitary()
+    on_runtime = get_check_runtime() is not None
+    with timed('reduce_block_size'), share_unitary(unitary, on_runtime) as target_handle:
+        for size in range(4, (qc.num_qudits - 1) * 2 + 1):
+            tasks, args_list = get_reduced_block_checks(qc, resize_pairs, size, target_handle, threshold, profiles)
+            first_hit = block_size_target is not None and size <= block_size_target
+            results = []
+            stream = iter_checks_async(check_reduced_blocks, args_list, num_cpus)
+            try:
+                async for index, result in stream:
+                    results.append((index, result))
+                    if first_hit:
+                        break
+            finally:
+                await stream.aclose()
+            add_reduced_blocks(reduced_blocks, tasks, results)
+            if reduced_blocks:
+                _logger.debug(f'The smallest blocks have a total size of {size}.')
+                break
+    if not reduced_blocks:
+        _logger.warning('Unable to reduce the size of the blocks, keep the full blocks.')
+        reduced_blocks = get_full_blocks(qc, resize_pairs)
+    return reduced_blocks
 
-        if num_cpus is None:
-            # Use half of the available CPUs, but at least two
-            num_processors = max(2, multiprocessing.cpu_count() // 2)
-        else:
-            # Ensure the user-specified number of CPUs does not exceed the available CPUs
-            available_cpus = multiprocessing.cpu_count()
-            # At least 1 CPU, and at most the number of available CPUs
-            num_processors = min(max(1, num_cpus), available_cpus)
-
-        with multiprocessing.Pool(processes=num_processors) as pool:
-            results = pool.map(process_reduce_blocks, tasks)
-
-        # Filter out None results and update best_block_size if necessary
-        for result in filter(None, results):
-            block_size, blocks = result
-            if block_size <= best_block_size:
-                reduced_blocks[pair].append(blocks)
-                best_block_size = block_size
-    # filter all the blocks that are equal to the best block size
-    filtered_blocks = {
-        key: [block for block in value if sum(len(t) for t in block) == best_block_size]
-        for key, value in reduced_blocks.items()
-    }
-    filtered_blocks = {k: v for k, v in filtered_blocks.items() if v}
-    keys_list = list(filtered_blocks.keys())
-    random_resizable_pair = keys_list[np.random.randint(len(keys_list))]
-    random_correspond_block = filtered_blocks[random_resizable_pair][np.random.randint(len(filtered_blocks[random_resizable_pair]))]
-
-    return random_resizable_pair, random_correspond_block
\ No newline at end of file
+def pick_reduced_blocks(reduced_blocks: dict[tuple, list], rng: np.random.RandomState | None = None) -> (tuple, list):
+    """
+    Randomly pick a resizable pair and its blocks among the smallest blocks of `get_reduced_blocks`.
+
+    Args:
+        reduced_blocks (dict[tuple, list]): the smallest blocks of each resizable pair.
+        rng (np.random.RandomState | None): the random state of the pick, which picks as the global random state
+            of numpy seeded the same. If left as None, the global random state is used. (Default: None)
+    """
+    randint = np.random.randint if rng is None else rng.randint
+    keys_list = list(reduced_blocks.keys())
+    random_resizable_pair = keys_list[randint(len(keys_list))]
+    random_correspond_block = reduced_blocks[random_resizable_pair][randint(len(reduced_blocks[random_resizable_pair]))]
+
+    return random_resizable_pair, random_correspond_block
+
+def reduce_block_size(
+        qc: Circuit,
+        resize_pairs: list,
+        threshold: float = 1e-10,
+        num_cpus: int = None,
+        block_size_target: int = None,
+        profiles: tuple = None,
+) -> (tuple, list):
+    """
+    Reduce the size of the blocks for the resizable-checking circuit to mitigate the overhead for block unitary
+    synthesis process. A random pair and blocks are picked among the smallest ones, see `get_reduced_blocks`.
+
+    Args:
+        qc (Circuit): the circuit to resize.
+        resize_pairs (list): the resizable pairs that can be reused for resizing.
+        threshold (float): the threshold to guarantee the Hilbert-Schmidt distance between two circuits.
+        num_cpus (int): the number of cpus allocated by the user to process the block checking in parallel.
+        block_size_target (int): stop at the first blocks of at most this total size, see `get_reduced_blocks`.
+        profiles (tuple): the instantiation stages, see `instantiate_blocks`. If None, `DEFAULT_PROFILES` is used.
+    """
+    return pick_reduced_blocks(
+        get_reduced_blocks(qc, resize_pairs, threshold, num_cpus, block_size_target, profiles),
+    )
@@ -1,31 +1,189 @@
-"""This module implements the ResizingQFactorPredicate class."""
+"""This module implements the ResizingQFactorPredicate and ResizingQFactorCheckPass classes."""
 from __future__ import annotations
 
 import logging
 from typing import TYPE_CHECKING
 
+import numpy as np
+from bqskit.compiler.basepass import BasePass
 from bqskit.passes.control.predicate import PassPredicate
 from bqskit.qis.graph import CouplingGraph
-from .qfactor_resizable_checking import get_resizable_pairs_qfactor
-from .qfactor_resizable_checking import reduce_block_size
+from .cache import ResultCache
+from .profiling import count
+from .profiling import profile_pass
+from .profiling import timed
+from .qfactor_resizable_checking import DEFAULT_MAX_CORE_QUDITS
+from .qfactor_resizable_checking import DEFAULT_PROFILES
+from .qfactor_resizable_checking import get_full_blocks
+from .qfactor_resizable_checking import get_reduced_blocks
+from .qfactor_resizable_checking import get_reduced_blocks_async
+from .qfactor_resizable_checking import iter_resizable_pairs_qfactor
+from .qfactor_resizable_checking import iter_resizable_pairs_qfactor_async
+from .qfactor_resizable_checking import pick_reduced_blocks
 from .utils import update_coupling_graph
 
 if TYPE_CHECKING:
     from bqskit.compiler.passdata import PassData
     from bqskit.ir.circuit import Circuit
+    from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
 
 _logger = logging.getLogger(__name__)
 
 
 class ResizingQFactorPredicate(PassPredicate):
     """Check if the circuit is resizable based on qfactor instantiation."""
+
+    pass_data_key = 'resize_qfactor_check'
+    """The `PassData` key of the check stored by `ResizingQFactorCheckPass` with the fingerprint of its circuit."""
+
+    pairs_key = 'resize_qfactor_pairs'
+    """The `PassData` key of the resizable pairs found by the check."""
+
+    def __init__(
+            self,
+            max_pairs: int | None = None,
+            block_size_target: int | None = None,
+            profiles: tuple | None = None,
+            cache: ResultCache | None = None,
+            reduced: bool = False,
+            profile: bool = False,
+            threshold: float = 1e-10,
+            max_core_qudits: int = DEFAULT_MAX_CORE_QUDITS,
+    ) -> None:
+        """
+        Create a qfactor resizing predicate.
+
+        Args:
+            max_pairs (int | None): Stop checking the qubit pairs as soon as this number of resizable pairs are
+                found, and cancel the remaining instantiations. If left as None, all the pairs are checked.
+                (Default: None)
+
+            block_size_target (int | None): Stop reducing the blocks of the resizable pairs as soon as the total
+                size of the two blocks is at most this target, see `reduce_block_size`. If left as None, the
+                smallest blocks are searched. (Default: None)
+
+            profiles (tuple | None): The stages of the qfactor instantiation of each candidate, see
+                `instantiate_blocks`. If left as None, `DEFAULT_PROFILES` instantiates each candidate once at
+                full precision. `TWO_STAGE_PROFILES` first rejects the clearly non-resizable candidates with a
+                coarse sweep, which is faster but may reject a few resizable ones. (Default: None)
+
+            cache (ResultCache | None): The on-disk cache of the resizable pairs and of the smallest blocks,
+                which is checked before any instantiation. The instantiations start from random points, so
+                only the runs with a seed in their `PassData` are cached, under their seed. If left as None,
+                nothing is cached. (Default: None)
+
+            reduced (bool): Check each pair on the part of the circuit that decides its resizability instead of
+                the unitary of the whole circuit, see `get_pair_core`. The pairs whose core is wider than
+                `max_core_qudits` are checked on sampled input states, see `iter_resizable_pairs_qfactor`. The
+                blocks are not reduced, since it needs the unitary of the whole circuit, so the blocks of the
+                wide circuits are too wide for the synthesis of the next passes, which should then be gated
+                separately, e.g. by a `WidthPredicate`. (Default: False)
+
+            profile (bool): Record the time of the pair checks and of the block reduction, the number of
+                instantiations and of their iterations, the cache hits and the pool start-ups, and write them
+                to the PassData and the log, see `profile_pass`. (Default: False)
+
+            threshold (float): The Hilbert-Schmidt distance below which an instantiation is accepted.
+                (Default: 1e-10)
+
+            max_core_qudits (int): The widest core instantiated in the reduced mode. (Default: 10)
+        """
+        if max_pairs is not None and (not isinstance(max_pairs, int) or max_pairs < 1):
+            raise ValueError('Invalid maximum number of pairs. Should be a positive integer or None.')
+        self.max_pairs = max_pairs
+        self.block_size_target = block_size_target
+        self.profiles = profiles
+        self.cache = cache
+        self.reduced = reduced
+        self.profile = profile
+        self.threshold = threshold
+        self.max_core_qudits = max_core_qudits
+
     def get_truth_value(self, circuit: Circuit, data: PassData) -> bool:
-        """Call this predicate, see :class:`PassPredicate` for more info."""
-        resizable_qubit_pairs = get_resizable_pairs_qfactor(circuit)
+        """
+        Call this predicate, see :class:`PassPredicate` for more info.
+
+        The result of a `ResizingQFactorCheckPass` run by this predicate on the same circuit is reused, since a
+        synchronous predicate cannot run the instantiations on the BQSKit runtime.
+        """
+        with profile_pass('ResizingQFactorPredicate', data, self.profile):
+            stored = data.get(self.pass_data_key)
+            if stored is not None and stored[0] == self.get_fingerprint(circuit):
+                _logger.debug('Reuse the stored qfactor resizability check.')
+                count('qfactor_check_reuses')
+                return stored[1]
+            return self.check_pass_data(circuit, data)
+
+    def get_settings(self) -> tuple:
+        """The settings that the resizable pairs and their blocks depend on, see `ResultCache.make_key`."""
+        return (
+            self.max_pairs,
+            self.block_size_target,
+            DEFAULT_PROFILES if self.profiles is None else self.profiles,
+            self.threshold,
+            self.reduced,
+            self.max_core_qudits if self.reduced else None,
+        )
+
+    def get_fingerprint(self, circuit: Circuit) -> str:
+        """The fingerprint of the check of `circuit`, under which `ResizingQFactorCheckPass` stores it."""
+        return ResultCache.make_key(circuit, *self.get_settings())
+
+    def get_cached(
+            self,
+            circuit: Circuit,
+            unitary: UnitaryMatrix | None,
+            seed: int | None,
+    ) -> tuple[str | None, tuple | None]:
+        """
+        The cache key of the check of the circuit and its cached result, or None for a miss. The key is None
+        without cache or without seed, since the result of an unseeded run is not reproducible.
+        """
+        if self.cache is None or seed is None:
+            return None, None
+        # The unitary of the whole circuit is a key independent of the gate set and order of the circuit
+        key = ResultCache.make_key(circuit if self.reduced else unitary, *self.get_settings(), seed)
+        return key, self.cache.get(key)
+
+    def set_cached(self, key: str | None, result: tuple) -> None:
+        """Store the result of the check under the key of `get_cached`, unless it is None."""
+        if key is not None:
+            self.cache.set(key, result)
+
+    def check_pass_data(self, circuit: Circuit, data: PassData) -> bool:
+        """
+        Check the circuit in the calling thread with the process pool, and record its resizable pairs and the blocks
+        of the picked pair in `data`, see `record_check`.
+        """
+        # The unitary of the whole circuit is built once for the cache key, the pair checks and the blocks
+        unitary = None if self.reduced else circuit.get_unitary()
+        key, result = self.get_cached(circuit, unitary, data.seed)
+        if result is None:
+            result = self.check_resizable(circuit, unitary)
+            self.set_cached(key, result)
+        return self.record_check(circuit, data, *result)
+
+    async def check_pass_data_async(self, circuit: Circuit, data: PassData) -> bool:
+        """
+        Check the circuit as `check_pass_data`, with the instantiations on the BQSKit runtime when awaited by a
+        task of the runtime, see `check_resizable_async`.
+        """
+        unitary = None if self.reduced else circuit.get_unitary()
+        key, result = self.get_cached(circuit, unitary, data.seed)
+        if result is None:
+            result = await self.check_resizable_async(circuit, unitary)
+            self.set_cached(key, result)
+        return self.record_check(circuit, data, *result)
+
+    def record_check(self, circuit: Circuit, data: PassData, resizable_qubit_pairs: list, reduced_blocks: dict) -> bool:
+        """Record the resizable pairs and the blocks of the picked pair in `data`, and return if there are any."""
+        data[self.pairs_key] = resizable_qubit_pairs
         if len(resizable_qubit_pairs) == 0:
             return False
         else:
-            resizable_pair, block_reduced = reduce_block_size(circuit, resizable_qubit_pairs)
+            # The global random state of a runtime worker is not seeded, so the pick follows the seed of the task
+            rng = None if data.seed is None else np.random.RandomState(data.seed)
+            resizable_pair, block_reduced = pick_reduced_blocks(reduced_blocks, rng)
             block_1, block_2 = block_reduced[0], block_reduced[1]
             initial_coupling = data.connectivity
             updated_map = update_coupling_graph([resizable_pair[0]], [resizable_pair[1]], initial_coupling,
@@ -33,5 +191,117 @@ class ResizingQFactorPredicate(PassPredicate):
             data['block1'] = block_1
             data['block2'] = block_2
             data.model.coupling_graph = CouplingGraph(updated_map)
+            if self.reduced and circuit.num_qudits - 1 > self.max_core_qudits:
+                _logger.info(
+                    f'The blocks of the {circuit.num_qudits}-qubit circuit are wider than {self.max_core_qudits} '
+                    'qubits, gate their synthesis separately.',
+                )
             return True
 
+    def get_pair_check_settings(self, unitary: UnitaryMatrix | None) -> dict:
+        """The keyword arguments of `iter_resizable_pairs_qfactor` for the checks of this predicate."""
+        return {
+            'threshold': self.threshold,
+            'profiles': self.profiles,
+            'reduced': self.reduced,
+            'unitary': unitary,
+            'max_core_qudits': self.max_core_qudits,
+        }
+
+    def has_enough_pairs(self, resizable_qubit_pairs: list) -> bool:
+        """Whether the pair checks can stop, see `max_pairs`."""
+        return self.max_pairs is not None and len(resizable_qubit_pairs) >= self.max_pairs
+
+    def check_resizable(self, circuit: Circuit, unitary: UnitaryMatrix | None = None) -> tuple[list, dict]:
+        """
+        Find the resizable pairs of the circuit and their smallest blocks in the calling thread with the process
+        pool, see `get_reduced_blocks`.
+
+        Args:
+            circuit (Circuit): the circuit to check.
+            unitary (UnitaryMatrix | None): the unitary of the circuit, if already built. (Default: None)
+        """
+        if unitary is None and not self.reduced:
+            unitary = circuit.get_unitary()
+        resizable_qubit_pairs = []
+        stream = iter_resizable_pairs_qfactor(circuit, **self.get_pair_check_settings(unitary))
+        with timed('qfactor_pair_checks'):
+            try:
+                for pair in stream:
+                    resizable_qubit_pairs.append(pair)
+                    if self.has_enough_pairs(resizable_qubit_pairs):
+                        break
+            finally:
+                stream.close()
+        resizable_qubit_pairs.sort()
+        if len(resizable_qubit_pairs) == 0:
+            return resizable_qubit_pairs, {}
+        if self.reduced:
+            return resizable_qubit_pairs, get_full_blocks(circuit, resizable_qubit_pairs)
+        reduced_blocks = get_reduced_blocks(
+            circuit,
+            resizable_qubit_pairs,
+            threshold=self.threshold,
+            block_size_target=self.block_size_target,
+            profiles=self.profiles,
+            unitary=unitary,
+        )
+        return resizable_qubit_pairs, reduced_blocks
+
+    async def check_resizable_async(self, circuit: Circuit, unitary: UnitaryMatrix | None = None) -> tuple[list, dict]:
+        """
+        Find the resizable pairs of the circuit and their smallest blocks as `check_resizable`, with the
+        instantiations on the BQSKit runtime when awaited by a task of the runtime, see `get_reduced_blocks_async`.
+        """
+        if unitary is None and not self.reduced:
+            unitary = circuit.get_unitary()
+        resizable_qubit_pairs = []
+        stream = iter_resizable_pairs_qfactor_async(circuit, **self.get_pair_check_settings(unitary))
+        with timed('qfactor_pair_checks'):
+            try:
+                async for pair in stream:
+                    resizable_qubit_pairs.append(pair)
+                    if self.has_enough_pairs(resizable_qubit_pairs):
+                        break
+            finally:
+                await stream.aclose()
+        resizable_qubit_pairs.sort()
+        if len(resizable_qubit_pairs) == 0:
+            return resizable_qubit_pairs, {}
+        if self.reduced:
+            return resizable_qubit_pairs, get_full_blocks(circuit, resizable_qubit_pairs)
+        reduced_blocks = await get_reduced_blocks_async(
+            circuit,
+            resizable_qubit_pairs,
+            threshold=self.threshold,
+            block_size_target=self.block_size_target,
+            profiles=self.profiles,
+            unitary=unitary,
+        )
+        return resizable_qubit_pairs, reduced_blocks
+
+
+class ResizingQFactorCheckPass(BasePass):
+    """
+    Run the check of a `ResizingQFactorPredicate` on the BQSKit runtime and store it for the predicate.
+
+    A predicate is called synchronously by the control passes, so it cannot await the instantiations mapped on
+    the runtime, and a worker of the runtime cannot start a process pool either. This pass awaits the check on
+    the runtime and stores its result in the PassData, where the predicate finds it when it is called next on
+    the same circuit, as in `examples/circuit_resizing.py`.
+    """
+
+    def __init__(self, predicate: ResizingQFactorPredicate) -> None:
+        """
+        Create a qfactor resizability check pass.
+
+        Args:
+            predicate (ResizingQFactorPredicate): The predicate whose check is run, and which then reuses it.
+        """
+        self.predicate = predicate
+
+    async def run(self, circuit: Circuit, data: PassData) -> None:
+        """Perform the pass's operation, see :class:`BasePass` for more info."""
+        with profile_pass('ResizingQFactorCheckPass', data, self.predicate.profile):
+            truth_value = await self.predicate.check_pass_data_async(circuit, data)
+        data[ResizingQFactorPredicate.pass_data_key] = (self.predicate.get_fingerprint(circuit), truth_value)
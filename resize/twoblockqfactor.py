@@ -0,0 +1,168 @@
+"""This module implements a QFactor engine specialized for the two-block resizing checks."""
+from __future__ import annotations
+
+import logging
+from string import ascii_letters
+
+import numpy as np
+from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from .profiling import get_active_profile
+
+_logger = logging.getLogger(__name__)
+
+
+def _random_unitaries(rng: np.random.Generator, batch: int, dim: int) -> np.ndarray:
+    """Draw `batch` random unitaries of dimension `dim` from the QR decomposition of Gaussian matrices."""
+    gaussian = rng.standard_normal((batch, dim, dim)) + 1j * rng.standard_normal((batch, dim, dim))
+    q, r = np.linalg.qr(gaussian)
+    phases = np.diagonal(r, axis1=1, axis2=2)
+    return q * (phases / np.abs(phases))[:, None, :]
+
+
+def get_canonical_layout(num_qudits: int, block1: list, block2: list) -> tuple[list, tuple]:
+    """
+    Reorder the qubits of a two-block layout so that layouts of the same shape share the same contractions.
+
+    The qubits are ordered as the qubits only in the first block, the qubits in both blocks, the qubits only in
+    the second block, and the qubits in no block.
+
+    Returns:
+        (tuple[list, tuple]): the permutation of the qubits and the number of qubits of each of the four kinds.
+    """
+    only1 = [q for q in block1 if q not in block2]
+    both = [q for q in block1 if q in block2]
+    only2 = [q for q in block2 if q not in block1]
+    neither = [q for q in range(num_qudits) if q not in block1 and q not in block2]
+    return only1 + both + only2 + neither, (len(only1), len(both), len(only2), len(neither))
+
+
+class _TwoBlockContraction:
+    """The environment contractions of the two blocks for one canonical layout shape."""
+
+    def __init__(self, shape: tuple) -> None:
+        num_only1, num_both, num_only2, num_neither = shape
+        num_qudits = sum(shape)
+        letters = iter(ascii_letters)
+        batch = next(letters)
+        # the output, middle and input index of each qubit, merged where a block acts as the identity
+        outs, mids, ins = [], [], []
+        for q in range(num_qudits):
+            in_block1 = q < num_only1 + num_both
+            in_block2 = num_only1 <= q < num_only1 + num_both + num_only2
+            out_letter = next(letters)
+            mid_letter = next(letters) if in_block2 else out_letter
+            in_letter = next(letters) if in_block1 else mid_letter
+            outs.append(out_letter)
+            mids.append(mid_letter)
+            ins.append(in_letter)
+        block1 = range(num_only1 + num_both)
+        block2 = range(num_only1, num_only1 + num_both + num_only2)
+        target = batch + ''.join(outs) + ''.join(ins)
+        v1 = batch + ''.join(mids[q] for q in block1) + ''.join(ins[q] for q in block1)
+        v2 = batch + ''.join(outs[q] for q in block2) + ''.join(mids[q] for q in block2)
+        self.env1 = f'{target},{v2}->{v1}'
+        self.env2 = f'{target},{v1}->{v2}'
+        self.size1 = len(block1)
+        self.size2 = len(block2)
+        self.paths = {}
+
+    def contract(self, subscripts: str, target: np.ndarray, block: np.ndarray) -> np.ndarray:
+        """Contract the target with one block, reusing the contraction path computed for the first batch."""
+        key = (subscripts, target.shape[0])
+        if key not in self.paths:
+            self.paths[key] = np.einsum_path(subscripts, target, block, optimize='greedy')[0]
+        return np.einsum(subscripts, target, block, optimize=self.paths[key])
+
+
+def fit_two_blocks(
+        target: UnitaryMatrix,
+        layouts: list,
+        diff_tol_a: float = 1e-12,
+        diff_tol_r: float = 1e-6,
+        dist_tol: float = 1e-12,
+        max_iters: int = 100000,
+        min_iters: int = 1000,
+        starts: list | None = None,
+        seed: int | None = None,
+) -> tuple[np.ndarray, list]:
+    """
+    Fit a circuit made of two unitary blocks, the first one followed by the second one, to the target unitary.
+
+    This is the QFactor algorithm specialized to the two-block circuits of the resizing checks: each iteration
+    updates one block with the SVD of its environment, which is a single contraction of the target with the
+    other block. The layouts with the same shape (see `get_canonical_layout`) are fitted together, on a stack of
+    reordered targets, with batched contractions and SVDs. The stopping criteria follow `QFactor`.
+
+    Args:
+        target (UnitaryMatrix): the unitary of a qubit circuit.
+        layouts (list): the (first block, second block) qubits of every candidate.
+        diff_tol_a (float): stop once the distance changes by less than `diff_tol_a + diff_tol_r * distance`.
+        diff_tol_r (float): see `diff_tol_a`.
+        dist_tol (float): stop once the Hilbert-Schmidt distance is below this tolerance.
+        max_iters (int): the maximum number of iterations.
+        min_iters (int): the minimum number of iterations before the distance change is checked.
+        starts (list | None): the blocks returned by a previous call on the same layouts to start from.
+            If left as None, random blocks are drawn. (Default: None)
+        seed (int | None): the seed of the random starting blocks. (Default: None)
+
+    Returns:
+        (tuple[np.ndarray, list]): the Hilbert-Schmidt distance of every candidate and its fitted blocks.
+    """
+    if any(radix != 2 for radix in target.radixes):
+        raise ValueError('The two-block QFactor engine only supports qubit circuits.')
+    rng = np.random.default_rng(seed)
+    num_qudits = target.num_qudits
+    dim = target.dim
+    utry = target.numpy.conj().reshape([2] * (2 * num_qudits))
+    distances = np.ones(len(layouts))
+    blocks = [None] * len(layouts)
+    profile = get_active_profile()
+
+    groups = {}
+    for index, (block1, block2) in enumerate(layouts):
+        perm, shape = get_canonical_layout(num_qudits, list(block1), list(block2))
+        groups.setdefault(shape, []).append((index, perm))
+
+    for shape, members in groups.items():
+        contraction = _TwoBlockContraction(shape)
+        dim1, dim2 = 2 ** contraction.size1, 2 ** contraction.size2
+        targets = np.stack([
+            utry.transpose(perm + [num_qudits + q for q in perm]) for _, perm in members
+        ])
+        if starts is None:
+            v1 = _random_unitaries(rng, len(members), dim1)
+            v2 = _random_unitaries(rng, len(members), dim2)
+        else:
+            v1 = np.stack([starts[index][0] for index, _ in members])
+            v2 = np.stack([starts[index][1] for index, _ in members])
+        group_distances = np.ones(len(members))
+        active = np.arange(len(members))
+        for iteration in range(max_iters):
+            batch = len(active)
+            if profile is not None:
+                profile.count('qfactor_iterations', batch)
+            env1 = contraction.contract(
+                contraction.env1, targets[active], v2[active].reshape([batch] + [2] * (2 * contraction.size2)),
+            ).reshape(batch, dim1, dim1)
+            # maximize |Tr(V1 env1^T)| with the SVD env1^T = W S Z^dagger, so V1 = Z W^dagger
+            w, _, zh = np.linalg.svd(env1.transpose(0, 2, 1))
+            v1[active] = (w @ zh).conj().transpose(0, 2, 1)
+            env2 = contraction.contract(
+                contraction.env2, targets[active], v1[active].reshape([batch] + [2] * (2 * contraction.size1)),
+            ).reshape(batch, dim2, dim2)
+            w, s, zh = np.linalg.svd(env2.transpose(0, 2, 1))
+            v2[active] = (w @ zh).conj().transpose(0, 2, 1)
+            # the trace reached by the last update is the sum of the singular values
+            new_distances = np.maximum(1 - s.sum(axis=1) / dim, 0)
+            converged = new_distances < dist_tol
+            if iteration + 1 >= min_iters:
+                change = np.abs(group_distances[active] - new_distances)
+                converged |= change < diff_tol_a + diff_tol_r * new_distances
+            group_distances[active] = new_distances
+            active = active[~converged]
+            if len(active) == 0:
+                break
+        for position, (index, _) in enumerate(members):
+            distances[index] = group_distances[position]
+            blocks[index] = (v1[position], v2[position])
+    return distances, blocks
@@ -1,6 +1,8 @@
 """This module contains various utility functions for quantum circuit resizing algorithms."""
 from __future__ import annotations
 from bqskit.ir.circuit import Circuit
+from bqskit.ir.gate import Gate
+from bqskit.ir.gates import MeasurementPlaceholder
 
 import logging
 _logger = logging.getLogger(__name__)
@@ -27,6 +29,47 @@ def get_independent_qubits(qubit: int, cycle_opts: dict, circuit: Circuit) -> li
     independent_qubits = [q for q in range(circuit.num_qudits) if q not in dependent_qubits]
     return independent_qubits
 
+def get_dependency_cones(circuit: Circuit) -> list[int]:
+    """
+    Get the backward causal cone of every qubit of the input circuit as an integer bitmask.
+    Bit `p` of the cone of qubit `q` is set if the finish of `q` depends on qubit `p`. All the cones are
+    filled in a single reverse sweep over the operations.
+
+    Args:
+        circuit (Circuit): the evaluated circuit.
+    """
+    return get_location_cones([op.location for op in circuit], circuit.num_qudits)
+
+def get_location_cones(locations: list, num_qudits: int) -> list[int]:
+    """
+    Get the backward causal cone bitmask of every qubit from the gate locations, see `get_dependency_cones`.
+
+    Args:
+        locations (list): the qubits of every gate, sorted by cycle.
+        num_qudits (int): the number of qudits of the evaluated circuit.
+    """
+    # reach[p] collects the qubits whose cone has already reached qubit p during the reverse sweep.
+    reach = [0] * num_qudits
+    finished = [False] * num_qudits
+    for location in reversed(locations):
+        mask = 0
+        for q in location:
+            if not finished[q]:
+                # This is the last gate on q, so its cone starts here.
+                finished[q] = True
+                reach[q] |= 1 << q
+            mask |= reach[q]
+        for q in location:
+            reach[q] = mask
+    # transpose the reach masks into one cone per qubit
+    cones = [1 << q for q in range(num_qudits)]
+    for p, mask in enumerate(reach):
+        while mask:
+            low_bit = mask & -mask
+            cones[low_bit.bit_length() - 1] |= 1 << p
+            mask ^= low_bit
+    return cones
+
 def get_resizable_qubit_pairs(circuit: Circuit) -> dict[int, list]:
     """
     Get all the possible resizable qubit pairs for the input circuit.
@@ -34,16 +77,120 @@ def get_resizable_qubit_pairs(circuit: Circuit) -> dict[int, list]:
     Args:
         circuit (Circuit): The input circuit to resize.
     """
-    resizable_qubit_pairs = {}
-    ending_points = ending_point(circuit)
-    for qubit in range(circuit.num_qudits):
-        # for each qubit, from its ending point to the start, reversely collecting a list of gates in the same cycle
-        qubit_opt_reverse_order = {cycle: [] for cycle in range(ending_points[qubit] + 1)}
-        for cycle, op in circuit.operations_with_cycles():
-            if cycle <= ending_points[qubit]:
-                qubit_opt_reverse_order[cycle].append(op)
-        resizable_qubit_pairs[qubit] = get_independent_qubits(qubit, qubit_opt_reverse_order, circuit)
-    return resizable_qubit_pairs
+    cones = get_dependency_cones(circuit)
+    # a qubit can be reused for all the qubits outside its cone
+    return {
+        qubit: [q for q in range(circuit.num_qudits) if not cone >> q & 1]
+        for qubit, cone in enumerate(cones)
+    }
+
+def get_max_reuse_matching(
+        resizable_qubit_pairs: dict[int, list],
+        matching: dict[int, int] | None = None,
+) -> dict[int, int]:
+    """
+    A maximum matching between the qubits to reuse and the qubits that they are reused for.
+    Each qubit is reused at most once and reused for at most one other qubit, so no sequence of resizing can
+    save more qubits than the size of this matching, since resizing only adds gate dependencies.
+
+    Args:
+        resizable_qubit_pairs (dict): the possible resizable pairs of the circuit to resize.
+        matching (dict | None): a matching of the resizable pairs to extend, which is left unchanged.
+            (Default: None)
+
+    Returns:
+        (dict[int, int]): the qubit that each matched 'q_to_use' reuses.
+    """
+    matching = {} if matching is None else dict(matching)
+
+    def augment(q_reuse: int, visited: set) -> bool:
+        for q_to_use in resizable_qubit_pairs[q_reuse]:
+            if q_to_use in visited:
+                continue
+            visited.add(q_to_use)
+            if q_to_use not in matching or augment(matching[q_to_use], visited):
+                matching[q_to_use] = q_reuse
+                return True
+        return False
+
+    matched = set(matching.values())
+    # the qubits visited by a failed search cannot lead to an augmenting path until the matching changes
+    visited = set()
+    for q_reuse in resizable_qubit_pairs:
+        if q_reuse not in matched and augment(q_reuse, visited):
+            visited = set()
+    return matching
+
+def get_reuse_chains(matching: dict[int, int], num_qudits: int) -> list[list[int]]:
+    """
+    Get the chains of qubits that share a wire when every matched 'q_to_use' reuses its 'q_reuse',
+    see `get_max_reuse_matching`. Each chain starts with a qubit that does not reuse any other one.
+
+    Args:
+        matching (dict): the qubit that each matched 'q_to_use' reuses.
+        num_qudits (int): the number of qudits of the circuit to resize.
+    """
+    next_qubit = {q_reuse: q_to_use for q_to_use, q_reuse in matching.items()}
+    chains = []
+    for head in range(num_qudits):
+        if head in matching:
+            continue
+        chain = [head]
+        while chain[-1] in next_qubit:
+            chain.append(next_qubit[chain[-1]])
+        chains.append(chain)
+    return chains
+
+def find_reuse_cycle(cones: list[int], matching: dict[int, int]) -> list[tuple[int, int]] | None:
+    """
+    Check if reusing all the matched pairs at once creates a cyclic gate dependency, in which case the
+    resized circuit does not exist even though each pair is resizable on its own.
+
+    Every qubit is split into its first and its last gate. The first gate of `p` precedes the last gate of
+    `q` when `p` is in the causal cone of `q`, and each matched pair chains the last gate of 'q_reuse' to
+    the first gate of 'q_to_use'.
+
+    Args:
+        cones (list[int]): the causal cone bitmask of every qubit, see `get_dependency_cones`.
+        matching (dict): the qubit that each matched 'q_to_use' reuses.
+
+    Returns:
+        (list[tuple[int, int]] | None): the (q_reuse, q_to_use) pairs on a dependency cycle, or None if
+            there is none.
+    """
+    num_qudits = len(cones)
+    next_qubit = {q_reuse: q_to_use for q_to_use, q_reuse in matching.items()}
+    # node q is the first gate of qubit q and node num_qudits + q is its last gate
+    successors = [[] for _ in range(2 * num_qudits)]
+    for q, cone in enumerate(cones):
+        for p in range(num_qudits):
+            if cone >> p & 1:
+                successors[p].append(num_qudits + q)
+        if q in next_qubit:
+            successors[num_qudits + q].append(next_qubit[q])
+    # iterative depth-first search, 1 marks the nodes on the current path and 2 the finished ones
+    marks = [0] * (2 * num_qudits)
+    for root in range(2 * num_qudits):
+        if marks[root]:
+            continue
+        marks[root] = 1
+        path = [root]
+        stack = [iter(successors[root])]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                marks[path.pop()] = 2
+                stack.pop()
+            elif marks[node] == 0:
+                marks[node] = 1
+                path.append(node)
+                stack.append(iter(successors[node]))
+            elif marks[node] == 1:
+                cycle = path[path.index(node):] + [node]
+                return [
+                    (a - num_qudits, b) for a, b in zip(cycle[:-1], cycle[1:]) if a >= num_qudits and b < num_qudits
+                ]
+    return None
 
 def ending_point(circuit: Circuit) -> dict[int, int]:
     """
@@ -85,6 +232,34 @@ def update_mapping_list(mapping: dict, q_reuse: int, q_to_use:int) -> dict[int,
     scaled_values = {v: i for i, v in enumerate(values)}
     return {k: scaled_values[v] for k, v in updated_mapping.items()}
 
+def update_chains(chains: tuple, q_reuse: int, q_to_use: int) -> tuple:
+    """
+    Update the chains of original qubits that share each wire of the resized circuit, which identify the
+    resized circuit whatever order the qubits were reused in.
+
+    Args:
+        chains (tuple): the chain of original qubits of each wire of the current circuit.
+        q_reuse (int): the qubit that we reuse.
+        q_to_use (int): the qubit that is reused for.
+    """
+    updated_chains = list(chains)
+    updated_chains[q_reuse] = chains[q_reuse] + chains[q_to_use]
+    del updated_chains[q_to_use]
+    return tuple(updated_chains)
+
+def relocate_measurement(gate: Gate, location: list) -> Gate:
+    """
+    The gate of an operation moved to `location`. A measurement names the qubits it measures itself, and these
+    names rather than the location of the operation are written to QASM, so it is rebuilt on the new qubits.
+
+    Args:
+        gate (Gate): the gate of the operation.
+        location (list): the new qubits of the operation, in the order of its old ones.
+    """
+    if not isinstance(gate, MeasurementPlaceholder):
+        return gate
+    return MeasurementPlaceholder(gate.classical_regs, dict(zip(location, gate.measurements.values())))
+
 def update_coupling_graph(
         qs_reuse: list,
         qs_to_use: list,
@@ -116,4 +291,4 @@ def update_coupling_graph(
             for q in new_mapping_inverse[j]:
                 new_coupling.append(sorted((p, q)))
     new_coupling = [tuple(pair) for pair in new_coupling]
-    return new_coupling
\ No newline at end of file
+    return new_coupling
@@ -11,5 +11,8 @@ setup(
             'numpy',
             'bqskit @ git+https://github.com/bqskit/bqskit.git@main'
             ],
+        entry_points={
+            'console_scripts': ['bqskit-resize = resize.cli:main'],
+            },
 )
 
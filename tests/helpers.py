@@ -0,0 +1,84 @@
+"""Circuits shared by the tests."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from bqskit.ir.gates import HGate
+from bqskit.ir.gates import MeasurementPlaceholder
+from bqskit.ir.gates import Reset
+from bqskit.ir.lang.qasm2 import OPENQASM2Language
+from resize import GateDependencyResize
+from resize.dependencystate import DependencyState
+
+QASM_DIR = Path(__file__).parent.parent / 'qasms'
+
+QASM_PATHS = sorted(QASM_DIR.glob('*.qasm'))
+
+
+def random_circuit(num_qudits: int, num_gates: int, seed: int) -> Circuit:
+    """A random circuit of Hadamard and CNOT gates, sparse enough to have resizable pairs."""
+    rng = np.random.default_rng(seed)
+    circuit = Circuit(num_qudits)
+    for _ in range(num_gates):
+        if rng.random() < 0.3:
+            circuit.append_gate(HGate(), [int(rng.integers(num_qudits))])
+        else:
+            control, target = rng.choice(num_qudits, 2, replace=False)
+            circuit.append_gate(CNOTGate(), [int(control), int(target)])
+    return circuit
+
+
+def resize(circuit: Circuit, method: str, **kwargs) -> Circuit:
+    """Resize the circuit with the synchronous method of `GateDependencyResize`."""
+    state = DependencyState.from_circuit(circuit)
+    resize_pass = GateDependencyResize(resizing_method=method, seed=0, **kwargs)
+    resized = getattr(resize_pass, method)(state.get_resizable_qubit_pairs(), circuit, state)
+    # bounded_exact also tells whether the number of qubits is proven minimal
+    return resized[0] if method == 'bounded_exact' else resized
+
+
+def get_wire_sequences(circuit: Circuit) -> list[list[tuple]]:
+    """The gates of every wire in the order they act on it, which do not depend on the order of the cycles."""
+    sequences = [[] for _ in range(circuit.num_qudits)]
+    for op in circuit:
+        for q in op.location:
+            sequences[q].append((type(op.gate).__name__, tuple(op.location), tuple(op.params)))
+    return sequences
+
+
+def count_resets(circuit: Circuit) -> int:
+    """The number of mid-circuit measurements and resets, which are inserted together."""
+    num_measurements = sum(isinstance(op.gate, MeasurementPlaceholder) for op in circuit)
+    num_resets = sum(isinstance(op.gate, Reset) for op in circuit)
+    assert num_measurements == num_resets
+    return num_resets
+
+
+def decode_qasm(circuit: Circuit) -> Circuit:
+    """
+    Export the circuit to QASM and parse it back. Every measurement declares the same classical register, so
+    only its first declaration is kept.
+    """
+    lines = []
+    declared = set()
+    for line in circuit.to('qasm').splitlines():
+        if line.startswith('creg '):
+            if line in declared:
+                continue
+            declared.add(line)
+        lines.append(line)
+    return OPENQASM2Language().decode('\n'.join(lines) + '\n')
+
+
+def assert_measurements_reset(circuit: Circuit) -> None:
+    """Check that every measurement measures the qubit of its operation, which is then reset."""
+    ops = list(circuit)
+    for index, op in enumerate(ops):
+        if not isinstance(op.gate, MeasurementPlaceholder):
+            continue
+        assert list(op.gate.measurements) == list(op.location)
+        following = [later for later in ops[index + 1:] if op.location[0] in later.location]
+        assert following and isinstance(following[0].gate, Reset)
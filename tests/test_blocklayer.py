@@ -0,0 +1,123 @@
+"""Tests of the successor generation of `BlockLayerGenerator`."""
+from __future__ import annotations
+
+from bqskit.compiler.machine import MachineModel
+from bqskit.compiler.passdata import PassData
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from bqskit.ir.gates import U3Gate
+from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from resize.blocklayer import BlockLayerGenerator
+
+from .helpers import random_circuit
+
+
+def get_data(num_qudits: int, block1: list, block2: list) -> PassData:
+    """The data of a search on all-to-all qudits, whose blocks are `block1` and `block2`."""
+    data = PassData(Circuit(num_qudits))
+    data.model = MachineModel(num_qudits)
+    data['block1'] = block1
+    data['block2'] = block2
+    return data
+
+
+def get_initial_layer(generator: BlockLayerGenerator, data: PassData, num_qudits: int) -> Circuit:
+    return generator.gen_initial_layer(UnitaryMatrix.identity(2 ** num_qudits), data)
+
+
+def get_naive_successors(generator: BlockLayerGenerator, circuit: Circuit, data: PassData) -> list:
+    """The successors built on every pair of block edges and then checked, without any index."""
+    successors = []
+    for edge1 in data.connectivity:
+        if not all(q in data['block1'] for q in edge1):
+            continue
+        for edge2 in data.connectivity:
+            if not all(q in data['block2'] for q in edge2):
+                continue
+            successor = circuit.copy()
+            successor.insert_gate(0, CNOTGate(), [edge1[0], edge1[1]])
+            successor.insert_gate(0, U3Gate(), edge1[0])
+            successor.insert_gate(0, U3Gate(), edge1[1])
+            successor.append_gate(CNOTGate(), [edge2[0], edge2[1]])
+            successor.append_gate(U3Gate(), edge2[0])
+            successor.append_gate(U3Gate(), edge2[1])
+            if not generator.check_stop(successor):
+                successors.append(successor)
+    return successors
+
+
+def test_successors_against_naive_generation() -> None:
+    generator = BlockLayerGenerator()
+    blocks = [([0, 1, 2], [1, 2, 3]), ([0, 1, 2, 3], [0, 1, 2, 3]), ([0, 1], [2, 3])]
+    for seed in range(10):
+        # the repeated blocks of the random circuits make check_stop reject some successors
+        circuit = random_circuit(4, 8, seed)
+        for block1, block2 in blocks:
+            data = get_data(4, block1, block2)
+            expected = get_naive_successors(generator, circuit, data)
+            successors = generator.gen_successors(circuit, data)
+            assert [generator.get_structure(successor) for successor in successors] == [
+                generator.get_structure(successor) for successor in expected
+            ]
+
+
+def test_block_edges_follow_the_blocks() -> None:
+    generator = BlockLayerGenerator()
+    data = get_data(4, [0, 1, 2], [1, 2, 3])
+    edges1, edges2 = generator.get_block_edges(data)
+    assert sorted(edges1) == [(0, 1), (0, 2), (1, 2)]
+    assert sorted(edges2) == [(1, 2), (1, 3), (2, 3)]
+    assert generator.get_block_edges(data)[0] is edges1
+    data['block2'] = [0, 3]
+    assert generator.get_block_edges(data) == (edges1, [(0, 3)])
+
+
+def test_successor_structure_matches_built_successor() -> None:
+    generator = BlockLayerGenerator()
+    data = get_data(4, [0, 1, 2], [1, 2, 3])
+    circuit = get_initial_layer(generator, data, 4)
+    for successor in generator.gen_successors(circuit, data):
+        assert tuple(generator.get_structure(successor)) in data[generator.visited_key]
+    assert data[generator.last_successors_key] == data[generator.visited_key]
+
+
+def get_all_successor_structures(generator: BlockLayerGenerator, circuit: Circuit, data: PassData) -> set:
+    """The structures of the successors of `circuit`, without skipping any of them."""
+    data = get_data(circuit.num_qudits, data['block1'], data['block2'])
+    return {tuple(generator.get_structure(successor)) for successor in generator.gen_successors(circuit, data)}
+
+
+def test_duplicated_successors_are_skipped() -> None:
+    generator = BlockLayerGenerator()
+    data = get_data(4, [0, 1, 2, 3], [0, 1, 2, 3])
+    circuit = get_initial_layer(generator, data, 4)
+    # the blocks on (0, 1) and (2, 3) commute, so prepending them in either order gives the same successor
+    structure = generator.get_structure(circuit)
+    successors = {
+        tuple(generator.get_structure(successor)): successor
+        for successor in generator.gen_successors(circuit, data)
+    }
+    first = successors[generator.get_successor_structure(structure, (0, 1), (0, 1))]
+    second = successors[generator.get_successor_structure(structure, (2, 3), (0, 1))]
+    all1 = get_all_successor_structures(generator, first, data)
+    all2 = get_all_successor_structures(generator, second, data)
+    assert all1 & all2
+    # the siblings are expanded one after the other, as when LEAP keeps its frontier
+    structures1 = {tuple(generator.get_structure(successor)) for successor in generator.gen_successors(first, data)}
+    structures2 = {tuple(generator.get_structure(successor)) for successor in generator.gen_successors(second, data)}
+    assert structures1 == all1
+    assert structures2 == all2 - all1
+
+
+def test_visited_successors_are_forgotten_after_a_possible_prefix() -> None:
+    generator = BlockLayerGenerator()
+    data = get_data(4, [0, 1, 2, 3], [0, 1, 2, 3])
+    circuit = get_initial_layer(generator, data, 4)
+    first, second = generator.gen_successors(circuit, data)[:2]
+    generator.gen_successors(first, data)
+    # second is not a successor of first, so the frontier was not cleared in between
+    successors2 = generator.gen_successors(second, data)
+    assert len(data[generator.visited_key]) > len(data[generator.last_successors_key])
+    # LEAP may have formed a prefix at a successor of second and cleared its frontier
+    generator.gen_successors(successors2[0], data)
+    assert data[generator.visited_key] == data[generator.last_successors_key]
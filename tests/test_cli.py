@@ -0,0 +1,112 @@
+"""Tests of the batch resizing of the `bqskit-resize` command."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from bqskit.ir.gates import MeasurementPlaceholder
+from bqskit.ir.gates import Reset
+from bqskit.passes import IfThenElsePass
+from bqskit.passes import WidthPredicate
+from resize.cli import build_workflow
+from resize.cli import check_qasm
+from resize.cli import read_manifest
+from resize.cli import resize_files
+from resize.cli import to_qasm
+
+from .helpers import random_circuit
+
+
+def write_circuits(directory: Path) -> list[Path]:
+    """A resizable circuit and a circuit that cannot lose any qubit."""
+    directory.mkdir()
+    resizable = random_circuit(5, 8, 0)
+    unresizable = Circuit(2)
+    unresizable.append_gate(CNOTGate(), [0, 1])
+    paths = [directory / 'resizable.qasm', directory / 'unresizable.qasm']
+    for path, circuit in zip(paths, (resizable, unresizable)):
+        path.write_text(circuit.to('qasm'))
+    return paths
+
+
+def test_resize_files_and_resume(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    paths = write_circuits(tmp_path / 'inputs')
+    monkeypatch.chdir(tmp_path)
+    counts = resize_files([Path('inputs') / path.name for path in paths], Path('resized'), num_workers=1)
+    assert counts == (1, 1, 0, 0)
+    manifest = read_manifest(tmp_path / 'resized' / 'manifest.jsonl')
+    assert sorted(manifest) == [str(path.resolve()) for path in paths]
+    for entry in manifest.values():
+        assert entry['status'] == 'ok'
+        assert Path(entry['output']).is_absolute()
+        assert Path(entry['output']).parent == (tmp_path / 'resized').resolve()
+        resized = Circuit.from_file(entry['output'])
+        assert resized.num_qudits == entry['num_qudits']
+        assert entry['resized'] == (entry['num_qudits'] < entry['num_qudits_in'])
+
+    # resumed from another directory, the completed files are found through their absolute paths
+    monkeypatch.chdir(tmp_path / 'inputs')
+    assert resize_files(paths, tmp_path / 'resized', num_workers=1) == (0, 0, 0, 2)
+    os.remove(manifest[str(paths[0].resolve())]['output'])
+    assert resize_files(paths, tmp_path / 'resized', num_workers=1) == (1, 0, 0, 1)
+
+
+def test_resize_files_forwards_task_warnings(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    # every task logs that its circuit cannot be resized, and some of them log while the others are polled
+    (tmp_path / 'inputs').mkdir()
+    paths = [tmp_path / 'inputs' / f'unresizable-{index}.qasm' for index in range(8)]
+    circuit = Circuit(2)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    for path in paths:
+        path.write_text(circuit.to('qasm'))
+    with caplog.at_level(logging.WARNING):
+        counts = resize_files(paths, tmp_path / 'resized', num_workers=1, poll_interval=0.01)
+    assert counts == (0, 8, 0, 0)
+    assert any('Unable to resize the circuit' in record.getMessage() for record in caplog.records)
+
+
+def test_resize_files_records_unreadable_input(tmp_path: Path) -> None:
+    (tmp_path / 'inputs').mkdir()
+    path = tmp_path / 'inputs' / 'broken.qasm'
+    path.write_text('OPENQASM 2.0;\nqreg q[2];\nnot_a_gate q[0];\n')
+    assert resize_files([path], tmp_path / 'resized', num_workers=1) == (0, 0, 1, 0)
+    entry = read_manifest(tmp_path / 'resized' / 'manifest.jsonl')[str(path)]
+    assert entry['status'] == 'error'
+
+
+def test_check_qasm() -> None:
+    circuit = Circuit(2)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    circuit.append_gate(MeasurementPlaceholder([('resize', 1)], {0: ('resize', 0)}), [0])
+    circuit.append_gate(Reset(), [0])
+    circuit.append_gate(CNOTGate(), [0, 1])
+    check_qasm(to_qasm(circuit), circuit)
+
+    # the measurement names qubit 1, so the QASM measures the wrong qubit
+    wrong = Circuit(2)
+    wrong.append_gate(CNOTGate(), [0, 1])
+    wrong.append_gate(MeasurementPlaceholder([('resize', 1)], {1: ('resize', 0)}), [0])
+    wrong.append_gate(Reset(), [0])
+    wrong.append_gate(CNOTGate(), [0, 1])
+    with pytest.raises(ValueError):
+        check_qasm(to_qasm(wrong), wrong)
+
+
+def test_qfactor_workflow_is_gated_on_width() -> None:
+    workflow = build_workflow(12, 'qfactor', max_qfactor_qudits=10)
+    fallback = workflow[-1].on_false[0]
+    assert isinstance(fallback, IfThenElsePass)
+    assert isinstance(fallback.condition, WidthPredicate)
+    assert fallback.condition.width == 11
+
+
+def test_manifest_entries_are_json_lines(tmp_path: Path) -> None:
+    paths = write_circuits(tmp_path / 'inputs')
+    resize_files(paths[:1], tmp_path / 'resized', num_workers=1)
+    lines = (tmp_path / 'resized' / 'manifest.jsonl').read_text().splitlines()
+    assert [json.loads(line)['input'] for line in lines] == [str(paths[0])]
@@ -0,0 +1,59 @@
+"""Tests of the array-backed `CompactCircuit`."""
+from __future__ import annotations
+
+import pytest
+from bqskit.ir.circuit import Circuit
+from resize import GateDependencyResize
+from resize.compactcircuit import CompactCircuit
+from resize.dependencystate import DependencyState
+
+from .helpers import QASM_PATHS
+from .helpers import assert_measurements_reset
+from .helpers import decode_qasm
+from .helpers import get_wire_sequences
+from .helpers import random_circuit
+from .helpers import resize
+
+
+def get_test_circuits() -> list:
+    circuits = [pytest.param(random_circuit(6, 10, seed), id=f'random-{seed}') for seed in range(10)]
+    circuits += [pytest.param(Circuit.from_file(str(path)), id=path.stem) for path in QASM_PATHS]
+    return circuits
+
+
+def test_round_trip() -> None:
+    circuit = Circuit.from_file(str(QASM_PATHS[0]))
+    assert get_wire_sequences(CompactCircuit.from_circuit(circuit).to_circuit()) == get_wire_sequences(circuit)
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_merges_against_update_circuit(circuit: Circuit) -> None:
+    # reuse the first resizable pair until none is left, so that the qubits are relabeled several times
+    resize_pass = GateDependencyResize()
+    compact = CompactCircuit.from_circuit(circuit)
+    expected = circuit
+    state = DependencyState.from_circuit(circuit)
+    while True:
+        pairs = [(q_reuse, q_to_use) for q_reuse, qs in state.get_resizable_qubit_pairs().items() for q_to_use in qs]
+        if not pairs:
+            break
+        q_reuse, q_to_use = pairs[0]
+        compact = compact.merge(q_reuse, q_to_use)
+        expected = resize_pass.update_circuit(expected, q_reuse, q_to_use, circuit)
+        state = state.merge(q_reuse, q_to_use)
+    resized = compact.to_circuit()
+    assert get_wire_sequences(resized) == get_wire_sequences(expected)
+    assert_measurements_reset(resized)
+    decoded = decode_qasm(resized)
+    assert decoded.num_qudits == resized.num_qudits
+    assert_measurements_reset(decoded)
+
+
+@pytest.mark.parametrize('path', QASM_PATHS, ids=[path.stem for path in QASM_PATHS])
+@pytest.mark.parametrize('method', ['greedy', 'beam', 'best_first', 'bounded_exact'])
+def test_resized_qasm_round_trip(path, method: str) -> None:
+    resized = resize(Circuit.from_file(str(path)), method)
+    decoded = decode_qasm(resized)
+    assert decoded.num_qudits == resized.num_qudits
+    assert decoded.num_operations == resized.num_operations
+    assert_measurements_reset(decoded)
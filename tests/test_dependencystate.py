@@ -0,0 +1,82 @@
+"""Tests of the incremental gate dependency analysis of `DependencyState`."""
+from __future__ import annotations
+
+import pytest
+from bqskit.compiler.passdata import PassData
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from resize import GateDependencyResize
+from resize import ResizingGateDependencyPredicate
+from resize.dependencystate import DependencyState
+from resize.utils import get_resizable_qubit_pairs
+
+from .helpers import QASM_PATHS
+from .helpers import random_circuit
+
+
+def get_test_circuits() -> list:
+    circuits = [pytest.param(random_circuit(5, 8, seed), id=f'random-{seed}') for seed in range(10)]
+    circuits += [pytest.param(Circuit.from_file(str(path)), id=path.stem) for path in QASM_PATHS]
+    return circuits
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_merge_against_recomputation(circuit: Circuit) -> None:
+    resize_pass = GateDependencyResize()
+    state = DependencyState.from_circuit(circuit)
+    for q_reuse, qs_to_use in state.get_resizable_qubit_pairs().items():
+        for q_to_use in qs_to_use:
+            resized = resize_pass.update_circuit(circuit, q_reuse, q_to_use, circuit)
+            expected = DependencyState.from_circuit(resized)
+            assert state.merge(q_reuse, q_to_use).cones == expected.cones, (q_reuse, q_to_use)
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_resizable_pairs_against_circuit_analysis(circuit: Circuit) -> None:
+    state = DependencyState.from_circuit(circuit)
+    pairs = state.get_resizable_qubit_pairs()
+    expected = get_resizable_qubit_pairs(circuit)
+    assert {q: sorted(qs) for q, qs in pairs.items() if qs} == {q: sorted(qs) for q, qs in expected.items() if qs}
+    assert state.num_resizable_pairs == sum(len(qs) for qs in expected.values())
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_merge_sequence_against_recomputation(seed: int) -> None:
+    # merge the first resizable pair until none is left, as a greedy resizing does
+    resize_pass = GateDependencyResize()
+    circuit = random_circuit(6, 8, seed)
+    state = DependencyState.from_circuit(circuit)
+    target = circuit
+    while True:
+        pairs = [(q_reuse, q_to_use) for q_reuse, qs in state.get_resizable_qubit_pairs().items() for q_to_use in qs]
+        if not pairs:
+            break
+        q_reuse, q_to_use = pairs[0]
+        circuit = resize_pass.update_circuit(circuit, q_reuse, q_to_use, target)
+        state = state.merge(q_reuse, q_to_use)
+        assert state.cones == DependencyState.from_circuit(circuit).cones
+        assert state.get_resizable_qubit_pairs() == DependencyState.from_circuit(circuit).get_resizable_qubit_pairs()
+
+
+def test_analysis_is_shared_through_pass_data() -> None:
+    circuit = random_circuit(5, 8, 0)
+    data = PassData(circuit)
+    assert ResizingGateDependencyPredicate().get_truth_value(circuit, data)
+    state = data[DependencyState.pass_data_key][1]
+    assert DependencyState.from_pass_data(circuit, data) is state
+    assert DependencyState.from_pass_data(circuit.copy(), data) is state
+
+
+def test_stored_analysis_is_keyed_on_gate_locations() -> None:
+    # the two circuits have the same number of qubits and gates but other dependencies
+    circuit = Circuit(3)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    circuit.append_gate(CNOTGate(), [1, 2])
+    other = Circuit(3)
+    other.append_gate(CNOTGate(), [0, 1])
+    other.append_gate(CNOTGate(), [0, 2])
+    data = PassData(circuit)
+    state = DependencyState.from_pass_data(circuit, data)
+    other_state = DependencyState.from_pass_data(other, data)
+    assert other_state is not state
+    assert other_state.cones == DependencyState.from_circuit(other).cones
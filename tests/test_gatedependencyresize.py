@@ -0,0 +1,193 @@
+"""Tests of the resizing methods of `GateDependencyResize`."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from bqskit.compiler.passdata import PassData
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from resize import GateDependencyResize
+from resize.compactcircuit import CompactCircuit
+from resize.dependencystate import DependencyState
+from resize.utils import get_reuse_chains
+
+from .helpers import QASM_PATHS
+from .helpers import count_resets
+from .helpers import get_wire_sequences
+from .helpers import random_circuit
+from .helpers import resize
+
+# bfs visits every order of the resizable pairs, so it only runs on the small circuits
+MAX_BFS_QUDITS = 6
+
+
+def assert_resized(circuit: Circuit, resized: Circuit) -> None:
+    """Check that the resized circuit keeps the gates of the circuit and reuses a wire per saved qubit."""
+    assert resized.num_qudits <= circuit.num_qudits
+    assert count_resets(resized) - count_resets(circuit) == circuit.num_qudits - resized.num_qudits
+    assert resized.num_operations - 2 * count_resets(resized) == circuit.num_operations - 2 * count_resets(circuit)
+
+
+def get_test_circuits() -> list:
+    circuits = [pytest.param(random_circuit(5, 8, seed), id=f'random-{seed}') for seed in range(10)]
+    circuits += [pytest.param(Circuit.from_file(str(path)), id=path.stem) for path in QASM_PATHS]
+    return circuits
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_greedy(circuit: Circuit) -> None:
+    state = DependencyState.from_circuit(circuit)
+    resized = resize(circuit, 'greedy')
+    assert_resized(circuit, resized)
+    assert resized.num_qudits >= state.get_min_qubit_bound()
+    # greedy stops when no pair is left, so the resized circuit has no resizable pair
+    assert DependencyState.from_circuit(resized).num_resizable_pairs == 0
+    if circuit.num_qudits <= MAX_BFS_QUDITS:
+        assert resized.num_qudits >= resize(circuit, 'bfs').num_qudits
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_best_first_against_bfs(circuit: Circuit) -> None:
+    state = DependencyState.from_circuit(circuit)
+    resized = resize(circuit, 'best_first')
+    assert_resized(circuit, resized)
+    assert resized.num_qudits >= state.get_min_qubit_bound()
+    if circuit.num_qudits <= MAX_BFS_QUDITS:
+        assert resized.num_qudits == resize(circuit, 'bfs').num_qudits
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_beam(circuit: Circuit) -> None:
+    best = resize(circuit, 'best_first').num_qudits
+    for beam_width in (1, 4):
+        resized = resize(circuit, 'beam', beam_width=beam_width)
+        assert_resized(circuit, resized)
+        assert resized.num_qudits >= best
+
+
+def test_beam_width_is_validated() -> None:
+    with pytest.raises(ValueError):
+        GateDependencyResize(resizing_method='beam', beam_width=0)
+
+
+def restart_greedy(circuit: Circuit, num_restarts: int, seed: int) -> Circuit:
+    """Resize the circuit with `restart_greedy`, whose trajectories run one after the other off the runtime."""
+    state = DependencyState.from_circuit(circuit)
+    resize_pass = GateDependencyResize(num_restarts=num_restarts, seed=seed)
+    return asyncio.run(resize_pass.restart_greedy(state.get_resizable_qubit_pairs(), circuit, state))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_restart_greedy(seed: int) -> None:
+    circuit = random_circuit(8, 14, seed)
+    single = restart_greedy(circuit, 1, seed)
+    best = restart_greedy(circuit, 8, seed)
+    assert_resized(circuit, best)
+    # the first trajectory is the single run, so the best of several is never worse
+    assert (best.num_qudits, best.multi_qudit_depth) <= (single.num_qudits, single.multi_qudit_depth)
+    assert get_wire_sequences(restart_greedy(circuit, 8, seed)) == get_wire_sequences(best)
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_bounded_exact_against_best_first(circuit: Circuit) -> None:
+    state = DependencyState.from_circuit(circuit)
+    resized = resize(circuit, 'bounded_exact')
+    assert_resized(circuit, resized)
+    assert resized.num_qudits >= state.get_min_qubit_bound()
+    assert resized.num_qudits == resize(circuit, 'best_first').num_qudits
+
+
+def test_bounded_exact_reports_a_cut_search() -> None:
+    # the candidates of bounded_exact need more qubits than the lower bound on some of these circuits
+    cut = 0
+    for seed in range(20):
+        circuit = random_circuit(6, 10, seed)
+        state = DependencyState.from_circuit(circuit)
+        pairs = state.get_resizable_qubit_pairs()
+        resized, minimal = GateDependencyResize(max_expansions=None).bounded_exact(pairs, circuit, state)
+        assert minimal
+        assert resized.num_qudits == resize(circuit, 'best_first').num_qudits
+        bounded, minimal = GateDependencyResize(max_expansions=1).bounded_exact(pairs, circuit, state)
+        if resized.num_qudits > state.get_min_qubit_bound(pairs):
+            # the search for fewer qubits than the candidates needs more than one expansion
+            assert not minimal
+            cut += 1
+        if minimal:
+            assert bounded.num_qudits == resized.num_qudits
+    assert cut > 0
+
+
+def test_bounded_exact_records_minimal() -> None:
+    circuit = random_circuit(6, 10, 0)
+    data = PassData(circuit)
+    asyncio.run(GateDependencyResize(resizing_method='bounded_exact').run(circuit, data))
+    assert data[GateDependencyResize.minimal_key] is True
+
+
+@pytest.mark.parametrize('circuit', get_test_circuits())
+def test_update_circuit_with_chains_single_pair(circuit: Circuit) -> None:
+    resize_pass = GateDependencyResize()
+    pairs = DependencyState.from_circuit(circuit).get_resizable_qubit_pairs()
+    for q_reuse, qs_to_use in pairs.items():
+        for q_to_use in qs_to_use:
+            expected = resize_pass.update_circuit(circuit, q_reuse, q_to_use, circuit)
+            chains = get_reuse_chains({q_to_use: q_reuse}, circuit.num_qudits)
+            resized = resize_pass.update_circuit_with_chains(circuit, chains)
+            assert get_wire_sequences(resized) == get_wire_sequences(expected)
+
+
+@pytest.mark.parametrize('cost_func', ['max_reuse', 'min_depth'])
+@pytest.mark.parametrize('method', ['greedy', 'beam', 'best_first'])
+@pytest.mark.parametrize('seed', range(10))
+def test_incremental_cost_against_cost_function(cost_func: str, method: str, seed: int) -> None:
+    resize_pass = GateDependencyResize(cost_func=cost_func, resizing_method=method)
+    circuit = CompactCircuit.from_circuit(random_circuit(6, 10, seed))
+    state = DependencyState.from_circuit(circuit)
+    # score the candidates of the first two rounds of a resizing
+    for _ in range(2):
+        pairs = [(q_reuse, q_to_use) for q_reuse, qs in state.get_resizable_qubit_pairs().items() for q_to_use in qs]
+        if not pairs:
+            break
+        context = resize_pass.get_cost_context(circuit, state)
+        for q_reuse, q_to_use in pairs:
+            expected = resize_pass.cost_function(circuit.merge(q_reuse, q_to_use))
+            assert resize_pass.get_resized_cost(context, q_reuse, q_to_use) == expected, (q_reuse, q_to_use)
+        q_reuse, q_to_use = pairs[0]
+        circuit = circuit.merge(q_reuse, q_to_use)
+        state = state.merge(q_reuse, q_to_use)
+
+
+@pytest.mark.parametrize('cost_func', ['max_reuse', 'min_depth'])
+@pytest.mark.parametrize('method', ['greedy', 'beam'])
+def test_incremental_cost_keeps_the_resizing(cost_func: str, method: str) -> None:
+    for seed in range(10):
+        circuit = random_circuit(6, 10, seed)
+        resized = resize(circuit, method, cost_func=cost_func)
+        expected = resize(circuit, method, cost_func=cost_func, incremental_cost=False)
+        assert get_wire_sequences(resized) == get_wire_sequences(expected)
+
+
+def test_update_circuit_with_chains_of_updates() -> None:
+    # 0 and 1 never interact with 2 and 3, so 2 and 3 can both reuse a wire
+    circuit = Circuit(4)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    circuit.append_gate(CNOTGate(), [2, 3])
+    circuit.append_gate(CNOTGate(), [2, 3])
+    resize_pass = GateDependencyResize()
+    expected = resize_pass.update_circuit(circuit, 0, 2, circuit)
+    # after the first update, 3 is relabeled 2
+    expected = resize_pass.update_circuit(expected, 1, 2, circuit)
+    resized = resize_pass.update_circuit_with_chains(circuit, [[0, 2], [1, 3]])
+    assert resized.num_qudits == 2
+    assert count_resets(resized) == 2
+    assert get_wire_sequences(resized) == get_wire_sequences(expected)
+
+
+def test_update_circuit_with_cyclic_chains() -> None:
+    # 3 can reuse 0 and 1 can reuse 2, but 1 must start before 0 finishes and 3 before 2 finishes
+    circuit = Circuit(4)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    circuit.append_gate(CNOTGate(), [2, 3])
+    with pytest.raises(ValueError):
+        GateDependencyResize().update_circuit_with_chains(circuit, [[0, 3], [2, 1]])
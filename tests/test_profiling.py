@@ -0,0 +1,50 @@
+"""Tests of the profiling counters and timers of `resize.profiling`."""
+from __future__ import annotations
+
+from bqskit.compiler.passdata import PassData
+from bqskit.ir.circuit import Circuit
+from resize.profiling import ResizeProfile
+from resize.profiling import count
+from resize.profiling import get_active_profile
+from resize.profiling import profile_pass
+from resize.profiling import task_profile
+from resize.profiling import timed
+
+
+def test_profile_pass_records_into_pass_data() -> None:
+    data = PassData(Circuit(2))
+    with profile_pass('pass', data, True, log=False):
+        count('events')
+        count('events', 2)
+        with timed('phase'):
+            pass
+    summary = data[ResizeProfile.pass_data_key]
+    assert summary['counters'] == {'events': 3}
+    assert set(summary['timers']) == {'pass', 'phase'}
+    with profile_pass('pass', data, True, log=False):
+        count('events')
+    assert data[ResizeProfile.pass_data_key]['counters'] == {'events': 4}
+    assert get_active_profile() is None
+
+
+def test_nested_profile_pass_restores_the_outer_profile() -> None:
+    data = PassData(Circuit(2))
+    with profile_pass('pass', data, True, log=False) as outer:
+        with profile_pass('predicate', data, True, log=False) as inner:
+            count('inner_events')
+        assert get_active_profile() is outer
+        count('outer_events')
+    assert inner.counters == {'inner_events': 1}
+    assert outer.counters == {'outer_events': 1}
+    assert data[ResizeProfile.pass_data_key]['counters'] == {'inner_events': 1, 'outer_events': 1}
+    assert get_active_profile() is None
+
+
+def test_disabled_profiles_record_nothing() -> None:
+    data = PassData(Circuit(2))
+    with profile_pass('pass', data, False) as profile:
+        count('events')
+        with task_profile(False) as task:
+            count('events')
+    assert profile is None and task is None
+    assert ResizeProfile.pass_data_key not in data
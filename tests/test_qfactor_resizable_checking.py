@@ -0,0 +1,182 @@
+"""Tests of the qfactor resizability checks of `resize.qfactor_resizable_checking`."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import VariableUnitaryGate
+from bqskit.qis.unitary.unitarymatrix import UnitaryMatrix
+from resize.qfactor_resizable_checking import DEFAULT_PROFILES
+from resize.qfactor_resizable_checking import FULL_PROFILE
+from resize.qfactor_resizable_checking import TWO_STAGE_PROFILES
+from resize.qfactor_resizable_checking import check_layouts
+from resize.qfactor_resizable_checking import get_blocks
+from resize.qfactor_resizable_checking import get_executor
+from resize.qfactor_resizable_checking import get_reduced_blocks
+from resize.qfactor_resizable_checking import get_resizable_pairs_qfactor
+from resize.qfactor_resizable_checking import get_shared_unitary
+from resize.qfactor_resizable_checking import get_signalled_qubits_sampled
+from resize.qfactor_resizable_checking import get_signalling_qubits
+from resize.qfactor_resizable_checking import get_subblock_pairs
+from resize.qfactor_resizable_checking import iter_checks
+from resize.qfactor_resizable_checking import prescreen_resizable_pairs
+from resize.qfactor_resizable_checking import share_unitary
+from resize.qfactor_resizable_checking import shutdown_executor
+from resize.qfactor_resizable_checking import split_batches
+from resize.twoblockqfactor import fit_two_blocks
+
+from .helpers import random_circuit
+
+
+def qfactor_accepts(target: UnitaryMatrix, blocks: list, threshold: float) -> bool:
+    """Whether a single full precision QFactor instantiation of the blocks implements the target."""
+    circuit = Circuit(target.num_qudits)
+    for block in blocks:
+        circuit.append_gate(VariableUnitaryGate(len(block)), block)
+    circuit.instantiate(target, method='qfactor', **FULL_PROFILE)
+    return circuit.get_unitary().get_distance_from(target, 1) < threshold
+
+
+def get_pairs(num_qudits: int) -> list:
+    """Every (q_reuse, q_to_use) qubit pair."""
+    return [
+        (q_reuse, q_to_use) for q_reuse in range(num_qudits) for q_to_use in range(num_qudits) if q_reuse != q_to_use
+    ]
+
+
+def get_pair_layouts(num_qudits: int) -> list:
+    """The full blocks of every qubit pair."""
+    return [get_blocks([q_to_use], [q_reuse], num_qudits) for q_reuse, q_to_use in get_pairs(num_qudits)]
+
+
+def test_default_profiles_accept_as_a_single_qfactor_instantiation() -> None:
+    assert DEFAULT_PROFILES == ((FULL_PROFILE, None),)
+    layouts = get_pair_layouts(4)
+    for seed in range(3):
+        target = random_circuit(4, 8, seed).get_unitary()
+        expected = [qfactor_accepts(target, list(layout), 1e-10) for layout in layouts]
+        assert check_layouts(target, layouts, 1e-10) == expected
+        assert check_layouts(target, layouts, 1e-10, TWO_STAGE_PROFILES) == expected
+
+
+def square_odd_numbers(batch: list) -> list:
+    """A check of a batch run by the process pool, which rejects the even numbers."""
+    return [x * x if x % 2 else None for x in batch]
+
+
+def test_split_batches() -> None:
+    for length in range(12):
+        for num_batches in range(1, 6):
+            batches = split_batches(list(range(length)), num_batches)
+            assert [x for batch in batches for x in batch] == list(range(length))
+            assert len(batches) == max(1, min(num_batches, length))
+            assert max(map(len, batches)) - min(map(len, batches)) <= 1
+
+
+def test_checks_reuse_one_process_pool() -> None:
+    executor = get_executor(2)
+    assert get_executor(2) is executor
+    assert dict(iter_checks(square_odd_numbers, list(range(10)), 2)) == {x: x * x for x in range(1, 10, 2)}
+    # closing the stream early cancels the remaining batches but keeps the pool
+    stream = iter_checks(square_odd_numbers, list(range(10)), 2)
+    next(stream)
+    stream.close()
+    assert get_executor(2) is executor
+    shutdown_executor()
+
+
+def read_shared_unitaries(batch: list) -> list:
+    """A check of a batch run by the process pool, which reads the shared unitary of each of its handles."""
+    return [get_shared_unitary(handle).numpy.copy() for handle in batch]
+
+
+def test_workers_read_the_shared_unitary() -> None:
+    unitary = random_circuit(4, 8, 0).get_unitary()
+    with share_unitary(unitary) as handle:
+        assert isinstance(handle, tuple)
+        results = dict(iter_checks(read_shared_unitaries, [handle] * 4, 2))
+    assert sorted(results) == [0, 1, 2, 3]
+    for utry in results.values():
+        assert np.array_equal(utry, unitary.numpy)
+    # the workers of the runtime may run on other machines, so they are sent the unitary itself
+    with share_unitary(unitary, on_runtime=True) as handle:
+        assert handle is unitary
+    with share_unitary(None) as handle:
+        assert handle is None
+
+
+def test_prescreen_against_instantiation() -> None:
+    pairs = get_pairs(4)
+    for seed in range(3):
+        circuit = random_circuit(4, 8, seed)
+        accepted = check_layouts(circuit.get_unitary(), get_pair_layouts(4), 1e-10)
+        resizable = {pair for pair, ok in zip(pairs, accepted) if ok}
+        definite, to_check = prescreen_resizable_pairs(circuit)
+        assert set(definite) <= resizable
+        # the pairs that are neither resizable by gate dependency nor left to check are never resizable
+        assert not (set(pairs) - set(definite) - set(to_check)) & resizable
+        assert get_resizable_pairs_qfactor(circuit, num_cpus=2) == sorted(resizable)
+
+
+def test_subblock_pairs_have_the_requested_size() -> None:
+    for size in range(4, 9):
+        for q_subblock1, q_subblock2 in get_subblock_pairs((0, 3), size, 5):
+            assert len(q_subblock1) + len(q_subblock2) == size
+            assert 0 in q_subblock1 and 3 not in q_subblock1
+            assert 3 in q_subblock2 and 0 not in q_subblock2
+
+
+def test_reduced_blocks_have_the_smallest_size() -> None:
+    for seed in range(2):
+        circuit = random_circuit(4, 8, seed)
+        target = circuit.get_unitary()
+        pairs = get_resizable_pairs_qfactor(circuit, num_cpus=2)
+        reduced_blocks = get_reduced_blocks(circuit, pairs, num_cpus=2)
+        sizes = {len(block1) + len(block2) for blocks in reduced_blocks.values() for block1, block2 in blocks}
+        assert len(sizes) == 1
+        size = sizes.pop()
+        for pair in pairs:
+            smaller = [
+                layout for smaller_size in range(4, size) for layout in get_subblock_pairs(pair, smaller_size, 4)
+            ]
+            assert not any(check_layouts(target, smaller, 1e-10))
+        for blocks in reduced_blocks.values():
+            assert all(check_layouts(target, blocks, 1e-10))
+    shutdown_executor()
+
+
+def test_two_block_engine_against_qfactor() -> None:
+    layouts = get_pair_layouts(4)
+    for seed in range(3):
+        target = random_circuit(4, 8, seed).get_unitary()
+        distances, blocks = fit_two_blocks(target, layouts, seed=0)
+        expected = [qfactor_accepts(target, list(layout), 1e-10) for layout in layouts]
+        assert [distance < 1e-10 for distance in distances] == expected
+        assert np.array_equal(fit_two_blocks(target, layouts, seed=0)[0], distances)
+        # a restart from the fitted blocks does not lose the fit
+        restarted, _ = fit_two_blocks(target, layouts, starts=blocks)
+        assert np.all(restarted <= distances + 1e-12)
+
+
+def test_two_block_engine_rejects_qudits() -> None:
+    with pytest.raises(ValueError):
+        fit_two_blocks(UnitaryMatrix.identity(9, [3, 3]), [([0], [1])])
+
+
+def test_sampled_signalling_against_the_unitary() -> None:
+    for seed in range(4):
+        circuit = random_circuit(5, 10, seed)
+        utry = circuit.get_unitary().numpy
+        for q_in in range(5):
+            expected = {q_out for q_out in range(5) if q_out != q_in and q_in in get_signalling_qubits(utry, q_out, 5)}
+            assert get_signalled_qubits_sampled(circuit, q_in) == expected
+
+
+def test_reduced_pairs_against_full_pairs() -> None:
+    for seed in range(3):
+        circuit = random_circuit(5, 10, seed)
+        pairs = get_resizable_pairs_qfactor(circuit, num_cpus=2)
+        assert get_resizable_pairs_qfactor(circuit, num_cpus=2, reduced=True) == pairs
+        # the cores wider than two qubits are decided on sampled input states
+        assert get_resizable_pairs_qfactor(circuit, num_cpus=2, reduced=True, max_core_qudits=2) == pairs
+    shutdown_executor()
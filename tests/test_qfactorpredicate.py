@@ -0,0 +1,79 @@
+"""Tests of the checks and the result cache of `ResizingQFactorPredicate`."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from bqskit.compiler.machine import MachineModel
+from bqskit.compiler.passdata import PassData
+from bqskit.ir.circuit import Circuit
+from resize.cache import ResultCache
+from resize.qfactor_resizable_checking import get_resizable_pairs_qfactor
+from resize.qfactor_resizable_checking import shutdown_executor
+from resize.qfactorpredicate import ResizingQFactorPredicate
+
+from .helpers import random_circuit
+
+
+def get_counted_predicate(cache: ResultCache, monkeypatch: pytest.MonkeyPatch) -> tuple[ResizingQFactorPredicate, list]:
+    """A predicate whose checks are counted and always find the pair (1, 0) with its full blocks."""
+    predicate = ResizingQFactorPredicate(cache=cache)
+    checks = []
+
+    def check_resizable(circuit: Circuit, unitary: object = None) -> tuple[list, dict]:
+        checks.append(circuit)
+        return [(1, 0)], {(1, 0): [[[0, 2, 3], [1, 2, 3]]]}
+
+    monkeypatch.setattr(predicate, 'check_resizable', check_resizable)
+    return predicate, checks
+
+
+def get_data(circuit: Circuit, seed: int | None) -> PassData:
+    data = PassData(circuit)
+    data.model = MachineModel(circuit.num_qudits)
+    data.seed = seed
+    return data
+
+
+def test_seeded_checks_are_cached_under_their_seed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    predicate, checks = get_counted_predicate(ResultCache(tmp_path), monkeypatch)
+    circuit = random_circuit(4, 8, 0)
+    for seed in (0, 0, 1, 1, 0):
+        data = get_data(circuit, seed)
+        assert predicate.check_pass_data(circuit, data)
+        assert data[predicate.pairs_key] == [(1, 0)]
+        assert data['block1'] == [0, 2, 3]
+    assert len(checks) == 2
+
+
+def test_unseeded_checks_are_not_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    predicate, checks = get_counted_predicate(ResultCache(tmp_path), monkeypatch)
+    circuit = random_circuit(4, 8, 0)
+    for _ in range(2):
+        assert predicate.check_pass_data(circuit, get_data(circuit, None))
+    assert len(checks) == 2
+    assert list(tmp_path.glob('*.pkl')) == []
+
+
+def test_unreadable_cache_entry_is_a_miss(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+    key = ResultCache.make_key(random_circuit(4, 8, 0), 'settings')
+    assert cache.get(key) is None
+    cache.set(key, ([(1, 0)], {}))
+    assert cache.get(key) == ([(1, 0)], {})
+    (tmp_path / f'{key}.pkl').write_bytes(b'not a pickle')
+    assert cache.get(key) is None
+    assert not (tmp_path / f'{key}.pkl').exists()
+
+
+def test_first_hit_stops_at_max_pairs_and_block_size_target() -> None:
+    predicate = ResizingQFactorPredicate(max_pairs=1, block_size_target=6)
+    for seed in range(2):
+        circuit = random_circuit(4, 8, seed)
+        all_pairs = get_resizable_pairs_qfactor(circuit, num_cpus=2)
+        pairs, reduced_blocks = predicate.check_resizable(circuit)
+        assert len(pairs) == 1 and pairs[0] in all_pairs
+        # the first blocks found for the pair are kept, without searching for the other ones of the same size
+        assert list(reduced_blocks) == pairs
+        assert len(reduced_blocks[pairs[0]]) == 1
+    shutdown_executor()
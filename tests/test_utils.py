@@ -0,0 +1,93 @@
+"""Tests of the matching and cycle helpers of `resize.utils`."""
+from __future__ import annotations
+
+from itertools import permutations
+
+import numpy as np
+import pytest
+from bqskit.ir.circuit import Circuit
+from bqskit.ir.gates import CNOTGate
+from resize.utils import find_reuse_cycle
+from resize.utils import get_dependency_cones
+from resize.utils import get_max_reuse_matching
+from resize.utils import get_resizable_qubit_pairs
+from resize.utils import get_reuse_chains
+
+from .helpers import random_circuit
+
+
+def get_brute_force_matching_size(resizable_qubit_pairs: dict[int, list]) -> int:
+    """The size of a maximum matching, by trying every assignment of the qubits to reuse."""
+    qubits = sorted(set(resizable_qubit_pairs) | {q for qs in resizable_qubit_pairs.values() for q in qs})
+    best = 0
+    for assigned in permutations(qubits + [None] * len(resizable_qubit_pairs), len(resizable_qubit_pairs)):
+        size = sum(
+            q_to_use is not None and q_to_use in resizable_qubit_pairs[q_reuse]
+            for q_reuse, q_to_use in zip(resizable_qubit_pairs, assigned)
+        )
+        best = max(best, size)
+    return best
+
+
+def assert_matching(resizable_qubit_pairs: dict[int, list], matching: dict[int, int]) -> None:
+    """Check that every matched pair is resizable and every qubit is reused at most once."""
+    assert len(set(matching.values())) == len(matching)
+    for q_to_use, q_reuse in matching.items():
+        assert q_to_use in resizable_qubit_pairs[q_reuse]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_max_reuse_matching_is_maximum(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    num_qudits = 5
+    pairs = {
+        q_reuse: [q for q in range(num_qudits) if q != q_reuse and rng.random() < 0.3]
+        for q_reuse in range(num_qudits)
+    }
+    matching = get_max_reuse_matching(pairs)
+    assert_matching(pairs, matching)
+    assert len(matching) == get_brute_force_matching_size(pairs)
+
+
+def test_max_reuse_matching_extends_matching() -> None:
+    pairs = {0: [1, 2], 1: [2], 2: []}
+    initial = {2: 0}
+    matching = get_max_reuse_matching(pairs, initial)
+    assert initial == {2: 0}
+    assert_matching(pairs, matching)
+    # the augmenting path moves 0 to 1 so that 2 reuses 1
+    assert matching == {1: 0, 2: 1}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_max_reuse_matching_of_circuits(seed: int) -> None:
+    circuit = random_circuit(5, 8, seed)
+    pairs = get_resizable_qubit_pairs(circuit)
+    matching = get_max_reuse_matching(pairs)
+    assert_matching(pairs, matching)
+    assert len(matching) == get_brute_force_matching_size(pairs)
+
+
+def get_cyclic_circuit() -> Circuit:
+    """3 can reuse 0 and 1 can reuse 2, but 1 must start before 0 finishes and 3 before 2 finishes."""
+    circuit = Circuit(4)
+    circuit.append_gate(CNOTGate(), [0, 1])
+    circuit.append_gate(CNOTGate(), [2, 3])
+    return circuit
+
+
+def test_find_reuse_cycle_on_cyclic_matching() -> None:
+    cones = get_dependency_cones(get_cyclic_circuit())
+    matching = {3: 0, 1: 2}
+    # the chains themselves have no cycle, only the gate dependencies do
+    assert sorted(get_reuse_chains(matching, 4)) == [[0, 3], [2, 1]]
+    cycle = find_reuse_cycle(cones, matching)
+    assert cycle is not None
+    assert sorted(cycle) == [(0, 3), (2, 1)]
+
+
+def test_find_reuse_cycle_on_acyclic_matching() -> None:
+    cones = get_dependency_cones(get_cyclic_circuit())
+    assert find_reuse_cycle(cones, {2: 0, 3: 1}) is None
+    assert find_reuse_cycle(cones, {3: 0}) is None
+    assert find_reuse_cycle(cones, {}) is None